@@ -1,148 +1,230 @@
 import os
 import json
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import matplotlib.font_manager as fm
 from datetime import datetime, timezone, timedelta
 import numpy as np
 import platform
 import time
 import glob
+from scripts.config import REPORTING
+from scripts.histogram import LatencyHistogram
+from scripts.sample_store import list_series, read_exchange, FLAG_ERROR, FLAG_THROTTLED
+from scripts.downsample import load_series_rollups, downsample_series, minmax_buckets
+from scripts.retention import TIERS, HIST_BUCKETS, read_aggregates, hist_index, hist_percentiles
+from scripts.charts import render_charts
 
 # Define data and report paths
 DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
 REPORTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'reports')
 ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+STORE_DIR = os.path.join(DATA_DIR, 'store')
+ROLLUPS_DIR = os.path.join(DATA_DIR, 'rollups')
+AGGREGATE_DIR = os.path.join(DATA_DIR, 'aggregates')
+CHART_CACHE = os.path.join(DATA_DIR, 'chart_cache.json')
 
 # Ensure directories exist
 os.makedirs(DATA_DIR, exist_ok=True)
 os.makedirs(REPORTS_DIR, exist_ok=True)
 
-# Set custom font from assets folder
-def set_custom_font():
-    """Set custom font from assets folder"""
+# Custom font from assets folder
+def get_font_path():
+    """Get the custom font from assets folder, None if it is missing"""
     font_path = os.path.join(ASSETS_DIR, 'IBMPlexMono-Medium.ttf')
     if os.path.exists(font_path):
-        # Register the font
-        font_prop = fm.FontProperties(fname=font_path)
-        # Use a simple approach: use the default font
-        # Just register the font so it can be used in specific text elements
-        return font_prop
+        # Chart workers load the font from this path
+        return font_path
     else:
         print(f"Error: Font file not found at {font_path}")
         return None
 
-def load_latency_data(exchange):
+def load_latency_data(exchange, days=None):
     """
     Load latency data for a specific exchange
     
+    Samples are read from the columnar sample store when it holds data for
+    the exchange, together with the minute and hour aggregates that
+    retention compacted its older samples into (see load_aggregates);
+    otherwise the legacy data/{exchange}_latency_data.json file is used.
+    
     Args:
         exchange (str): Exchange name
+        days (float, optional): Only load the most recent days of data,
+            defaults to REPORTING['window_days']
     
     Returns:
-        list: Latency data records
+        dict: 'timestamp' (Unix seconds) and 'latency' (ms) arrays, and
+        'endpoints' (store series of the exchange) and 'aggregates' when
+        read from the store
     """
+    if days is None:
+        days = REPORTING.get('window_days')
+    start = time.time() - days * 86400 if days else None
+    
+    endpoints = [endpoint for series_exchange, endpoint in list_series(STORE_DIR) if series_exchange == exchange]
+    if endpoints:
+        window = read_exchange(exchange, start=start, columns=['timestamp', 'latency', 'flags'],
+                               store_dir=STORE_DIR)
+        ok = (window['flags'] & (FLAG_ERROR | FLAG_THROTTLED)) == 0
+        return {'timestamp': window['timestamp'][ok], 'latency': window['latency'][ok], 'endpoints': endpoints,
+                'aggregates': load_aggregates(exchange, endpoints, start)}
+    
+    empty = {'timestamp': np.empty(0), 'latency': np.empty(0)}
     data_file = os.path.join(DATA_DIR, f'{exchange}_latency_data.json')
     if not os.path.exists(data_file):
         print(f"Error: Latency data file not found at {data_file}")
-        return []
+        return empty
     
     with open(data_file, 'r') as file:
         try:
             data = json.load(file)
-            return data
         except json.JSONDecodeError:
             print(f"Error: Failed to parse {data_file}")
-            return []
+            return empty
+    
+    timestamps = np.array([float(entry['timestamp']) for entry in data])
+    latencies = np.array([entry['latency'] for entry in data], dtype=float)  # already in milliseconds
+    order = np.argsort(timestamps, kind='stable')
+    timestamps, latencies = timestamps[order], latencies[order]
+    if start is not None:
+        timestamps, latencies = timestamps[timestamps >= start], latencies[timestamps >= start]
+    return {'timestamp': timestamps, 'latency': latencies}
 
-def generate_latency_report(exchange, data):
+def load_aggregates(exchange, endpoints, start=None):
     """
-    Generate latency report chart for a specific exchange
+    Load the retention aggregates of an exchange's store series
+
+    Raw samples older than RETENTION['raw_days'] only survive as minute
+    and hour aggregates (see scripts/retention.py); the tiers cover
+    disjoint periods, so they are simply combined.
+
+    Args:
+        exchange (str): Exchange name
+        endpoints (list): Endpoint keys
+        start (float, optional): Only load buckets starting at or after this Unix time
+
+    Returns:
+        dict: 'bucket' (start, Unix seconds), 'width' (seconds), 'count',
+        'min', 'max', 'sum' and 'hist' (rows x HIST_BUCKETS) arrays of the
+        buckets holding latency samples, ordered by bucket
+    """
+    parts = []
+    for endpoint in endpoints:
+        for tier, width in TIERS.items():
+            aggregates = read_aggregates(tier, exchange, endpoint, start=start, aggregate_dir=AGGREGATE_DIR)
+            aggregates['width'] = np.full(len(aggregates['bucket']), float(width))
+            parts.append(aggregates)
+    columns = ('bucket', 'width', 'count', 'min', 'max', 'sum')
+    merged = {column: np.concatenate([part[column].astype(np.float64) for part in parts]) for column in columns}
+    merged['hist'] = np.concatenate([part['hist'] for part in parts]).astype(np.int64)
+    # Buckets of failed requests only have no latency
+    keep = merged['count'] > 0
+    order = np.argsort(merged['bucket'][keep], kind='stable')
+    return {column: values[keep][order] for column, values in merged.items()}
+
+def count_samples(data):
+    """Number of latency samples in data from load_latency_data, raw and aggregated"""
+    aggregates = data.get('aggregates')
+    return len(data['latency']) + (int(aggregates['count'].sum()) if aggregates is not None else 0)
+
+def build_latency_chart(exchange, data):
+    """
+    Build the latency report chart spec of an exchange (see scripts/charts.py)
     
     Args:
         exchange (str): Exchange name
-        data (list): Latency data records
+        data (dict): 'timestamp' and 'latency' arrays, and optionally
+            'aggregates' for older periods, from load_latency_data
     
     Returns:
-        bool: True if successful, False otherwise
+        dict: Chart spec, None if there is no data
     """
-    if not data:
+    if not count_samples(data):
         print(f"Error: No latency data available for {exchange}")
-        return False
-    
-    # Set custom font
-    font_prop = set_custom_font()
+        return None
     
     # Extract time and latency data
-    timestamps = [entry['timestamp'] for entry in data]
-    dates = [datetime.fromtimestamp(int(ts)) for ts in timestamps]  # Ensure timestamps are integers
-    latencies = [entry['latency'] for entry in data]  # already in milliseconds
+    timestamps = np.asarray(data['timestamp'], dtype=float)
+    latencies = np.asarray(data['latency'], dtype=float)  # already in milliseconds
     
-    # Calculate statistics (removed max and min latency)
-    avg_latency = np.mean(latencies)
-    p95_latency = np.percentile(latencies, 95)
-    
-    # Create chart
-    plt.figure(figsize=(12, 7))
-    
-    # Main chart - latency time series
-    plt.subplot(111)
-    plt.plot(dates, latencies, 'b-', linewidth=1, alpha=0.7)
-    plt.plot(dates, latencies, 'bo', markersize=3)
+    aggregates = data.get('aggregates')
+    if aggregates is not None and not len(aggregates['bucket']):
+        aggregates = None
     
-    # Set x-axis date format
-    plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%m-%d %H:%M'))
-    plt.gcf().autofmt_xdate()  # Auto-rotate date labels
-    
-    # Add title and labels
-    beijing_tz = timezone(timedelta(hours=8))
-    current_time = datetime.now(beijing_tz).isoformat(timespec='seconds')
-    exchange_name = exchange.upper()
-    title = f'{exchange_name} API Latency Report (Generated at {current_time})'
-    xlabel = 'Time'
-    ylabel = 'Latency (ms)'
-    
-    if font_prop:
-        plt.title(title, fontproperties=font_prop)
-        plt.xlabel(xlabel, fontproperties=font_prop)
-        plt.ylabel(ylabel, fontproperties=font_prop)
+    # Calculate statistics (removed max and min latency)
+    if aggregates is None:
+        histogram = LatencyHistogram()
+        histogram.record_many(latencies)
+        stats = {'Samples': len(latencies), 'Avg Latency': float(np.mean(latencies))}
+        stats.update({f"P{p:g}": value for p, value in histogram.percentiles((50, 90, 99, 99.9)).items()})
     else:
-        plt.title(title)
-        plt.xlabel(xlabel)
-        plt.ylabel(ylabel)
-    plt.grid(True, linestyle='--', alpha=0.7)
-    
-    # Add statistics (removed max and min latency)
-    stats_text = (
-        f"Statistics:\n"
-        f"Samples: {len(latencies)}\n"
-        f"Avg Latency: {avg_latency:.2f} ms\n"
-        f"95th Percentile: {p95_latency:.2f} ms"
-    )
-    
-    plt.annotate(stats_text, xy=(0.02, 0.97), xycoords='axes fraction',
-                bbox=dict(boxstyle="round,pad=0.5", fc="white", alpha=0.8),
-                va='top', ha='left', fontsize=9, 
-                fontproperties=font_prop if font_prop else None)
-    
-    # Draw average and 95% lines
-    avg_label = f'Avg: {avg_latency:.2f} ms'
-    p95_label = f'P95: {p95_latency:.2f} ms'
-        
-    plt.axhline(y=avg_latency, color='r', linestyle='-', alpha=0.5, label=avg_label)
-    plt.axhline(y=p95_latency, color='g', linestyle='--', alpha=0.5, label=p95_label)
+        # Compacted periods only have histograms, so the raw samples are binned the same way
+        hist = aggregates['hist'].sum(axis=0) + np.bincount(hist_index(latencies), minlength=HIST_BUCKETS)
+        samples = count_samples(data)
+        low = float(min(aggregates['min'].min(), latencies.min(initial=np.inf)))
+        high = float(max(aggregates['max'].max(), latencies.max(initial=-np.inf)))
+        stats = {'Samples': samples, 'Avg Latency': float((aggregates['sum'].sum() + latencies.sum()) / samples)}
+        stats.update({f"P{p:g}": value for p, value in hist_percentiles(hist, (50, 90, 99, 99.9), low, high).items()})
     
-    plt.legend(loc='upper right', prop=font_prop if font_prop else None)
+    # Reduce long series to min/max per time bucket, about one bucket per
+    # REPORTING['pixels_per_bucket'] pixels of chart width
+    width_px = REPORTING['chart_width'] * REPORTING['dpi']
+    n_buckets = max(1, int(width_px / REPORTING.get('pixels_per_bucket', 4)))
+    old_times, old_latencies = np.empty(0), np.empty(0)
+    if aggregates is not None:
+        # Aggregated periods come first; each part gets its share of the chart width
+        centres = aggregates['bucket'] + aggregates['width'] / 2
+        raw_start = timestamps[0] if len(timestamps) else centres[-1]
+        end = timestamps[-1] if len(timestamps) else centres[-1]
+        raw_share = (end - raw_start) / (end - centres[0]) if end > centres[0] else 0.0
+        raw_buckets = max(1, int(n_buckets * raw_share))
+        old_times, old_latencies = minmax_buckets(centres, aggregates['min'], aggregates['max'],
+                                                  max(1, n_buckets - raw_buckets), centres[0], raw_start)
+        n_buckets = raw_buckets
+    # Rollups are kept per store series; the legacy JSON files are short enough without them
+    rollups = [load_series_rollups(exchange, endpoint, ROLLUPS_DIR, STORE_DIR) for endpoint in data.get('endpoints', [])]
+    plot_times, plot_latencies, downsampled = downsample_series(timestamps, latencies, n_buckets, rollups)
+    if aggregates is not None:
+        plot_times = np.concatenate([old_times, plot_times])
+        plot_latencies = np.concatenate([old_latencies, plot_latencies])
+        downsampled = True
     
-    # Save chart with a fixed filename to overwrite old reports
-    report_file = os.path.join(REPORTS_DIR, f'{exchange}_latency_report.png')
-    plt.savefig(report_file, dpi=300, bbox_inches='tight')
-    print(f"Report generated: {report_file}")
+    beijing_tz = timezone(timedelta(hours=8))
+    return {
+        'kind': 'timeseries',
+        # Fixed filename to overwrite old reports
+        'path': os.path.join(REPORTS_DIR, f'{exchange}_latency_report'),
+        'title': f'{exchange.upper()} API Latency Report',
+        'generated_at': datetime.now(beijing_tz).isoformat(timespec='seconds'),
+        'xlabel': 'Time',
+        'ylabel': 'Latency (ms)',
+        'font': get_font_path(),
+        'size': (REPORTING['chart_width'], REPORTING['chart_height']),
+        'dpi': REPORTING['dpi'],
+        'data': {'times': np.asarray(plot_times, dtype=float), 'latency': np.asarray(plot_latencies, dtype=float),
+                 'downsampled': bool(downsampled)},
+        'stats': stats,
+    }
+
+def generate_latency_report(exchange, data):
+    """
+    Generate latency report chart for a specific exchange
     
-    # Close chart
-    plt.close()
+    Args:
+        exchange (str): Exchange name
+        data (dict): 'timestamp' and 'latency' arrays from load_latency_data
     
-    return True
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    spec = build_latency_chart(exchange, data)
+    if spec is None:
+        return False
+    results = render_charts([spec], cache_file=CHART_CACHE)
+    for report_file, status in results.items():
+        if status == 'cached':
+            print(f"Report unchanged: {report_file}")
+        elif status == 'rendered':
+            print(f"Report generated: {report_file}")
+    return all(status in ('rendered', 'cached') for status in results.values())
 
 def generate_all_reports():
     """Generate reports for both Bitget and OKX exchanges"""
@@ -150,18 +232,31 @@ def generate_all_reports():
     
     print(f"Generating reports for exchanges: {', '.join(exchanges)}")
     
+    # Build all chart specs first, then render them in one process pool
+    specs = []
     for exchange in exchanges:
-        print(f"\nGenerating report for {exchange.upper()}...")
+        print(f"\nLoading data for {exchange.upper()}...")
         data = load_latency_data(exchange)
         
-        if data:
-            print(f"Loaded {len(data)} latency data records")
-            if generate_latency_report(exchange, data):
-                print(f"Report generation successful for {exchange}")
-            else:
-                print(f"Report generation failed for {exchange}")
+        if count_samples(data):
+            print(f"Loaded {count_samples(data)} latency data records")
+            spec = build_latency_chart(exchange, data)
+            if spec is not None:
+                specs.append(spec)
         else:
             print(f"Error: No latency data available for {exchange}")
+    
+    started = time.perf_counter()
+    results = render_charts(specs, cache_file=CHART_CACHE)
+    for report_file, status in results.items():
+        if status == 'rendered':
+            print(f"Report generated: {report_file}")
+        elif status == 'cached':
+            print(f"Report unchanged, skipped: {report_file}")
+        else:
+            print(f"Report generation failed for {report_file}")
+    print(f"Rendered {sum(status == 'rendered' for status in results.values())} of {len(results)} charts "
+          f"in {time.perf_counter() - started:.2f}s")
 
 def main():
     """Main function"""
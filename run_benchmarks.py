@@ -12,16 +12,23 @@ from datetime import datetime
 try:
     # 尝试从已安装的包导入
     from scripts import (
-        run_okx_benchmarks,
-        run_bitget_benchmarks,
-        generate_comprehensive_report
+        run_async_benchmarks,
+        run_parallel_benchmarks,
+        generate_comprehensive_report,
+        start_mock_server,
+        API_SETTINGS,
+        ADAPTIVE,
+        MOCK_SERVER,
+        ENDPOINTS
     )
 except ImportError:
     # 如果上述导入失败，尝试从本地目录导入
     sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-    from scripts.okx_latency import run_all_benchmarks as run_okx_benchmarks
-    from scripts.bitget_latency import run_all_benchmarks as run_bitget_benchmarks
     from scripts.benchmark_core import generate_comprehensive_report
+    from scripts.async_probe import run_async_benchmarks
+    from scripts.runner import run_parallel_benchmarks
+    from scripts.mock_exchange import start_mock_server
+    from scripts.config import API_SETTINGS, ADAPTIVE, MOCK_SERVER, ENDPOINTS
 
 def create_output_dir(output_dir="docs"):
     """Create output directory if it doesn't exist"""
@@ -29,50 +36,89 @@ def create_output_dir(output_dir="docs"):
     print(f"Benchmark results will be saved to: {os.path.abspath(output_dir)}")
     return output_dir
 
-def run_benchmarks(exchange="all", output_dir="benchmark_results"):
+def use_mock_exchange():
+    """
+    Start the local mock exchange and point every exchange at it
+
+    Mock mode also marks every result as mock and keeps it apart from real
+    exchange data: runs, samples and the HTML report go to the locations
+    in MOCK_SERVER instead.
+    """
+    server = start_mock_server()
+    for exchange in ENDPOINTS:
+        API_SETTINGS.setdefault('base_urls', {})[exchange] = server.base_url
+    MOCK_SERVER['enabled'] = True
+    print(f"Using mock exchange at {server.base_url}")
+    print(f"Mock results are saved to {MOCK_SERVER['benchmark_dir']}/, {MOCK_SERVER['store_dir']}/ "
+          f"and {MOCK_SERVER['report_file']}")
+    return server
+
+def run_benchmarks(exchange="all", output_dir="benchmark_results", engine="pytest"):
     """
     Run benchmarks for specified exchange
     
     Args:
         exchange (str): Exchange name or 'all'
         output_dir (str): Directory to save benchmark results
+        engine (str): 'pytest' for pytest-benchmark sessions, 'async' to
+            probe all endpoints concurrently with the asyncio engine
+    
+    Returns:
+        bool: True if every benchmark group passed
     """
 
     output_dir = create_output_dir(output_dir)
     
-    if exchange == "all":
+    if engine == "async":
+        exchanges = None if exchange == "all" else [exchange]
+        success = run_async_benchmarks(exchanges) is not None
+    elif exchange == "all":
         print("\n=== Running benchmarks for all exchanges ===")
-        run_okx_benchmarks()
-        run_bitget_benchmarks()
+        # 每个交易所在独立的 worker 进程中并行运行，结果合并为一个文件
+        result_file, failed = run_parallel_benchmarks(name="all")
+        success = result_file is not None and not failed
     else:
         print(f"\n=== Running benchmarks for {exchange.upper()} ===")
-        if exchange == "okx":
-            run_okx_benchmarks()
-        elif exchange == "bitget":
-            run_bitget_benchmarks()
+        result_file, failed = run_parallel_benchmarks([exchange])
+        success = result_file is not None and not failed
 
     generate_comprehensive_report(output_dir)
     
     print(f"\nBenchmark results saved to {output_dir}/")
+    if not success:
+        print("Error: Some benchmarks failed, see the output above")
+    return success
 
 def main():
-    """Main function"""
+    """Main function, returns 1 if any benchmark group failed"""
     output_dir = "docs"
-    EXCHANGES = ["okx", "bitget"]
+    # 交易所列表来自配置文件
+    exchanges = list(ENDPOINTS)
 
     args = sys.argv[1:]
     exchange = "all"  # 默认为 all
     
+    # --async 使用 asyncio 引擎并发测试所有端点
+    engine = "async" if "--async" in args else "pytest"
+    
+    # --adaptive 持续采样直到百分位数的置信区间足够窄
+    if "--adaptive" in args:
+        ADAPTIVE['enabled'] = True
+    
+    # --mock 使用本地模拟交易所代替真实 API
+    if "--mock" in args:
+        use_mock_exchange()
+    args = [arg for arg in args if not arg.startswith("--")]
+    
     # 只有在提供了参数时才尝试获取第一个参数
     if args:
         exchange = args[0]
         
-    if exchange not in (EXCHANGES + ["all"]):
+    if exchange not in (exchanges + ["all"]):
         exchange = "all"
         
-    run_benchmarks(exchange, output_dir)
-    
-    return 0
+    # 有失败的 benchmark 组时返回非零，定时任务才会显示失败
+    return 0 if run_benchmarks(exchange, output_dir, engine) else 1
 
 if __name__ == "__main__":
     sys.exit(main()) 
\ No newline at end of file
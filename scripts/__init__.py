@@ -1,47 +1,106 @@
 """
 API Latency Monitoring and Benchmarking
 
-This package provides tools for monitoring and benchmarking 
+This package provides tools for monitoring and benchmarking
 API latency for various cryptocurrency exchanges.
+
+Names are imported lazily (PEP 562): importing the package is cheap, and
+each submodule is only loaded when one of its names is first used, so a
+probe run never pays for pandas, matplotlib or pytest.
 """
+import importlib
+
+# Exported name -> submodule defining it
+_EXPORTS = {
+    # Configuration
+    'EXCHANGES': 'config',
+    'ENDPOINTS': 'config',
+    'BENCHMARK_SETTINGS': 'config',
+    'API_SETTINGS': 'config',
+    'DATA_STORAGE': 'config',
+    'REPORTING': 'config',
+    'CONNECTION_POOL': 'config',
+    'ASYNC_PROBE': 'config',
+    'HISTOGRAM': 'config',
+    'MOCK_SERVER': 'config',
+    'CALIBRATION': 'config',
+    'WS_ENDPOINTS': 'config',
+    'WS_SETTINGS': 'config',
+    'CLOCK_SYNC': 'config',
+    'DECODING': 'config',
+    'RUNNER': 'config',
+    'RATE_LIMITS': 'config',
+    'REGRESSION': 'config',
+    'ADAPTIVE': 'config',
+    'STARTUP': 'config',
+    'H2_PROBE': 'config',
+    'EDGES': 'config',
+    'LOAD_TEST': 'config',
+    'PAIRED': 'config',
+    'EXPORTER': 'config',
+    'RETENTION': 'config',
+
+    'make_api_request': 'benchmark_core',
+    'benchmark_api_request': 'benchmark_core',
+    'save_benchmark_results': 'benchmark_core',
+    'generate_comprehensive_report': 'benchmark_core',
+    'iter_cases': 'benchmark_core',
+
+    'get_session': 'session_pool',
+    'prewarm_session': 'session_pool',
+    'close_sessions': 'session_pool',
+
+    'run_probe': 'probe',
+    'run_exporter': 'exporter',
+    'MetricsRegistry': 'exporter',
+    'run_async_benchmarks': 'async_probe',
+    'run_parallel_benchmarks': 'runner',
+    'LatencyHistogram': 'histogram',
+    'render_charts': 'charts',
+    'start_mock_server': 'mock_exchange',
+    'start_h2_mock_server': 'mock_exchange',
+    'compare_protocols': 'h2_probe',
+    'probe_edges': 'edges',
+    'rank_edges': 'edges',
+    'load_test_endpoint': 'load_test',
+    'run_retention': 'retention',
+    'sample_rounds': 'paired',
+    'compare_pairs': 'paired',
+    'WebSocketProbe': 'ws_probe',
+    'ClockOffsetEstimator': 'clock_offset',
+    'sync_clock': 'clock_offset',
+    'get_decoder': 'decoders',
+    'decode_payload': 'decoders',
+    'TokenBucket': 'rate_limit',
+    'get_bucket': 'rate_limit',
+    'load_history': 'regression',
+    'compare_history': 'regression',
+    'AdaptiveSampler': 'adaptive',
+    'percentile_ci': 'adaptive',
+    'measure_client_floor': 'calibration',
+    'get_client_floor': 'calibration',
+    'adjust_latency': 'calibration',
+    'append_samples': 'sample_store',
+    'read_samples': 'sample_store',
+    'read_exchange': 'sample_store',
+    'import_benchmark_files': 'sample_store',
+
+    # Generated endpoint benchmarks (imports pytest)
+    'test_endpoint_benchmark': 'endpoint_latency',
+    'run_all_benchmarks': 'endpoint_latency',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
 
-from .config import (
-    EXCHANGES,
-    ENDPOINTS,
-    BENCHMARK_SETTINGS,
-    API_SETTINGS,
-    DATA_STORAGE,
-    REPORTING
-)
-
-from .benchmark_core import (
-    make_api_request,
-    benchmark_api_request,
-    save_benchmark_results,
-    generate_comprehensive_report
-)
-
-# Export exchange-specific modules
-from .okx_latency import test_okx_market_data_benchmark, test_okx_book_benchmark, test_okx_trades_benchmark, run_all_benchmarks as run_okx_benchmarks
-from .bitget_latency import test_bitget_market_data_benchmark, test_bitget_book_benchmark, test_bitget_trades_benchmark, run_all_benchmarks as run_bitget_benchmarks
-
-__all__ = [
-    'EXCHANGES',
-    'ENDPOINTS',
-    'BENCHMARK_SETTINGS',
-    'API_SETTINGS',
-    'DATA_STORAGE',
-    'REPORTING',
-    'make_api_request',
-    'benchmark_api_request',
-    'save_benchmark_results',
-    'generate_comprehensive_report',
-    'test_okx_market_data_benchmark',
-    'test_okx_book_benchmark',
-    'test_okx_trades_benchmark',
-    'test_bitget_market_data_benchmark',
-    'test_bitget_book_benchmark',
-    'test_bitget_trades_benchmark',
-    'run_okx_benchmarks',
-    'run_bitget_benchmarks'
-] 
\ No newline at end of file
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,240 @@
+"""
+Adaptive sampling
+
+This module decides how many samples each endpoint needs for a
+trustworthy tail percentile, instead of a fixed number of rounds. The
+confidence interval of a percentile is taken from order statistics,
+which needs no assumption about the latency distribution: for n sorted
+samples, the ranks n*q -/+ z*sqrt(n*q*(1-q)) bracket the q-quantile
+with the configured confidence. An endpoint is done once the interval
+is narrower than ADAPTIVE['tolerance'] relative to the estimate.
+
+- The asyncio engine samples sequentially: every step goes to the
+  endpoints with the widest interval first (AdaptiveSampler), until all
+  are done or the request/time budget is spent.
+- The pytest path uses a two-stage design: a pilot of
+  ADAPTIVE['min_samples'] requests sizes the measured rounds
+  (rounds_needed), since pytest-benchmark fixes rounds up front.
+
+A tail percentile needs a minimum sample count before its interval is
+defined at all, e.g. about 380 samples for p99 at 95% confidence.
+"""
+import math
+import time
+from statistics import NormalDist
+
+from .config import ADAPTIVE
+
+
+def _settings(settings=None):
+    return dict(ADAPTIVE, **(settings or {}))
+
+
+def _ranks(n, q, z):
+    # 1-based order statistics bracketing the q-quantile of n samples
+    spread = z * math.sqrt(n * q * (1 - q))
+    return math.floor(n * q - spread), math.ceil(n * q + spread) + 1
+
+
+def min_samples(percentile=None, confidence=None, limit=100000):
+    """
+    Smallest sample count for which a percentile's interval is defined
+
+    Returns:
+        int: Sample count, or limit if none below it
+    """
+    percentile = percentile if percentile is not None else ADAPTIVE.get('percentile', 99)
+    confidence = confidence if confidence is not None else ADAPTIVE.get('confidence', 0.95)
+    q = percentile / 100
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    for n in range(2, limit):
+        lower, upper = _ranks(n, q, z)
+        if lower >= 1 and upper <= n:
+            return n
+    return limit
+
+
+def percentile_ci(latencies, percentile=None, confidence=None):
+    """
+    Distribution-free confidence interval of a latency percentile
+
+    Args:
+        latencies (list): Latencies in ms
+        percentile (float, optional): Defaults to ADAPTIVE['percentile']
+        confidence (float, optional): Defaults to ADAPTIVE['confidence']
+
+    Returns:
+        tuple: (estimate, low, high) in ms; low and high are None while
+        there are too few samples to bound the percentile
+    """
+    import numpy as np
+
+    percentile = percentile if percentile is not None else ADAPTIVE.get('percentile', 99)
+    confidence = confidence if confidence is not None else ADAPTIVE.get('confidence', 0.95)
+    values = np.sort(np.asarray(latencies, dtype=float))
+    n = len(values)
+    if not n:
+        return None, None, None
+
+    q = percentile / 100
+    estimate = float(np.percentile(values, percentile))
+    lower, upper = _ranks(n, q, NormalDist().inv_cdf(0.5 + confidence / 2))
+    if lower < 1 or upper > n:
+        return estimate, None, None
+    return estimate, float(values[lower - 1]), float(values[upper - 1])
+
+
+def relative_width(latencies, percentile=None, confidence=None):
+    """Width of the percentile interval relative to the estimate, inf if undefined"""
+    estimate, low, high = percentile_ci(latencies, percentile, confidence)
+    if low is None or not estimate:
+        return math.inf
+    return (high - low) / estimate
+
+
+def summarize(latencies, settings=None):
+    """
+    Adaptive sampling summary of one endpoint, for the report
+
+    Args:
+        latencies (list): Latencies in ms
+        settings (dict, optional): Overrides of ADAPTIVE
+
+    Returns:
+        dict: percentile, estimate, ci, width, converged and samples
+    """
+    settings = _settings(settings)
+    estimate, low, high = percentile_ci(latencies, settings['percentile'], settings['confidence'])
+    width = relative_width(latencies, settings['percentile'], settings['confidence'])
+    return {
+        'percentile': settings['percentile'],
+        'estimate': estimate,
+        'ci': [low, high] if low is not None else None,
+        'width': width if math.isfinite(width) else None,
+        'converged': width <= settings['tolerance'],
+        'samples': len(latencies),
+    }
+
+
+def samples_needed(latencies, settings=None):
+    """
+    Estimate the total sample count that brings the interval within tolerance
+
+    The interval narrows with 1/sqrt(n), so n * (width / tolerance)**2
+    samples are needed; with the interval still undefined, the count that
+    first defines it is used.
+
+    Args:
+        latencies (list): Latencies in ms
+        settings (dict, optional): Overrides of ADAPTIVE
+
+    Returns:
+        int: Total samples, capped at ADAPTIVE['max_samples']
+    """
+    settings = _settings(settings)
+    n = len(latencies)
+    width = relative_width(latencies, settings['percentile'], settings['confidence'])
+    if math.isfinite(width):
+        needed = math.ceil(n * (width / settings['tolerance']) ** 2)
+    else:
+        needed = min_samples(settings['percentile'], settings['confidence'], settings['max_samples'])
+    return max(n, min(needed, settings['max_samples']))
+
+
+def rounds_needed(latencies, settings=None):
+    """
+    Measured rounds after a pilot, for the two-stage pytest path
+
+    Args:
+        latencies (list): Pilot latencies in ms
+        settings (dict, optional): Overrides of ADAPTIVE
+
+    Returns:
+        int: Additional rounds (at least 1), capped by ADAPTIVE['max_samples']
+        and the per-endpoint time budget ADAPTIVE['max_time_per_endpoint']
+    """
+    settings = _settings(settings)
+    rounds = samples_needed(latencies, settings) - len(latencies)
+    if latencies:
+        mean_seconds = sum(latencies) / len(latencies) / 1000
+        if mean_seconds > 0:
+            rounds = min(rounds, int(settings['max_time_per_endpoint'] / mean_seconds))
+    return max(1, rounds)
+
+
+class AdaptiveSampler:
+    """
+    Sequential sample allocation across endpoints
+
+    Args:
+        keys (list): Endpoint keys, e.g. (exchange, endpoint_key, symbol) tuples
+        settings (dict, optional): Overrides of ADAPTIVE
+    """
+
+    def __init__(self, keys, settings=None):
+        self.settings = _settings(settings)
+        self.latencies = {key: [] for key in keys}
+        self.requests = 0
+        self.deadline = time.monotonic() + self.settings['max_time']
+
+    def add(self, key, latencies, requests=None):
+        """
+        Add the latencies of a finished batch
+
+        Args:
+            key: Endpoint key
+            latencies (list): Latencies in ms of the successful samples
+            requests (int, optional): Requests spent, defaults to len(latencies)
+        """
+        self.latencies[key].extend(latencies)
+        self.requests += requests if requests is not None else len(latencies)
+
+    def width(self, key):
+        """Relative interval width of an endpoint"""
+        return relative_width(self.latencies[key], self.settings['percentile'], self.settings['confidence'])
+
+    def active(self):
+        """Endpoints still short of the tolerance and of ADAPTIVE['max_samples']"""
+        return [
+            key for key, latencies in self.latencies.items()
+            if len(latencies) < self.settings['max_samples'] and self.width(key) > self.settings['tolerance']
+        ]
+
+    def allocate(self, capacity):
+        """
+        Plan the next step: how many requests each endpoint gets
+
+        Endpoints are served in order of decreasing interval width, each up
+        to its estimated remaining need and ADAPTIVE['batch'], until the
+        step capacity or the remaining request budget is used up.
+
+        Args:
+            capacity (int): Requests that can run concurrently in one step
+
+        Returns:
+            dict: Endpoint key to request count, empty when sampling is done
+        """
+        budget = self.settings['max_requests'] - self.requests
+        if budget <= 0 or time.monotonic() >= self.deadline:
+            return {}
+
+        capacity = min(capacity, budget)
+        plan = {}
+        # Widest first; endpoints without an interval yet by fewest samples
+        order = sorted(self.active(), key=lambda key: (self.width(key), -len(self.latencies[key])), reverse=True)
+        for key in order:
+            if capacity <= 0:
+                break
+            have = len(self.latencies[key])
+            if have < self.settings['min_samples']:
+                need = self.settings['min_samples'] - have
+            else:
+                need = samples_needed(self.latencies[key], self.settings) - have
+            count = max(1, min(need, self.settings['batch'], capacity))
+            plan[key] = count
+            capacity -= count
+        return plan
+
+    def summary(self, key):
+        """Adaptive sampling summary of an endpoint (see summarize)"""
+        return summarize(self.latencies[key], self.settings)
@@ -0,0 +1,236 @@
+"""
+Asyncio probe engine for API latency monitoring
+
+This module samples every configured exchange endpoint concurrently
+instead of one pytest session per exchange. Requests still go through
+make_api_request (and therefore the pooled, instrumented sessions); they
+run on a thread pool driven by an asyncio event loop, with a semaphore
+limiting the number of in-flight requests per exchange.
+
+In adaptive mode (ADAPTIVE) the number of samples is not fixed: the
+engine keeps sampling in steps, giving each step to the endpoints whose
+percentile confidence interval is widest, until every interval is tight
+or the request/time budget runs out (see scripts/adaptive.py).
+
+Results are saved in the pytest-benchmark JSON layout so that
+generate_comprehensive_report picks them up like any other run.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import ENDPOINTS, ASYNC_PROBE, ADAPTIVE, CONNECTION_POOL, DECODING, MOCK_SERVER
+from .benchmark_core import probe_endpoint, compute_stats, save_run_results, record_samples, series_name, case_id
+from .session_pool import prewarm_session, get_symbols
+from .histogram import LatencyHistogram
+from .calibration import get_client_floor
+from .clock_offset import sync_clock, summarize_one_way
+from .adaptive import AdaptiveSampler, summarize
+
+
+def get_exchange_concurrency(exchange):
+    """
+    Get the maximum number of in-flight requests for an exchange
+
+    Args:
+        exchange (str): Exchange identifier
+
+    Returns:
+        int: Concurrency limit
+    """
+    overrides = ASYNC_PROBE.get('exchange_concurrency', {})
+    return max(1, overrides.get(exchange, ASYNC_PROBE.get('concurrency', 4)))
+
+
+async def _probe_round(loop, executor, semaphore, exchange, endpoint_key, symbol, throttled, failed):
+    async with semaphore:
+        return await loop.run_in_executor(executor, probe_endpoint, exchange, endpoint_key, symbol, True,
+                                          throttled, failed)
+
+
+async def _probe_endpoint(loop, executor, semaphore, exchange, endpoint_key, symbol, rounds):
+    throttled = []
+    failed = []
+    outcomes = await asyncio.gather(*(
+        _probe_round(loop, executor, semaphore, exchange, endpoint_key, symbol, throttled, failed)
+        for _ in range(rounds)
+    ))
+
+    # Throttled and failed attempts stay in the list, marked, for the sample store
+    samples = [sample for success, _, sample in outcomes if success] + throttled + failed
+    errors = [str(result) for success, result, _ in outcomes if not success]
+    return exchange, endpoint_key, symbol, samples, errors
+
+
+async def probe_all(exchanges=None, rounds=None, adaptive=False):
+    """
+    Probe all endpoints of the given exchanges concurrently
+
+    Args:
+        exchanges (list, optional): Exchange identifiers, defaults to all in ENDPOINTS
+        rounds (int, optional): Samples per endpoint, defaults to ASYNC_PROBE['rounds'];
+            ignored in adaptive mode
+        adaptive (bool): Sample adaptively until the percentile intervals are tight
+
+    Returns:
+        list: (exchange, endpoint_key, symbol, samples, errors) tuples;
+        samples include throttled and failed attempts, marked 'throttled'
+        and 'error'
+    """
+    if exchanges is None:
+        exchanges = list(ENDPOINTS)
+    if rounds is None:
+        rounds = ASYNC_PROBE.get('rounds', 5)
+
+    loop = asyncio.get_running_loop()
+    workers = sum(get_exchange_concurrency(exchange) for exchange in exchanges)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        if CONNECTION_POOL.get('enabled', True) and CONNECTION_POOL.get('prewarm', False):
+            await asyncio.gather(*(
+                loop.run_in_executor(executor, prewarm_session, exchange)
+                for exchange in exchanges
+            ))
+
+        semaphores = {exchange: asyncio.Semaphore(get_exchange_concurrency(exchange)) for exchange in exchanges}
+        cases = [
+            (exchange, endpoint_key, symbol)
+            for exchange in exchanges
+            for endpoint_key in ENDPOINTS.get(exchange, {})
+            for symbol in get_symbols(exchange)
+        ]
+
+        if not adaptive:
+            return await asyncio.gather(*(
+                _probe_endpoint(loop, executor, semaphores[case[0]], *case, rounds)
+                for case in cases
+            ))
+
+        # Adaptive: sample in steps sized to the engine's concurrency
+        sampler = AdaptiveSampler(cases)
+        samples = {case: [] for case in cases}
+        errors = {case: [] for case in cases}
+        while True:
+            plan = sampler.allocate(max(1, workers))
+            if not plan:
+                break
+            steps = await asyncio.gather(*(
+                _probe_endpoint(loop, executor, semaphores[case[0]], *case, count)
+                for case, count in plan.items()
+            ))
+            for (case, count), (*_, step_samples, step_errors) in zip(plan.items(), steps):
+                samples[case].extend(step_samples)
+                errors[case].extend(step_errors)
+                sampler.add(case, [s['latency'] for s in step_samples
+                                   if not s.get('throttled') and not s.get('error')], count)
+        return [(*case, samples[case], errors[case]) for case in cases]
+
+
+def build_benchmark_entries(results, adaptive=False):
+    """
+    Convert probe results to pytest-benchmark style benchmark entries
+
+    Args:
+        results (list): (exchange, endpoint_key, symbol, samples, errors) tuples
+        adaptive (bool): Add the adaptive sampling summary of every endpoint
+
+    Returns:
+        list: Benchmark entries for save_run_results
+    """
+    benchmarks = []
+    for exchange, endpoint_key, symbol, attempts, errors in results:
+        if errors:
+            print(f"Error probing {exchange} {endpoint_key} {symbol}: {len(errors)} failed requests, last: {errors[-1]}")
+        record_samples(exchange, series_name(exchange, endpoint_key, symbol),
+                       sorted(attempts, key=lambda s: s['timestamp']))
+        samples = [s for s in attempts if not s.get('throttled') and not s.get('error')]
+        if not samples:
+            continue
+
+        param = case_id(exchange, endpoint_key, symbol)
+        name = f"test_endpoint_benchmark[{param}]"
+        benchmarks.append({
+            'group': exchange,
+            'name': name,
+            'fullname': f"async_probe::{name}",
+            'params': {'exchange': exchange, 'endpoint_key': endpoint_key, 'symbol': symbol},
+            'param': param,
+            'extra_info': {
+                'engine': 'async',
+                'exchange': exchange,
+                'endpoint': endpoint_key,
+                'symbol': symbol,
+                'errors': len(errors),
+                'throttled': sum(1 for s in attempts if s.get('throttled')),
+                'retries': sum(s.get('retries', 0) for s in samples),
+                'samples': samples,
+                'floor': get_client_floor(exchange, endpoint_key),
+                'one_way': summarize_one_way(exchange, samples),
+                'decoder': DECODING.get('backend', 'json'),
+                'histogram': LatencyHistogram.from_latencies(s['latency'] for s in samples).to_dict()
+            },
+            'options': {
+                'timer': 'perf_counter',
+                'concurrency': get_exchange_concurrency(exchange)
+            },
+            'stats': compute_stats([s['latency'] for s in samples])
+        })
+        if adaptive:
+            benchmarks[-1]['extra_info']['adaptive'] = summarize([s['latency'] for s in samples])
+        if MOCK_SERVER.get('enabled'):
+            benchmarks[-1]['extra_info']['mock'] = True
+    return benchmarks
+
+
+def run_async_benchmarks(exchanges=None, rounds=None, name="async", adaptive=None):
+    """
+    Run the asyncio probe engine and save its results
+
+    Args:
+        exchanges (list, optional): Exchange identifiers, defaults to all in ENDPOINTS
+        rounds (int, optional): Samples per endpoint
+        name (str): Run name used for the saved .benchmarks file
+        adaptive (bool, optional): Sample adaptively, defaults to ADAPTIVE['enabled']
+
+    Returns:
+        str: Path of the saved result file, or None if nothing succeeded
+    """
+    print("\n=== Running API Benchmarks (async engine) ===")
+    
+    exchanges = exchanges if exchanges is not None else list(ENDPOINTS)
+    adaptive = ADAPTIVE.get('enabled', False) if adaptive is None else adaptive
+    
+    # Calibrate before probing: calibration redirects exchanges to loopback
+    for exchange in exchanges:
+        for endpoint_key in ENDPOINTS.get(exchange, {}):
+            get_client_floor(exchange, endpoint_key)
+        sync_clock(exchange)
+    
+    start = time.perf_counter()
+    results = asyncio.run(probe_all(exchanges, rounds, adaptive))
+    elapsed = time.perf_counter() - start
+    
+    # Clock samples on both sides of the run give the drift across it
+    for exchange in exchanges:
+        sync_clock(exchange, force=True)
+
+    benchmarks = build_benchmark_entries(results, adaptive)
+    print(f"Probed {len(results)} endpoints in {elapsed:.2f} s")
+    if adaptive:
+        for entry in benchmarks:
+            summary = entry['extra_info']['adaptive']
+            width = f"{summary['width']:.1%}" if summary['width'] is not None else "undefined"
+            print(f"  {entry['param']}: {summary['samples']} samples, "
+                  f"p{summary['percentile']:g} interval width {width}"
+                  + ("" if summary['converged'] else " (budget exhausted)"))
+    if not benchmarks:
+        print("Error: No successful samples, nothing saved")
+        return None
+
+    result_file = save_run_results(benchmarks, name)
+    print(f"Results saved: {result_file}")
+    return result_file
+
+
+if __name__ == "__main__":
+    run_async_benchmarks()
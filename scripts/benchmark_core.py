@@ -7,19 +7,35 @@ and handling the results of those benchmarks.
 import time
 import json
 import requests
-import pandas as pd
-import matplotlib.pyplot as plt
 import datetime
+import hashlib
 import os
-from .config import EXCHANGES, ENDPOINTS, API_SETTINGS, BENCHMARK_SETTINGS, DATA_STORAGE
+import platform
+import statistics
+from .config import EXCHANGES, ENDPOINTS, API_SETTINGS, BENCHMARK_SETTINGS, DATA_STORAGE, REPORTING, CONNECTION_POOL, HISTOGRAM, DECODING, ADAPTIVE, MOCK_SERVER
+from .histogram import LatencyHistogram
+from .sample_store import append_samples
+from .calibration import get_client_floor, adjust_latency
+from .clock_offset import parse_server_time, parse_data_time, sync_clock, summarize_one_way
+from .decoders import decode_payload, get_field
+from .rate_limit import get_bucket, is_throttled, backoff_delay
+from .adaptive import rounds_needed, summarize as summarize_adaptive
+from .session_pool import get_session, create_session, prewarm_session, endpoint_url, get_symbols
+from .transport import PHASES
 
-def make_api_request(exchange, endpoint_key):
+# Bump when the cached summary layout changes to invalidate old caches
+REPORT_CACHE_VERSION = 7
+
+def make_api_request(exchange, endpoint_key, symbol=None, session=None):
     """
     Make API request to specified exchange endpoint
     
     Args:
         exchange (str): Exchange identifier
         endpoint_key (str): Endpoint key
+        symbol (str, optional): Symbol, defaults to the exchange's first symbol
+        session (requests.Session, optional): Session to send on, e.g. one
+            pinned to a CDN edge; defaults to the exchange's pooled session
         
     Returns:
         tuple: (success, result)
@@ -31,7 +47,7 @@ def make_api_request(exchange, endpoint_key):
         return False, f"Endpoint '{endpoint_key}' not found for exchange '{exchange}'"
     
     endpoint_data = ENDPOINTS[exchange][endpoint_key]
-    url = endpoint_data['url']
+    url = endpoint_url(exchange, endpoint_key, symbol)
     method = endpoint_data.get('method', 'GET')
     headers = endpoint_data.get('headers', {})
     params = endpoint_data.get('params', {})
@@ -42,19 +58,189 @@ def make_api_request(exchange, endpoint_key):
         api_key_header = API_SETTINGS.get('api_key_header', 'X-API-KEY')
         headers[api_key_header] = API_SETTINGS['api_keys'][exchange]
     
+    # Reuse the exchange's pooled session, or pay for a new connection every time
+    pooled = session is not None or CONNECTION_POOL.get('enabled', True)
+    if session is None:
+        session = get_session(exchange) if pooled else create_session()
+    
     try:
         if method.upper() == 'GET':
-            response = requests.get(url, headers=headers, params=params, timeout=API_SETTINGS.get('timeout', 10))
+            response = session.get(url, headers=headers, params=params, timeout=API_SETTINGS.get('timeout', 10))
         elif method.upper() == 'POST':
-            response = requests.post(url, headers=headers, params=params, json=data, timeout=API_SETTINGS.get('timeout', 10))
+            response = session.post(url, headers=headers, params=params, json=data, timeout=API_SETTINGS.get('timeout', 10))
         else:
             return False, f"Unsupported HTTP method: {method}"
         
         return True, response
     except requests.exceptions.RequestException as e:
         return False, str(e)
+    finally:
+        if not pooled:
+            session.close()
+
+def series_name(exchange, endpoint_key, symbol=None):
+    """
+    Name of an endpoint and symbol in the sample store and the report
+    
+    The exchange's default symbol keeps the bare endpoint key, so history
+    recorded before symbols were configurable continues under the same name.
+    
+    Args:
+        exchange (str): Exchange identifier
+        endpoint_key (str): Endpoint key
+        symbol (str, optional): Symbol
+        
+    Returns:
+        str: 'endpoint_key' or 'endpoint_key@symbol'
+    """
+    if not symbol or symbol == get_symbols(exchange)[0]:
+        return endpoint_key
+    return f"{endpoint_key}@{symbol}"
+
+def case_id(exchange, endpoint_key, symbol):
+    """pytest id of one generated test, e.g. 'okx-book-BTC-USDT'"""
+    return f"{exchange}-{endpoint_key}-{symbol}"
+
+def iter_cases(exchanges=None):
+    """
+    Enumerate the (exchange, endpoint_key, symbol) combinations to probe
+    
+    Args:
+        exchanges (list, optional): Exchange identifiers, defaults to all in ENDPOINTS
+    
+    Yields:
+        tuple: (exchange, endpoint_key, symbol)
+    """
+    for exchange in (exchanges if exchanges is not None else ENDPOINTS):
+        for endpoint_key in ENDPOINTS.get(exchange, {}):
+            for symbol in get_symbols(exchange):
+                yield exchange, endpoint_key, symbol
 
-def benchmark_api_request(benchmark, exchange, endpoint_key):
+def validate_response(exchange, payload):
+    """
+    Check a decoded response against the exchange's declared validator
+    
+    Args:
+        exchange (str): Exchange identifier
+        payload: Decoded response payload (dict or typed struct)
+        
+    Returns:
+        tuple: (valid, error message)
+    """
+    if payload is None:
+        return False, "Response is not valid JSON"
+    
+    validator = EXCHANGES.get(exchange, {}).get('validator', {})
+    for field, expected in validator.get('equals', {}).items():
+        value = get_field(payload, field)
+        if value != expected:
+            return False, f"Expected {field} == {expected!r}, got {value!r}"
+    for field in validator.get('present', []):
+        if get_field(payload, field) is None:
+            return False, f"Missing field '{field}'"
+    return True, None
+
+def _timed_request(exchange, endpoint_key, symbol=None):
+    """
+    Make one timed API request and build its latency sample
+    
+    Returns:
+        tuple: (success, response_or_error, sample); on failure the sample
+        is marked 'error' and its latency is the time until the failure
+    """
+    timestamp = time.time()
+    start = time.perf_counter()
+    success, response = make_api_request(exchange, endpoint_key, symbol)
+    latency = (time.perf_counter() - start) * 1000  # to ms
+    if not success:
+        return False, response, {'timestamp': timestamp, 'latency': latency, 'error': str(response)}
+    
+    sample = {
+        'timestamp': timestamp,
+        'latency': latency,
+        'status': response.status_code,
+        'connection': getattr(response, 'connection_state', 'cold')
+    }
+    sample.update(getattr(response, 'phase_timings', {}))
+    return True, response, sample
+
+def probe_endpoint(exchange, endpoint_key, symbol=None, rate_limit=True, throttled=None, failed=None):
+    """
+    Make one timed API request and build its latency sample
+    
+    Every attempt first waits for a token of the endpoint's rate-limit
+    bucket. Failed and throttled attempts are retried up to
+    API_SETTINGS['retry_count'] times with jittered backoff; they are not
+    latency samples, they are marked 'throttled' or 'error' and passed
+    back through the throttled and failed lists so they can be recorded.
+    Responses with an error status are returned as samples; the sample
+    store flags them by their status.
+    
+    Args:
+        exchange (str): Exchange identifier
+        endpoint_key (str): Endpoint key
+        symbol (str, optional): Symbol, defaults to the exchange's first symbol
+        rate_limit (bool): Respect rate limits and retry (off for loopback calibration)
+        throttled (list, optional): Receives the samples of throttled attempts
+        failed (list, optional): Receives the samples of failed attempts
+            (connection errors and timeouts)
+        
+    Returns:
+        tuple: (success, response_or_error, sample); sample is None on failure
+    """
+    bucket = get_bucket(exchange, endpoint_key) if rate_limit else None
+    retries = API_SETTINGS.get('retry_count', 3) if rate_limit else 0
+    
+    for attempt in range(retries + 1):
+        if bucket is not None:
+            bucket.acquire()
+        success, response, sample = _timed_request(exchange, endpoint_key, symbol)
+        if success and not is_throttled(exchange, response):
+            break
+        if success:
+            sample['throttled'] = True
+            sample['retries'] = attempt
+            if throttled is not None:
+                throttled.append(sample)
+            error = f"Rate limited (HTTP {response.status_code}) after {attempt + 1} attempts"
+        else:
+            sample['retries'] = attempt
+            if failed is not None:
+                failed.append(sample)
+            error = response
+        if attempt == retries:
+            return False, error, None
+        
+        delay = backoff_delay(attempt, response if success else None)
+        if success and bucket is not None:
+            # Hold back every caller of this endpoint, not just this one
+            bucket.penalize(delay)
+        else:
+            time.sleep(delay)
+    
+    sample['retries'] = attempt
+    
+    # Decode outside the network timing, with the configured backend
+    try:
+        response.payload, sample['decode'] = decode_payload(response.content, exchange, endpoint_key)
+    except ValueError:
+        response.payload = None
+    
+    # Wall-clock bracket of the server timestamp, for one-way latency;
+    # endpoints without a response timestamp may fall back to their data's
+    wall_times = getattr(response, 'wall_times', None)
+    server_time = parse_server_time(response.content)
+    source = 'response'
+    if server_time is None:
+        server_time = parse_data_time(exchange, endpoint_key, response.payload)
+        source = 'data'
+    if wall_times and server_time is not None:
+        sample['sent_at'], sample['first_byte_at'] = wall_times
+        sample['server_time'] = server_time
+        sample['server_time_source'] = source
+    return True, response, sample
+
+def benchmark_api_request(benchmark, exchange, endpoint_key, symbol=None):
     """
     Benchmark API request latency using pytest-benchmark
     
@@ -62,28 +248,187 @@ def benchmark_api_request(benchmark, exchange, endpoint_key):
         benchmark: pytest-benchmark fixture
         exchange (str): Exchange identifier
         endpoint_key (str): Endpoint key
+        symbol (str, optional): Symbol, defaults to the exchange's first symbol
         
     Returns:
         tuple: (success, result_dict)
     """
+    if CONNECTION_POOL.get('enabled', True) and CONNECTION_POOL.get('prewarm', False):
+        prewarm_session(exchange)
+    
+    # Client-side floor of this endpoint, measured on loopback before the real rounds
+    floor = get_client_floor(exchange, endpoint_key)
+    
+    # Add clock offset samples; they accumulate over the run to track drift
+    sync_clock(exchange)
+    
+    # Per-round samples, tagged with the state of the connection they ran on;
+    # throttled and failed attempts are kept apart and never enter the statistics
+    samples = []
+    throttled = []
+    failed = []
+    
     # Define the function to benchmark
     def api_call():
-        success, response = make_api_request(exchange, endpoint_key)
+        success, response, sample = probe_endpoint(exchange, endpoint_key, symbol, throttled=throttled, failed=failed)
         if not success:
             return False, response
+        samples.append(sample)
         return True, response
     
+    # Adaptive mode is two-stage: a pilot sizes the rounds needed for a tight
+    # percentile interval, since pytest-benchmark fixes rounds up front
+    rounds = BENCHMARK_SETTINGS['min_rounds']
+    adaptive = ADAPTIVE.get('enabled', False)
+    if adaptive:
+        for _ in range(ADAPTIVE.get('min_samples', 30)):
+            api_call()
+        rounds = rounds_needed([s['latency'] for s in samples])
+    
     # Run the benchmark
     result = benchmark.pedantic(
         api_call,
-        rounds=BENCHMARK_SETTINGS['min_rounds'],
+        rounds=rounds,
         iterations=1
     )
+    benchmark.extra_info['exchange'] = exchange
+    benchmark.extra_info['endpoint'] = endpoint_key
+    benchmark.extra_info['symbol'] = symbol or get_symbols(exchange)[0]
+    benchmark.extra_info['samples'] = samples
+    benchmark.extra_info['histogram'] = LatencyHistogram.from_latencies(
+        s['latency'] for s in samples
+    ).to_dict()
+    benchmark.extra_info['floor'] = floor
+    benchmark.extra_info['one_way'] = summarize_one_way(exchange, samples)
+    benchmark.extra_info['decoder'] = DECODING.get('backend', 'json')
+    benchmark.extra_info['throttled'] = len(throttled)
+    benchmark.extra_info['retries'] = sum(s.get('retries', 0) for s in samples)
+    if adaptive:
+        benchmark.extra_info['adaptive'] = summarize_adaptive([s['latency'] for s in samples])
+    if MOCK_SERVER.get('enabled'):
+        benchmark.extra_info['mock'] = True
+    record_samples(exchange, series_name(exchange, endpoint_key, symbol),
+                   sorted(samples + throttled + failed, key=lambda s: s['timestamp']))
     
     if not result[0]:
         return False, {"error": result[1]}
     
-    return True, {"response": result[1], "stats": benchmark.stats}
+    return True, {
+        "response": result[1],
+        "data": getattr(result[1], 'payload', None),
+        "stats": benchmark.stats,
+        "samples": samples
+    }
+
+def record_samples(exchange, endpoint_key, samples):
+    """
+    Append samples to the sample store if recording is enabled
+    
+    Args:
+        exchange (str): Exchange identifier
+        endpoint_key (str): Series name of the endpoint (see series_name)
+        samples (list): Sample dicts
+    """
+    if not DATA_STORAGE.get('record_samples', True) or not samples:
+        return
+    try:
+        append_samples(exchange, endpoint_key, samples)
+    except (OSError, ValueError) as e:
+        print(f"Error recording samples for {exchange} {endpoint_key}: {str(e)}")
+
+def compute_stats(latencies):
+    """
+    Compute pytest-benchmark style statistics for a list of latencies
+    
+    Args:
+        latencies (list): Latencies in ms
+        
+    Returns:
+        dict: Stats in seconds, as stored under 'stats' in .benchmarks files
+    """
+    values = sorted(l / 1000 for l in latencies)  # to seconds
+    if not values:
+        return {}
+    
+    n = len(values)
+    mean = statistics.mean(values)
+    q1, median, q3 = (statistics.quantiles(values, n=4) if n > 1 else (values[0],) * 3)
+    total = sum(values)
+    return {
+        'min': values[0],
+        'max': values[-1],
+        'mean': mean,
+        'stddev': statistics.stdev(values) if n > 1 else 0.0,
+        'rounds': n,
+        'median': median,
+        'iqr': q3 - q1,
+        'q1': q1,
+        'q3': q3,
+        'total': total,
+        'ops': n / total if total else 0.0,
+        'iterations': 1
+    }
+
+def get_machine_id():
+    """Machine id used by pytest-benchmark to name the .benchmarks subdirectory"""
+    return "{}-{}-{}-{}".format(
+        platform.system(),
+        platform.python_implementation(),
+        ".".join(platform.python_version_tuple()[:2]),
+        platform.architecture()[0]
+    )
+
+def get_benchmark_dir(mock=None):
+    """
+    Directory of saved runs: ./.benchmarks, or MOCK_SERVER['benchmark_dir'] in mock mode
+    
+    Args:
+        mock (bool, optional): Mode to get the directory of, defaults to the current one
+    """
+    if MOCK_SERVER.get('enabled') if mock is None else mock:
+        return os.path.join(os.getcwd(), MOCK_SERVER['benchmark_dir'])
+    return os.path.join(os.getcwd(), '.benchmarks')
+
+def save_run_results(benchmarks, name, benchmark_dir=None):
+    """
+    Save a run in the same JSON layout as pytest-benchmark's --benchmark-save
+    
+    Args:
+        benchmarks (list): Benchmark entries (group, name, stats, extra_info, ...)
+        name (str): Run name, used as the file name suffix
+        benchmark_dir (str, optional): Root directory, defaults to get_benchmark_dir()
+        
+    Returns:
+        str: Path of the saved file
+    """
+    if not benchmark_dir:
+        benchmark_dir = get_benchmark_dir()
+    
+    run_dir = os.path.join(benchmark_dir, get_machine_id())
+    os.makedirs(run_dir, exist_ok=True)
+    
+    # Continue pytest-benchmark's NNNN_ numbering
+    counters = [int(f.split('_', 1)[0]) for f in os.listdir(run_dir)
+                if f.endswith('.json') and f.split('_', 1)[0].isdigit()]
+    counter = max(counters, default=0) + 1
+    
+    result_file = os.path.join(run_dir, f"{counter:04d}_{name}.json")
+    with open(result_file, 'w') as f:
+        json.dump({
+            'machine_info': {
+                'node': platform.node(),
+                'machine': platform.machine(),
+                'system': platform.system(),
+                'python_implementation': platform.python_implementation(),
+                'python_version': platform.python_version()
+            },
+            'commit_info': {},
+            'benchmarks': benchmarks,
+            'datetime': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'version': 'api-benchmarks'
+        }, f, indent=4)
+    
+    return result_file
 
 def save_benchmark_results(results, exchange, output_dir=None):
     """
@@ -103,6 +448,10 @@ def save_benchmark_results(results, exchange, output_dir=None):
     # Create output directory if it doesn't exist
     os.makedirs(output_dir, exist_ok=True)
     
+    # Imported here: plotting is only needed for reports, not for probing
+    import pandas as pd
+    from .charts import render_chart
+    
     # Create results DataFrame
     df = pd.DataFrame(results)
     
@@ -113,25 +462,518 @@ def save_benchmark_results(results, exchange, output_dir=None):
     
     # Generate plots
     if len(df) > 0:
-        plt.figure(figsize=(DATA_STORAGE['chart_width'], DATA_STORAGE['chart_height']))
-        plt.bar(df['endpoint'], df['mean'], yerr=df['stddev'])
-        plt.xlabel('Endpoint')
-        plt.ylabel('Latency (ms)')
-        plt.title(f'{exchange.upper()} API Endpoint Latency')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        
-        # Save plot
-        plot_file = os.path.join(output_dir, f"{exchange}_benchmark_{timestamp}.png")
-        plt.savefig(plot_file, dpi=DATA_STORAGE['dpi'])
-        plt.close()
+        render_chart({
+            'kind': 'bar',
+            'path': os.path.join(output_dir, f"{exchange}_benchmark_{timestamp}"),
+            'format': REPORTING.get('chart_format', 'png'),
+            'title': f'{exchange.upper()} API Endpoint Latency',
+            'xlabel': 'Endpoint',
+            'ylabel': 'Latency (ms)',
+            'size': (DATA_STORAGE['chart_width'], DATA_STORAGE['chart_height']),
+            'dpi': DATA_STORAGE['dpi'],
+            'data': {'labels': df['endpoint'].tolist(), 'mean': df['mean'].to_numpy(dtype=float),
+                     'stddev': df['stddev'].to_numpy(dtype=float)},
+        })
     
     return True
 
+def summarize_connection_states(samples):
+    """
+    Summarize per-round samples by connection state
+    
+    Args:
+        samples (list): Sample dicts with 'latency' (ms) and 'connection' keys
+        
+    Returns:
+        dict: {'cold': {...}, 'warm': {...}} with count, mean, min and max
+    """
+    summary = {}
+    for state in ('cold', 'warm'):
+        latencies = [s['latency'] for s in samples if s.get('connection') == state]
+        summary[state] = {
+            'count': len(latencies),
+            'mean': sum(latencies) / len(latencies) if latencies else None,
+            'min': min(latencies) if latencies else None,
+            'max': max(latencies) if latencies else None
+        }
+    return summary
+
+def summarize_phases(samples):
+    """
+    Average per-phase timings over the samples that recorded them
+    
+    Args:
+        samples (list): Sample dicts with per-phase timings in ms
+        
+    Returns:
+        dict: Mean ms per phase, or None if no sample has phase timings
+    """
+    timed = [s for s in samples if 'ttfb' in s]
+    if not timed:
+        return None
+    return {phase: sum(s.get(phase, 0.0) for s in timed) / len(timed) for phase in PHASES}
+
+def summarize_decode(samples):
+    """Mean decode time in ms over the samples that recorded one, or None"""
+    decoded = [s['decode'] for s in samples if 'decode' in s]
+    return sum(decoded) / len(decoded) if decoded else None
+
+def format_phase_bar(phases):
+    """Render mean phase timings as a stacked HTML bar with a legend"""
+    if not phases:
+        return "-"
+    total = sum(phases.values()) or 1.0
+    segments = "".join(
+        f'<span class="phase phase-{phase}" style="width: {value / total * 100:.2f}%" '
+        f'title="{phase}: {value:.2f} ms"></span>'
+        for phase, value in phases.items()
+    )
+    legend = " · ".join(f"{phase} {value:.2f}" for phase, value in phases.items())
+    return f'<div class="phase-bar">{segments}</div><div class="phase-legend">{legend} ms</div>'
+
+def load_histogram(extra_info):
+    """
+    Load the latency histogram recorded with a benchmark
+    
+    Args:
+        extra_info (dict): Benchmark extra_info
+        
+    Returns:
+        dict: Serialized LatencyHistogram, rebuilt from raw samples for
+        runs saved without one, or None if neither is available
+    """
+    if 'histogram' in extra_info:
+        return extra_info['histogram']
+    if extra_info.get('samples'):
+        return LatencyHistogram.from_latencies(s['latency'] for s in extra_info['samples']).to_dict()
+    return None
+
+def merge_histograms(results):
+    """
+    Merge the histograms of all runs of each endpoint
+    
+    Args:
+        results (list): Result dicts with 'endpoint' and serialized 'histogram' keys
+        
+    Returns:
+        dict: Endpoint to merged LatencyHistogram, for endpoints with histograms
+    """
+    merged = {}
+    for result in results:
+        if result.get('histogram') is None:
+            continue
+        histogram = LatencyHistogram.from_dict(result['histogram'])
+        if result['endpoint'] not in merged:
+            merged[result['endpoint']] = LatencyHistogram(*histogram.layout)
+        merged[result['endpoint']].merge(histogram)
+    return merged
+
+def format_ms(value):
+    """Format a latency in ms for the report, '-' when unavailable"""
+    return f"{value:.2f}" if value is not None else "-"
+
+def benchmark_label(benchmark):
+    """
+    Report label of a pytest-benchmark entry, e.g. 'okx_book' or 'okx_book@ETH-USDT'
+    
+    Args:
+        benchmark (dict): Entry of a pytest-benchmark JSON file
+        
+    Returns:
+        str: '<exchange>_<series name>'
+    """
+    group = benchmark.get('group', 'unknown')
+    extra_info = benchmark.get('extra_info', {})
+    if 'endpoint' in extra_info:
+        return f"{group}_{series_name(group, extra_info['endpoint'], extra_info.get('symbol'))}"
+    # Older runs: parse endpoint from benchmark name
+    return benchmark.get('name', '').replace('test_', '').replace('_benchmark', '')
+
+def sample_latencies(samples):
+    """Latencies in ms of the samples that count, i.e. not throttled"""
+    return [s['latency'] for s in samples if not s.get('throttled')]
+
+def extract_benchmark_results(data, file):
+    """
+    Extract the per-benchmark summaries shown in the report from a result file
+    
+    Args:
+        data (dict): Parsed pytest-benchmark JSON
+        file (str): File name, kept with each summary
+        
+    Returns:
+        list: (exchange, summary) tuples; summaries are JSON-serializable
+    """
+    extracted = []
+    mock = bool(MOCK_SERVER.get('enabled'))
+    for benchmark in data.get('benchmarks', []):
+        group = benchmark.get('group', 'unknown')
+        if group not in EXCHANGES:
+            # Offline suites such as decode_latency.py are not network latency
+            continue
+        stats = benchmark.get('stats', {})
+        extra_info = benchmark.get('extra_info', {})
+        if bool(extra_info.get('mock')) != mock:
+            # Mock runs are only reported in mock mode, and real runs never are
+            continue
+        samples = extra_info.get('samples', [])
+        endpoint = benchmark_label(benchmark)
+        
+        # pytest-benchmark times whole rounds, including rate-limit waits and
+        # retries; the samples hold the latency of the successful attempts only
+        latencies = sample_latencies(samples)
+        if latencies:
+            mean, low, high = statistics.mean(latencies), min(latencies), max(latencies)
+        else:
+            mean, low, high = (stats.get(key, 0) * 1000 for key in ('mean', 'min', 'max'))  # to ms
+        
+        extracted.append((group, {
+            'endpoint': endpoint,
+            'mean': mean,
+            'min': low,
+            'max': high,
+            'throttled': extra_info.get('throttled', 0),
+            'connection': summarize_connection_states(samples),
+            'phases': summarize_phases(samples),
+            'histogram': load_histogram(extra_info),
+            'floor': extra_info.get('floor'),
+            'one_way': extra_info.get('one_way'),
+            'decode': summarize_decode(samples),
+            'decoder': extra_info.get('decoder', 'json'),
+            'adaptive': extra_info.get('adaptive'),
+            'file': file
+        }))
+    return extracted
+
+def report_config_digest():
+    """
+    Digest of the configuration the cached summaries and sections depend on
+    
+    Histograms are rebuilt with the HISTOGRAM layout and reported at its
+    percentiles, labels and the exchanges reported come from EXCHANGES,
+    and REPORTING shapes the rendered sections.
+    
+    Returns:
+        str: SHA-256 hex digest
+    """
+    config = {'histogram': HISTOGRAM, 'exchanges': EXCHANGES, 'reporting': REPORTING}
+    return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()
+
+def load_report_cache(cache_file):
+    """Load the parsed-result cache, or an empty one if missing, unreadable or built with other config"""
+    config = report_config_digest()
+    try:
+        with open(cache_file, 'r') as f:
+            cache = json.load(f)
+        if cache.get('version') == REPORT_CACHE_VERSION and cache.get('config') == config:
+            return cache
+    except (OSError, ValueError):
+        pass
+    return {'version': REPORT_CACHE_VERSION, 'config': config, 'files': {}, 'sections': {}}
+
+def save_report_cache(cache, cache_file):
+    """Atomically write the parsed-result cache"""
+    cache_dir = os.path.dirname(cache_file)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    with open(cache_file + '.tmp', 'w') as f:
+        json.dump(cache, f)
+    os.replace(cache_file + '.tmp', cache_file)
+
+def load_benchmark_results(benchmark_dir, cache):
+    """
+    Load benchmark summaries, parsing only new or changed files
+    
+    A file is reused from the cache when its mtime and size are unchanged,
+    or, failing that, when its content hash is unchanged. Entries of
+    deleted files are dropped from the cache.
+    
+    Args:
+        benchmark_dir (str): Directory holding pytest-benchmark JSON files
+        cache (dict): Parsed-result cache from load_report_cache, updated in place
+        
+    Returns:
+        tuple: (exchange_results, exchange_digests, parsed_count)
+    """
+    cached_files = cache['files']
+    seen = set()
+    parsed = 0
+    
+    exchange_results = {}
+    exchange_hashes = {}
+    
+    file_paths = sorted(
+        os.path.join(root, file)
+        for root, dirs, files in os.walk(benchmark_dir)
+        for file in files if file.endswith('.json')
+    )
+    
+    for file_path in file_paths:
+        file = os.path.basename(file_path)
+        key = os.path.relpath(file_path, benchmark_dir)
+        seen.add(key)
+        
+        try:
+            stat = os.stat(file_path)
+            entry = cached_files.get(key)
+            
+            if not entry or entry['mtime'] != stat.st_mtime_ns or entry['size'] != stat.st_size:
+                with open(file_path, 'rb') as f:
+                    content = f.read()
+                digest = hashlib.sha256(content).hexdigest()
+                
+                if not entry or entry['sha256'] != digest:
+                    data = json.loads(content)
+                    entry = {
+                        'sha256': digest,
+                        'results': extract_benchmark_results(data, file)
+                    }
+                    parsed += 1
+                
+                entry['mtime'] = stat.st_mtime_ns
+                entry['size'] = stat.st_size
+                cached_files[key] = entry
+        except Exception as e:
+            print(f"Error processing {file}: {str(e)}")
+            continue
+        
+        for group, result in entry['results']:
+            exchange_results.setdefault(group, []).append(result)
+            exchange_hashes.setdefault(group, []).append(entry['sha256'])
+    
+    for key in set(cached_files) - seen:
+        del cached_files[key]
+    
+    exchange_digests = {
+        exchange: hashlib.sha256("".join(hashes).encode()).hexdigest()
+        for exchange, hashes in exchange_hashes.items()
+    }
+    return exchange_results, exchange_digests, parsed
+
+def render_exchange_section(exchange, results):
+    """
+    Render the detailed HTML section of one exchange
+    
+    Args:
+        exchange (str): Exchange identifier
+        results (list): Benchmark summaries from extract_benchmark_results
+        
+    Returns:
+        str: HTML fragment
+    """
+    parts = []
+    parts.append(f"""
+    <h2>{exchange.upper()} Exchange</h2>
+    <table>
+        <tr>
+            <th>Endpoint</th>
+            <th>Mean (ms)</th>
+            <th>Min (ms)</th>
+            <th>Max (ms)</th>
+            <th>Throttled</th>
+        </tr>
+""")
+    
+    for result in results:
+        parts.append(f"""
+        <tr>
+            <td>{result['endpoint']}</td>
+            <td>{result['mean']:.2f}</td>
+            <td>{result['min']:.2f}</td>
+            <td>{result['max']:.2f}</td>
+            <td>{result.get('throttled', 0)}</td>
+        </tr>
+""")
+    
+    parts.append("    </table>\n")
+    
+    # Cold and warm connection latency side by side
+    parts.append(f"""
+    <h3>{exchange.upper()} Cold vs Warm Connections</h3>
+    <table>
+        <tr>
+            <th>Endpoint</th>
+            <th>Cold Mean (ms)</th>
+            <th>Warm Mean (ms)</th>
+            <th>Cold / Warm Samples</th>
+        </tr>
+""")
+    
+    for result in results:
+        cold = result['connection']['cold']
+        warm = result['connection']['warm']
+        parts.append(f"""
+        <tr>
+            <td>{result['endpoint']}</td>
+            <td>{format_ms(cold['mean'])}</td>
+            <td>{format_ms(warm['mean'])}</td>
+            <td>{cold['count']} / {warm['count']}</td>
+        </tr>
+""")
+    
+    parts.append("    </table>\n")
+    
+    # Tail percentiles from the histograms of all runs, merged per endpoint
+    percentiles = HISTOGRAM.get('percentiles', [50, 90, 99, 99.9])
+    header = "".join(f"<th>p{p:g} (ms)</th>" for p in percentiles)
+    parts.append(f"""
+    <h3>{exchange.upper()} Tail Latency (all runs)</h3>
+    <table class="wide">
+        <tr>
+            <th>Endpoint</th>
+            <th>Samples</th>
+            {header}
+        </tr>
+""")
+    
+    for endpoint, histogram in merge_histograms(results).items():
+        cells = "".join(
+            f"<td>{format_ms(value)}</td>" for value in histogram.percentiles(percentiles).values()
+        )
+        parts.append(f"""
+        <tr>
+            <td>{endpoint}</td>
+            <td>{histogram.total_count}</td>
+            {cells}
+        </tr>
+""")
+    
+    parts.append("    </table>\n")
+    
+    # Percentile confidence intervals of adaptively sampled runs
+    adaptive_results = [result for result in results if result.get('adaptive')]
+    if adaptive_results:
+        parts.append(f"""
+    <h3>{exchange.upper()} Adaptive Sampling</h3>
+    <table class="wide">
+        <tr>
+            <th>Endpoint</th>
+            <th>Samples</th>
+            <th>Percentile (ms)</th>
+            <th>Confidence Interval (ms)</th>
+            <th>Relative Width</th>
+        </tr>
+""")
+        for result in adaptive_results:
+            adaptive = result['adaptive']
+            ci_text = f"{adaptive['ci'][0]:.2f} – {adaptive['ci'][1]:.2f}" if adaptive['ci'] else "-"
+            width_text = f"{adaptive['width']:.1%}" if adaptive['width'] is not None else "-"
+            if not adaptive['converged']:
+                width_text += " (budget exhausted)"
+            parts.append(f"""
+        <tr>
+            <td>{result['endpoint']}</td>
+            <td>{adaptive['samples']}</td>
+            <td>p{adaptive['percentile']:g}: {format_ms(adaptive['estimate'])}</td>
+            <td>{ci_text}</td>
+            <td>{width_text}</td>
+        </tr>
+""")
+        parts.append("    </table>\n")
+    
+    # Raw latency next to latency with the client-side floor subtracted
+    parts.append(f"""
+    <h3>{exchange.upper()} Floor-Adjusted Latency</h3>
+    <table>
+        <tr>
+            <th>Endpoint</th>
+            <th>Raw Mean (ms)</th>
+            <th>Client Floor (ms)</th>
+            <th>Adjusted Mean (ms)</th>
+        </tr>
+""")
+    
+    for result in results:
+        floor = result.get('floor')
+        floor_text = f"{floor['median']:.2f} ± {floor['stddev']:.2f}" if floor else "-"
+        parts.append(f"""
+        <tr>
+            <td>{result['endpoint']}</td>
+            <td>{result['mean']:.2f}</td>
+            <td>{floor_text}</td>
+            <td>{format_ms(adjust_latency(result['mean'], floor))}</td>
+        </tr>
+""")
+    
+    parts.append("    </table>\n")
+    
+    # Outbound/return split from the exchange's server timestamps
+    parts.append(f"""
+    <h3>{exchange.upper()} One-Way Latency</h3>
+    <table class="wide">
+        <tr>
+            <th>Endpoint</th>
+            <th>Clock Offset (ms)</th>
+            <th>Drift (ppm)</th>
+            <th>Outbound (ms)</th>
+            <th>Return (ms)</th>
+        </tr>
+""")
+    
+    data_bounds = False
+    for result in results:
+        one_way = result.get('one_way')
+        if one_way:
+            bound = f" ± {one_way['error']:.2f}"
+            # Split at a data timestamp: outbound at least, return at most the reported leg
+            outbound_mark, return_mark = ("≥ ", "≤ ") if one_way.get('bound') else ("", "")
+            data_bounds = data_bounds or bool(one_way.get('bound'))
+            offset_text = f"{one_way['offset']:+.2f}{bound}"
+            drift_text = f"{one_way['drift_ppm']:+.1f}" if one_way.get('drift_ppm') is not None else "-"
+            outbound_text = (f"{outbound_mark}{one_way['outbound']:.2f}{bound}"
+                             if one_way.get('outbound') is not None else "-")
+            return_text = f"{return_mark}{one_way['return']:.2f}{bound}" if one_way.get('return') is not None else "-"
+        else:
+            offset_text = drift_text = outbound_text = return_text = "-"
+        parts.append(f"""
+        <tr>
+            <td>{result['endpoint']}</td>
+            <td>{offset_text}</td>
+            <td>{drift_text}</td>
+            <td>{outbound_text}</td>
+            <td>{return_text}</td>
+        </tr>
+""")
+    
+    parts.append("    </table>\n")
+    if data_bounds:
+        parts.append("    <p>≥ / ≤: no response timestamp, split at the data's own timestamp (e.g. the OKX ticker ts), "
+                     "which precedes the response; outbound is a lower and return an upper bound.</p>\n")
+    
+    # Stacked per-phase breakdown of the mean request
+    parts.append(f"""
+    <h3>{exchange.upper()} Request Phases</h3>
+    <table class="phases">
+        <tr>
+            <th>Endpoint</th>
+            <th>DNS / Connect / TLS / TTFB / Transfer</th>
+            <th>Decode (ms)</th>
+        </tr>
+""")
+    
+    for result in results:
+        decode = result.get('decode')
+        decode_text = f"{decode:.3f} ({result.get('decoder', 'json')})" if decode is not None else "-"
+        parts.append(f"""
+        <tr>
+            <td>{result['endpoint']}</td>
+            <td>{format_phase_bar(result['phases'])}</td>
+            <td>{decode_text}</td>
+        </tr>
+""")
+    
+    parts.append("    </table>\n")
+    
+    return "".join(parts)
+
 def generate_comprehensive_report(output_dir=None):
     """
     Generate a comprehensive report of all benchmark results
     
+    Extracted per-benchmark summaries and rendered exchange sections are
+    cached in DATA_STORAGE['report_cache'], so each run only parses new or
+    changed result files and only re-renders exchanges whose data changed.
+    
     Args:
         output_dir (str, optional): Output directory
         
@@ -145,68 +987,52 @@ def generate_comprehensive_report(output_dir=None):
     os.makedirs(output_dir, exist_ok=True)
     
     # Find all JSON benchmark files
-    benchmark_dir = os.path.join(os.getcwd(), '.benchmarks')
+    benchmark_dir = get_benchmark_dir()
     
     if not os.path.exists(benchmark_dir):
         print(f"No benchmark data found in {benchmark_dir}")
         return False
     
-    # Find the most recent benchmark results for each exchange
-    exchange_results = {}
+    mock = MOCK_SERVER.get('enabled')
+    cache_file = MOCK_SERVER['report_cache'] if mock else DATA_STORAGE.get('report_cache', os.path.join('data', 'report_cache.json'))
+    cache = load_report_cache(cache_file)
+    exchange_results, exchange_digests, parsed = load_benchmark_results(benchmark_dir, cache)
     
-    # Walk through the benchmark directory
-    for root, dirs, files in os.walk(benchmark_dir):
-        for file in files:
-            if file.endswith('.json'):
-                file_path = os.path.join(root, file)
-                
-                try:
-                    with open(file_path, 'r') as f:
-                        data = json.load(f)
-                        
-                    # Extract benchmark data
-                    if 'benchmarks' in data:
-                        for benchmark in data['benchmarks']:
-                            group = benchmark.get('group', 'unknown')
-                            name = benchmark.get('name', '')
-                            mean = benchmark.get('stats', {}).get('mean', 0) * 1000  # to ms
-                            min_val = benchmark.get('stats', {}).get('min', 0) * 1000  # to ms
-                            max_val = benchmark.get('stats', {}).get('max', 0) * 1000  # to ms
-                            
-                            # Parse endpoint from benchmark name
-                            endpoint = name.replace('test_', '').replace('_benchmark', '')
-                            
-                            if group not in exchange_results:
-                                exchange_results[group] = []
-                                
-                            exchange_results[group].append({
-                                'endpoint': endpoint,
-                                'mean': mean,
-                                'min': min_val,
-                                'max': max_val,
-                                'file': file
-                            })
-                except Exception as e:
-                    print(f"Error processing {file}: {str(e)}")
+    # Re-render only the exchange sections whose input files changed
+    cached_sections = cache['sections']
+    sections = {}
+    for exchange, results in exchange_results.items():
+        cached = cached_sections.get(exchange)
+        if not cached or cached['digest'] != exchange_digests[exchange]:
+            cached = {
+                'digest': exchange_digests[exchange],
+                'html': render_exchange_section(exchange, results)
+            }
+        sections[exchange] = cached
+    cache['sections'] = sections
+    
+    save_report_cache(cache, cache_file)
+    print(f"Parsed {parsed} new or changed benchmark files")
     
     # Create a comprehensive report with fixed filename
-    report_file = os.path.join(output_dir, "benchmark_report_latest.html")
+    report_file = os.path.join(output_dir, MOCK_SERVER['report_file'] if mock else "benchmark_report_latest.html")
     
     css_path = "assets/css/report.css"
     font_path = "assets/IBMPlexMono-Medium.ttf"
+    title = "API Latency Benchmark Report" + (" (mock exchange)" if mock else "")
     
     # Generate HTML report
     with open(report_file, 'w') as f:
         f.write("""<!DOCTYPE html>
 <html>
 <head>
-    <title>API Latency Benchmark Report</title>
+    <title>""" + title + """</title>
     <link rel="stylesheet" href="assets/css/report.css">
     <meta charset="UTF-8">
 </head>
 <body>
     <div class="container">
-    <h1>API Latency Benchmark Report</h1>
+    <h1>""" + title + """</h1>
     <p class="timestamp">Generated on: """ + datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S") + """</p>
 """)
         
@@ -244,29 +1070,8 @@ def generate_comprehensive_report(output_dir=None):
 """)
         
         # Add detailed results for each exchange
-        for exchange, results in exchange_results.items():
-            f.write(f"""
-    <h2>{exchange.upper()} Exchange</h2>
-    <table>
-        <tr>
-            <th>Endpoint</th>
-            <th>Mean (ms)</th>
-            <th>Min (ms)</th>
-            <th>Max (ms)</th>
-        </tr>
-""")
-            
-            for result in results:
-                f.write(f"""
-        <tr>
-            <td>{result['endpoint']}</td>
-            <td>{result['mean']:.2f}</td>
-            <td>{result['min']:.2f}</td>
-            <td>{result['max']:.2f}</td>
-        </tr>
-""")
-            
-            f.write("    </table>\n")
+        for exchange in exchange_results:
+            f.write(sections[exchange]['html'])
         
         f.write("""
     </div>
@@ -275,4 +1080,4 @@ def generate_comprehensive_report(output_dir=None):
 """)
     
     print(f"Report generated: {report_file}")
-    return True 
\ No newline at end of file
+    return True
@@ -0,0 +1,121 @@
+"""
+Measurement-floor calibration
+
+Every latency sample includes time spent on the client itself: building
+the request in make_api_request, the requests/urllib3 machinery and the
+instrumented transport. This module measures that floor by sending the
+exact same probe through the exact same code path to the mock exchange
+on loopback, with no injected latency, so that reports can show both
+raw and floor-adjusted latency.
+
+Calibration temporarily redirects the exchange's base URL, so it must
+not run concurrently with real probes of the same exchange.
+"""
+import statistics
+
+from .config import API_SETTINGS, CALIBRATION
+
+_floors = {}
+
+# Mock server settings for calibration: no injected latency or errors
+LOOPBACK_SETTINGS = {
+    'host': '127.0.0.1',
+    'port': 0,
+    'latency': {'distribution': 'constant', 'median_ms': 0.0},
+    'jitter_ms': 0.0,
+    'stall_probability': 0.0,
+    'error_rate': 0.0,
+    'throttle_rate': 0.0,
+}
+
+
+def measure_client_floor(exchange, endpoint_key, rounds=None):
+    """
+    Measure the client-side latency floor of one endpoint on loopback
+
+    Args:
+        exchange (str): Exchange identifier
+        endpoint_key (str): Endpoint key
+        rounds (int, optional): Measured rounds, defaults to CALIBRATION['rounds']
+
+    Returns:
+        dict: Floor statistics in ms (mean, median, stddev, min, max, rounds),
+        or None if no loopback request succeeded
+    """
+    # Imported here: benchmark_core imports this module
+    from .benchmark_core import probe_endpoint
+    from .mock_exchange import start_mock_server
+
+    if rounds is None:
+        rounds = CALIBRATION.get('rounds', 30)
+
+    server = start_mock_server(settings=LOOPBACK_SETTINGS)
+    base_urls = API_SETTINGS.setdefault('base_urls', {})
+    previous = base_urls.get(exchange)
+    base_urls[exchange] = server.base_url
+
+    latencies = []
+    try:
+        # One discarded round opens the loopback connection; loopback
+        # requests do not count against the exchange's rate limits
+        probe_endpoint(exchange, endpoint_key, rate_limit=False)
+        for _ in range(rounds):
+            success, _, sample = probe_endpoint(exchange, endpoint_key, rate_limit=False)
+            if success:
+                latencies.append(sample['latency'])
+    finally:
+        if previous is None:
+            base_urls.pop(exchange, None)
+        else:
+            base_urls[exchange] = previous
+        server.shutdown()
+        server.server_close()
+
+    if not latencies:
+        print(f"Error: calibration of {exchange} {endpoint_key} failed")
+        return None
+
+    return {
+        'mean': statistics.mean(latencies),
+        'median': statistics.median(latencies),
+        'stddev': statistics.stdev(latencies) if len(latencies) > 1 else 0.0,
+        'min': min(latencies),
+        'max': max(latencies),
+        'rounds': len(latencies)
+    }
+
+
+def get_client_floor(exchange, endpoint_key):
+    """
+    Get the client-side floor of an endpoint, measured once per process
+
+    Args:
+        exchange (str): Exchange identifier
+        endpoint_key (str): Endpoint key
+
+    Returns:
+        dict: Floor statistics from measure_client_floor, or None if
+        calibration is disabled or failed
+    """
+    if not CALIBRATION.get('enabled', True):
+        return None
+    key = (exchange, endpoint_key)
+    if key not in _floors:
+        _floors[key] = measure_client_floor(exchange, endpoint_key)
+    return _floors[key]
+
+
+def adjust_latency(latency, floor):
+    """
+    Subtract the client floor (its median) from a latency
+
+    Args:
+        latency (float): Raw latency in ms
+        floor (dict): Floor statistics, or None
+
+    Returns:
+        float: Floor-adjusted latency in ms, or None if there is no floor
+    """
+    if latency is None or not floor:
+        return None
+    return max(latency - floor['median'], 0.0)
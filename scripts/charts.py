@@ -0,0 +1,273 @@
+"""
+Chart rendering for the report pipeline
+
+Charts are described by plain dicts (chart specs) holding everything
+needed to draw them: the already downsampled data, statistics, labels
+and the output path without extension. Building specs is cheap and
+happens in the calling process; drawing them is the slow part and is
+done by render_charts:
+
+- every spec is hashed (data, labels, format and size), and charts whose
+  hash matches the one recorded in REPORTING['chart_cache'] for an
+  existing output file are skipped
+- the remaining charts are drawn in a process pool of
+  REPORTING['chart_workers'] workers
+- REPORTING['chart_format'] selects the output: 'png' (raster at
+  REPORTING['dpi']), 'svg' (vector, no rasterization) or 'json' (compact
+  data summary for client-side charts, no matplotlib at all)
+
+Supported kinds are 'timeseries' (latency over time with average and
+P99 lines), 'bar' (mean latency per endpoint with error bars) and
+'curve' (one or more series over a shared x axis, with an optional
+vertical marker, e.g. latency versus throughput with the knee).
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .config import REPORTING
+
+FORMATS = ('png', 'svg', 'json')
+
+# Spec keys left out of the hash: a chart redrawn only for these is not worth redrawing
+VOLATILE_KEYS = ('generated_at',)
+
+
+def chart_hash(spec):
+    """
+    Hash of everything that affects a chart's output
+
+    Args:
+        spec (dict): Chart spec
+
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.sha256()
+    for key in sorted(spec):
+        if key in VOLATILE_KEYS:
+            continue
+        value = spec[key]
+        digest.update(key.encode())
+        if isinstance(value, dict):
+            value = {name: value[name] for name in sorted(value)}
+            for name, item in value.items():
+                digest.update(name.encode())
+                _update(digest, item)
+        else:
+            _update(digest, value)
+    return digest.hexdigest()
+
+
+def _update(digest, value):
+    if isinstance(value, np.ndarray):
+        digest.update(str((value.dtype.str, value.shape)).encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    else:
+        digest.update(json.dumps(value, sort_keys=True, default=str).encode())
+
+
+def output_file(spec):
+    """Path a spec renders to"""
+    return f"{spec['path']}.{spec.get('format', 'png')}"
+
+
+def _title(spec):
+    if spec.get('generated_at'):
+        return f"{spec['title']} (Generated at {spec['generated_at']})"
+    return spec['title']
+
+
+def _json_summary(spec):
+    # Compact summary for client-side charts: ms rounded to 0.01, whole seconds
+    summary = {'kind': spec['kind'], 'title': _title(spec),
+               'xlabel': spec.get('xlabel'), 'ylabel': spec.get('ylabel')}
+    data = spec['data']
+    if spec['kind'] == 'timeseries':
+        summary['times'] = np.asarray(data['times'], dtype=np.float64).astype(np.int64).tolist()
+        summary['latency'] = np.round(np.asarray(data['latency'], dtype=np.float64), 2).tolist()
+        summary['downsampled'] = bool(data.get('downsampled'))
+    elif spec['kind'] == 'curve':
+        summary['x'] = np.round(np.asarray(data['x'], dtype=np.float64), 2).tolist()
+        summary['series'] = {label: [None if value is None else round(float(value), 2) for value in values]
+                             for label, values in data['series'].items()}
+        summary['marker'] = data.get('marker')
+    else:
+        summary['labels'] = list(data['labels'])
+        summary['mean'] = np.round(np.asarray(data['mean'], dtype=np.float64), 2).tolist()
+        summary['stddev'] = np.round(np.nan_to_num(np.asarray(data['stddev'], dtype=np.float64)), 2).tolist()
+    if spec.get('stats'):
+        summary['stats'] = {name: round(float(value), 2) for name, value in spec['stats'].items()}
+    return summary
+
+
+def _draw_timeseries(plt, spec, font_prop):
+    import matplotlib.dates as mdates
+    from datetime import datetime
+
+    data = spec['data']
+    stats = spec['stats']
+    dates = [datetime.fromtimestamp(int(ts)) for ts in data['times']]
+
+    plt.subplot(111)
+    plt.plot(dates, data['latency'], 'b-', linewidth=1, alpha=0.7)
+    if not data.get('downsampled'):
+        plt.plot(dates, data['latency'], 'bo', markersize=3)
+    plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%m-%d %H:%M'))
+    plt.gcf().autofmt_xdate()
+    plt.grid(True, linestyle='--', alpha=0.7)
+
+    stats_text = "Statistics:\n" + "\n".join(
+        f"{name}: {value:.0f}" if name == 'Samples' else f"{name}: {value:.2f} ms"
+        for name, value in stats.items()
+    )
+    plt.annotate(stats_text, xy=(0.02, 0.97), xycoords='axes fraction',
+                 bbox=dict(boxstyle="round,pad=0.5", fc="white", alpha=0.8),
+                 va='top', ha='left', fontsize=9, fontproperties=font_prop)
+
+    avg, p99 = stats['Avg Latency'], stats['P99']
+    plt.axhline(y=avg, color='r', linestyle='-', alpha=0.5, label=f'Avg: {avg:.2f} ms')
+    plt.axhline(y=p99, color='g', linestyle='--', alpha=0.5, label=f'P99: {p99:.2f} ms')
+    plt.legend(loc='upper right', prop=font_prop)
+
+
+def _draw_bar(plt, spec, font_prop):
+    data = spec['data']
+    plt.bar(data['labels'], data['mean'], yerr=data['stddev'])
+    plt.xticks(rotation=45)
+
+
+def _draw_curve(plt, spec, font_prop):
+    data = spec['data']
+    for label, values in data['series'].items():
+        values = [np.nan if value is None else value for value in values]
+        plt.plot(data['x'], values, 'o-', linewidth=1.5, markersize=4, label=label)
+    marker = data.get('marker')
+    if marker:
+        plt.axvline(x=marker['x'], color='r', linestyle='--', alpha=0.6, label=marker['label'])
+    if data.get('log_y'):
+        plt.yscale('log')
+    plt.grid(True, linestyle='--', alpha=0.7)
+    plt.legend(loc='upper left', prop=font_prop)
+
+
+def render_chart(spec):
+    """
+    Draw one chart spec to its output file
+
+    Args:
+        spec (dict): Chart spec
+
+    Returns:
+        str: Output file
+    """
+    fmt = spec.get('format', 'png')
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown chart format '{fmt}', expected one of {', '.join(FORMATS)}")
+    file = output_file(spec)
+    os.makedirs(os.path.dirname(file) or '.', exist_ok=True)
+
+    if fmt == 'json':
+        with open(file, 'w') as f:
+            json.dump(_json_summary(spec), f, separators=(',', ':'))
+        return file
+
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import matplotlib.font_manager as fm
+
+    font_prop = fm.FontProperties(fname=spec['font']) if spec.get('font') else None
+    plt.figure(figsize=tuple(spec.get('size', (REPORTING['chart_width'], REPORTING['chart_height']))))
+    try:
+        if spec['kind'] == 'timeseries':
+            _draw_timeseries(plt, spec, font_prop)
+        elif spec['kind'] == 'bar':
+            _draw_bar(plt, spec, font_prop)
+        elif spec['kind'] == 'curve':
+            _draw_curve(plt, spec, font_prop)
+        else:
+            raise ValueError(f"Unknown chart kind '{spec['kind']}'")
+        plt.title(_title(spec), fontproperties=font_prop)
+        plt.xlabel(spec.get('xlabel', ''), fontproperties=font_prop)
+        plt.ylabel(spec.get('ylabel', ''), fontproperties=font_prop)
+        plt.tight_layout()
+        plt.savefig(file, dpi=spec.get('dpi', REPORTING['dpi']), bbox_inches='tight')
+    finally:
+        plt.close()
+    return file
+
+
+def load_chart_cache(cache_file):
+    """Load the output file -> spec hash map of rendered charts"""
+    if not os.path.exists(cache_file):
+        return {}
+    try:
+        with open(cache_file, 'r') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def save_chart_cache(cache, cache_file):
+    """Save the output file -> spec hash map of rendered charts"""
+    os.makedirs(os.path.dirname(cache_file) or '.', exist_ok=True)
+    with open(cache_file, 'w') as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+
+
+def render_charts(specs, workers=None, cache_file=None):
+    """
+    Render chart specs in parallel, skipping unchanged charts
+
+    Args:
+        specs (list): Chart specs; a missing 'format' defaults to REPORTING['chart_format']
+        workers (int, optional): Worker processes, defaults to
+            REPORTING['chart_workers'] or the CPU count
+        cache_file (str, optional): Hash cache, defaults to REPORTING['chart_cache']
+
+    Returns:
+        dict: Output file -> 'rendered', 'cached' or the error message
+    """
+    cache_file = cache_file or REPORTING.get('chart_cache', os.path.join('data', 'chart_cache.json'))
+    cache = load_chart_cache(cache_file)
+    results = {}
+    todo = []
+    for spec in specs:
+        spec.setdefault('format', REPORTING.get('chart_format', 'png'))
+        file = output_file(spec)
+        digest = chart_hash(spec)
+        if cache.get(file) == digest and os.path.exists(file):
+            results[file] = 'cached'
+        else:
+            todo.append((spec, file, digest))
+
+    workers = min(len(todo), workers or REPORTING.get('chart_workers') or os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [(executor.submit(render_chart, spec), file, digest) for spec, file, digest in todo]
+            outcomes = [(future.exception(), file, digest) for future, file, digest in futures]
+    else:
+        outcomes = []
+        for spec, file, digest in todo:
+            try:
+                render_chart(spec)
+                outcomes.append((None, file, digest))
+            except Exception as e:
+                outcomes.append((e, file, digest))
+
+    for error, file, digest in outcomes:
+        if error is None:
+            cache[file] = digest
+            results[file] = 'rendered'
+        else:
+            cache.pop(file, None)
+            results[file] = str(error)
+            print(f"Error: Failed to render {file}: {error}")
+
+    if todo:
+        save_chart_cache(cache, cache_file)
+    return results
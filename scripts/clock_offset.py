@@ -0,0 +1,300 @@
+"""
+Clock-offset estimation and one-way latency
+
+This module estimates the offset between the local clock and an
+exchange's clock, NTP-style, from repeated requests to the exchange's
+public time endpoint. Every request brackets the server timestamp
+between the local send time and the arrival of the first response byte:
+
+    offset = server time - (sent + received) / 2,   error <= rtt / 2
+
+Samples with the smallest round trip have the tightest bounds, so the
+estimate is fitted to the fastest samples only, and a linear fit over
+the run gives the drift of the local clock against the exchange.
+
+With the offset known, any response carrying a server timestamp can be
+split into an outbound leg (send until the server stamped it) and a
+return leg. OKX stamps only its data: for the endpoints listed in
+CLOCK_SYNC['data_timestamps'] the snapshot time data[0].ts stands in,
+and since it precedes the response the split is a bound (outbound at
+least, return at most the reported leg). Both legs carry the offset's error bound: an NTP-style
+estimate assumes the fastest exchange was symmetric, so a path
+asymmetry smaller than the bound cannot be told apart from clock
+offset. Set CLOCK_SYNC['offset_mode'] to 'system' on hosts whose clock
+is disciplined by PTP/GPS to trust the local clock instead.
+"""
+import json
+import re
+import statistics
+import threading
+import time
+from collections import deque
+
+import requests
+
+from .config import CLOCK_SYNC, API_SETTINGS
+from .decoders import get_field
+from .session_pool import get_session, resolve_url
+from .rate_limit import get_bucket, is_throttled
+
+_REQUEST_TIME = re.compile(rb'"requestTime"\s*:\s*"?(\d{12,})')
+
+_estimators = {}
+_last_sync = {}
+_lock = threading.Lock()
+
+
+def parse_server_time(content):
+    """
+    Get the server timestamp of a response, if it carries one
+
+    Bitget stamps every response with requestTime; the time endpoints of
+    both exchanges return the server time as their only data. Timestamps
+    inside market data (e.g. the ts of a ticker) date the data, not the
+    response, and are ignored.
+
+    Args:
+        content (bytes): Response body
+
+    Returns:
+        int: Server time in Unix ms, or None
+    """
+    match = _REQUEST_TIME.search(content[:512])
+    if match:
+        return int(match.group(1))
+    if len(content) > 256:
+        return None
+    try:
+        payload = json.loads(content)
+    except ValueError:
+        return None
+    data = payload.get('data') if isinstance(payload, dict) else None
+    if isinstance(data, (int, str)) and str(data).isdigit():
+        return int(data)
+    if isinstance(data, list) and len(data) == 1 and isinstance(data[0], dict) and set(data[0]) == {'ts'}:
+        return int(data[0]['ts'])
+    return None
+
+
+def parse_data_time(exchange, endpoint_key, payload):
+    """
+    Get the snapshot timestamp of a decoded payload, for endpoints listed in
+    CLOCK_SYNC['data_timestamps']
+
+    Args:
+        exchange (str): Exchange identifier
+        endpoint_key (str): Endpoint key
+        payload: Decoded response (dict or typed struct)
+
+    Returns:
+        int: data[0].ts in Unix ms, or None
+    """
+    if endpoint_key not in CLOCK_SYNC.get('data_timestamps', {}).get(exchange, []) or payload is None:
+        return None
+    data = get_field(payload, 'data')
+    if not isinstance(data, list) or not data:
+        return None
+    ts = get_field(data[0], 'ts')
+    return int(ts) if ts is not None and str(ts).isdigit() else None
+
+
+class ClockOffsetEstimator:
+    """
+    Offset and drift of the local clock against one exchange
+
+    Args:
+        max_samples (int, optional): Samples kept, defaults to CLOCK_SYNC['max_samples']
+        resolution_ms (float, optional): Server timestamp resolution
+    """
+
+    def __init__(self, max_samples=None, resolution_ms=None):
+        self.samples = deque(maxlen=max_samples or CLOCK_SYNC.get('max_samples', 1000))
+        self.resolution_ms = resolution_ms if resolution_ms is not None else CLOCK_SYNC.get('resolution_ms', 1.0)
+
+    def add_sample(self, sent, received, server_ms):
+        """
+        Add one timed request
+
+        Args:
+            sent (float): Local send time (Unix seconds)
+            received (float): Local time of the first response byte (Unix seconds)
+            server_ms (int): Server timestamp (Unix ms, truncated to resolution_ms)
+        """
+        sent_ms, received_ms = sent * 1000, received * 1000
+        # A truncated timestamp means the server time was within one resolution step after it
+        server_mid = server_ms + self.resolution_ms / 2
+        self.samples.append({
+            'at': (sent_ms + received_ms) / 2,
+            'offset': server_mid - (sent_ms + received_ms) / 2,
+            'rtt': received_ms - sent_ms
+        })
+
+    def estimate(self, at=None):
+        """
+        Estimate the clock offset
+
+        Args:
+            at (float, optional): Local time (Unix ms) to estimate at,
+                defaults to the latest sample
+
+        Returns:
+            dict: offset (ms, server minus local), error (ms bound), drift_ppm
+            (None until the samples span CLOCK_SYNC['min_drift_span']),
+            rtt_min (ms) and samples, or None without samples
+        """
+        if CLOCK_SYNC.get('offset_mode', 'estimate') == 'system':
+            return {'offset': 0.0, 'error': CLOCK_SYNC.get('system_error_ms', 1.0),
+                    'drift_ppm': None, 'rtt_min': None, 'samples': len(self.samples)}
+        if not self.samples:
+            return None
+
+        samples = list(self.samples)
+        rtt_min = min(sample['rtt'] for sample in samples)
+        # Fastest half: their bounds are the tightest
+        best = sorted(samples, key=lambda sample: sample['rtt'])[:max(2, len(samples) // 2)]
+        times = [sample['at'] for sample in best]
+        offsets = [sample['offset'] for sample in best]
+
+        # Least-squares slope of offset over time is the drift
+        reference = statistics.mean(times)
+        mean_offset = statistics.mean(offsets)
+        spread = sum((t - reference) ** 2 for t in times)
+        # Over a short span timestamp noise dwarfs any real drift
+        slope = None
+        if len(best) > 2 and max(times) - min(times) >= CLOCK_SYNC.get('min_drift_span', 60) * 1000:
+            slope = sum((t - reference) * (o - mean_offset) for t, o in zip(times, offsets)) / spread
+        if at is None:
+            at = max(sample['at'] for sample in samples)
+        offset = mean_offset + (slope or 0.0) * (at - reference)
+
+        return {
+            'offset': offset,
+            'error': rtt_min / 2 + self.resolution_ms / 2,
+            'drift_ppm': slope * 1e6 if slope is not None else None,
+            'rtt_min': rtt_min,
+            'samples': len(samples)
+        }
+
+    def split(self, sent, received, server_ms):
+        """
+        Split one request into outbound and return legs
+
+        Args:
+            sent (float): Local send time (Unix seconds)
+            received (float): Local time of the first response byte (Unix seconds)
+            server_ms (int): Server timestamp (Unix ms)
+
+        Returns:
+            tuple: (outbound ms, return ms, error bound ms), or None without an estimate
+        """
+        sent_ms, received_ms = sent * 1000, received * 1000
+        estimate = self.estimate((sent_ms + received_ms) / 2)
+        if estimate is None:
+            return None
+        server_local = server_ms + self.resolution_ms / 2 - estimate['offset']
+        return server_local - sent_ms, received_ms - server_local, estimate['error']
+
+
+def get_estimator(exchange):
+    """Get the process-wide clock offset estimator of an exchange"""
+    with _lock:
+        if exchange not in _estimators:
+            _estimators[exchange] = ClockOffsetEstimator()
+        return _estimators[exchange]
+
+
+def sync_clock(exchange, rounds=None, force=False):
+    """
+    Sample an exchange's time endpoint and add the samples to its estimator
+
+    Called before every benchmark, so the estimator accumulates samples
+    over the whole run and can track drift. Calls within
+    CLOCK_SYNC['interval'] seconds of the last sync are skipped, so
+    sweeping many endpoints and symbols does not multiply clock requests.
+
+    Args:
+        exchange (str): Exchange identifier
+        rounds (int, optional): Requests, defaults to CLOCK_SYNC['rounds']
+        force (bool): Sync even if the last sync is recent
+
+    Returns:
+        ClockOffsetEstimator: The exchange's estimator, or None if clock
+        sync is disabled or the exchange has no time endpoint
+    """
+    url = CLOCK_SYNC.get('time_endpoints', {}).get(exchange)
+    if not CLOCK_SYNC.get('enabled', True) or not url:
+        return None
+
+    estimator = get_estimator(exchange)
+    with _lock:
+        now = time.monotonic()
+        last = _last_sync.get(exchange)
+        if not force and last is not None and now - last < CLOCK_SYNC.get('interval', 30):
+            return estimator
+        _last_sync[exchange] = now
+    session = get_session(exchange)
+    bucket = get_bucket(exchange, 'time')
+    for _ in range(rounds if rounds is not None else CLOCK_SYNC.get('rounds', 5)):
+        if bucket is not None:
+            bucket.acquire()
+        try:
+            response = session.get(resolve_url(exchange, url), timeout=API_SETTINGS.get('timeout', 10))
+        except requests.exceptions.RequestException as e:
+            print(f"Error syncing clock with {exchange}: {str(e)}")
+            continue
+        if is_throttled(exchange, response):
+            continue
+        server_ms = parse_server_time(response.content)
+        wall_times = getattr(response, 'wall_times', None)
+        if server_ms is not None and wall_times:
+            estimator.add_sample(wall_times[0], wall_times[1], server_ms)
+    return estimator
+
+
+def summarize_one_way(exchange, samples):
+    """
+    Split samples carrying a server timestamp into outbound and return legs
+
+    Adds 'outbound' and 'return' (ms) to every such sample. Samples split
+    at a data timestamp (see parse_data_time) make the legs bounds, which
+    'bound' reports.
+
+    Args:
+        exchange (str): Exchange identifier
+        samples (list): Latency samples with 'sent_at', 'first_byte_at' and 'server_time'
+
+    Returns:
+        dict: Clock estimate plus mean legs and their error bound, and
+        'bound' (True when the legs came from data timestamps), or None
+        without a clock estimate
+    """
+    estimator = _estimators.get(exchange)
+    if estimator is None:
+        return None
+    clock = estimator.estimate()
+    if clock is None:
+        return None
+
+    outbound, returns = [], []
+    bound = False
+    for sample in samples:
+        if sample.get('server_time') is None or sample.get('sent_at') is None:
+            continue
+        legs = estimator.split(sample['sent_at'], sample['first_byte_at'], sample['server_time'])
+        if legs is not None:
+            sample['outbound'], sample['return'] = legs[0], legs[1]
+            outbound.append(legs[0])
+            returns.append(legs[1])
+            bound = bound or sample.get('server_time_source') == 'data'
+
+    return {
+        'offset': clock['offset'],
+        'error': clock['error'],
+        'drift_ppm': clock['drift_ppm'],
+        'rtt_min': clock['rtt_min'],
+        'clock_samples': clock['samples'],
+        'outbound': statistics.mean(outbound) if outbound else None,
+        'return': statistics.mean(returns) if returns else None,
+        'one_way_samples': len(outbound),
+        'bound': bound
+    }
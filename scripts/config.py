@@ -1,55 +1,132 @@
 # Configuration file for API latency monitoring
+import json
+import os
 
 # Exchanges information
 EXCHANGES = {
     'okx': {
         'name': 'OKX',
-        'description': 'OKX Cryptocurrency Exchange'
+        'description': 'OKX Cryptocurrency Exchange',
+        'symbols': ['BTC-USDT'],  # Substituted for {symbol} in endpoint URLs; the first is the default
+        'validator': {'equals': {'code': '0'}}  # Top-level fields a valid response must have
     },
     'bitget': {
         'name': 'Bitget',
-        'description': 'Bitget Cryptocurrency Exchange'
+        'description': 'Bitget Cryptocurrency Exchange',
+        'symbols': ['BTCUSDT_UMCBL'],
+        'validator': {'present': ['data']}
     }
 }
 
-# API endpoints for different exchanges
+# API endpoints for different exchanges; {symbol} is replaced by each of the exchange's symbols
 ENDPOINTS = {
     'okx': {
         'market_data': {
-            'url': 'https://www.okx.com/api/v5/market/ticker?instId=BTC-USDT',
+            'url': 'https://www.okx.com/api/v5/market/ticker?instId={symbol}',
             'method': 'GET'
         },
         'book': {
-            'url': 'https://www.okx.com/api/v5/market/books?instId=BTC-USDT&sz=10',
+            'url': 'https://www.okx.com/api/v5/market/books?instId={symbol}&sz=10',
             'method': 'GET'
         },
         'trades': {
-            'url': 'https://www.okx.com/api/v5/market/trades?instId=BTC-USDT',
+            'url': 'https://www.okx.com/api/v5/market/trades?instId={symbol}',
             'method': 'GET'
         }
     },
     'bitget': {
         'market_data': {
-            'url': 'https://api.bitget.com/api/mix/v1/market/ticker?symbol=BTCUSDT_UMCBL',
+            'url': 'https://api.bitget.com/api/mix/v1/market/ticker?symbol={symbol}',
             'method': 'GET'
         },
         'book': {
-            'url': 'https://api.bitget.com/api/mix/v1/market/depth?symbol=BTCUSDT_UMCBL&limit=20',
+            'url': 'https://api.bitget.com/api/mix/v1/market/depth?symbol={symbol}&limit=20',
             'method': 'GET'
         },
         'trades': {
-            'url': 'https://api.bitget.com/api/mix/v1/market/trades?symbol=BTCUSDT_UMCBL&limit=20',
+            'url': 'https://api.bitget.com/api/mix/v1/market/trades?symbol={symbol}&limit=20',
             'method': 'GET'
         }
     }
 }
 
+# Public WebSocket feeds for delivery-lag probing (see scripts/ws_probe.py)
+WS_ENDPOINTS = {
+    'okx': {
+        'url': 'wss://ws.okx.com:8443/ws/v5/public',
+        'channels': [
+            {'channel': 'tickers', 'instId': 'BTC-USDT'},
+            {'channel': 'books5', 'instId': 'BTC-USDT'},
+            {'channel': 'trades', 'instId': 'BTC-USDT'}
+        ]
+    },
+    'bitget': {
+        'url': 'wss://ws.bitget.com/mix/v1/stream',
+        'channels': [
+            {'instType': 'mc', 'channel': 'ticker', 'instId': 'BTCUSDT'},
+            {'instType': 'mc', 'channel': 'books5', 'instId': 'BTCUSDT'},
+            {'instType': 'mc', 'channel': 'trade', 'instId': 'BTCUSDT'}
+        ]
+    }
+}
+
+# Clock offset estimation against the exchanges' server time (see scripts/clock_offset.py)
+CLOCK_SYNC = {
+    'enabled': True,
+    'time_endpoints': {
+        'okx': 'https://www.okx.com/api/v5/public/time',
+        'bitget': 'https://api.bitget.com/api/spot/v1/public/time'
+    },
+    'rounds': 5,          # Time endpoint samples taken per sync
+    'interval': 30,       # Minimum seconds between syncs of one exchange
+    'max_samples': 1000,  # Samples kept per exchange for offset and drift estimation
+    'resolution_ms': 1.0, # Resolution of the server timestamps
+    'min_drift_span': 60, # Seconds of clock samples needed before drift is estimated
+    'offset_mode': 'estimate',  # 'estimate' (NTP-style) or 'system' to trust the local clock
+    'system_error_ms': 1.0,     # Local clock error bound used in 'system' mode
+    # Endpoints without a response timestamp whose data[0].ts (snapshot time) is used instead;
+    # it precedes the response, so their outbound leg is a lower and the return leg an upper bound
+    'data_timestamps': {'okx': ['market_data', 'book']},
+}
+
 # Settings for API requests
 API_SETTINGS = {
     'timeout': 10,        # Request timeout in seconds
-    'retry_count': 3,     # Number of retries for failed requests
+    'retry_count': 3,     # Number of retries for failed or throttled requests
+    'retry_backoff': 0.5, # Base retry delay in seconds, doubled per attempt with full jitter
+    'retry_backoff_max': 8.0,  # Cap of the retry delay in seconds
     'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
     'use_api_key': False, # Whether to use API keys for requests
+    # Per-exchange base URL overrides, e.g. {'okx': 'http://127.0.0.1:8765'};
+    # also read from the API_BASE_URLS environment variable (JSON) for worker processes
+    'base_urls': json.loads(os.environ.get('API_BASE_URLS') or '{}'),
+}
+
+# Published public rate limits per exchange endpoint (see scripts/rate_limit.py);
+# endpoints without an entry use the exchange's 'default' limit
+RATE_LIMITS = {
+    'enabled': True,
+    'safety_factor': 0.9,  # Share of the published limit actually used
+    'exchanges': {
+        'okx': {
+            'default': {'requests': 20, 'per': 2},
+            'book': {'requests': 40, 'per': 2},
+            'trades': {'requests': 100, 'per': 2},
+            'time': {'requests': 10, 'per': 2},
+            'throttle_codes': ['50011'],  # "Too Many Requests" in the response body
+        },
+        'bitget': {
+            'default': {'requests': 20, 'per': 1},
+            'throttle_codes': ['429'],
+        },
+    },
+}
+
+# Connection pool settings
+CONNECTION_POOL = {
+    'enabled': True,      # Reuse one pooled session per exchange instead of a new connection per request
+    'pool_size': 10,      # Maximum number of connections kept alive per host
+    'prewarm': True,      # Open connections before the first measured round
 }
 
 # Benchmark settings
@@ -64,18 +141,207 @@ BENCHMARK_SETTINGS = {
     }
 }
 
+# Adaptive sampling: sample each endpoint until the confidence interval of a
+# percentile is tight instead of a fixed number of rounds (see scripts/adaptive.py);
+# also switched on by the BENCHMARK_ADAPTIVE=1 environment variable (worker processes)
+ADAPTIVE = {
+    'enabled': os.environ.get('BENCHMARK_ADAPTIVE') == '1',
+    'percentile': 99,     # Percentile whose confidence interval must be tight
+    'confidence': 0.95,
+    'tolerance': 0.10,    # Target interval width relative to the percentile estimate
+    'min_samples': 30,    # Pilot samples per endpoint before the interval is checked
+    'max_samples': 2000,  # Most samples per endpoint
+    'batch': 20,          # Most requests per endpoint in one step of the async engine
+    'max_requests': 10000,  # Request budget of one async run across all endpoints
+    'max_time': 300,      # Time budget of one async run in seconds
+    'max_time_per_endpoint': 60,  # Time budget of one endpoint on the pytest path in seconds
+}
+
+# Startup budget of the probe CLI (see scripts/startup_latency.py)
+STARTUP = {
+    'import_budget_ms': 500,  # Interpreter start plus 'import scripts.probe'
+    'heavy_modules': ['pandas', 'matplotlib', 'pytest', 'numpy'],  # Never imported when probing
+}
+
+# Prometheus/OpenMetrics exporter (see scripts/exporter.py)
+EXPORTER = {
+    'host': '127.0.0.1',  # Bind address of the /metrics endpoint
+    'port': 9464,
+    'interval': 5.0,      # Seconds between probes of the same endpoint
+    'buckets_ms': [5, 10, 25, 50, 75, 100, 150, 200, 300, 500, 750, 1000, 2000, 5000],  # Histogram bucket bounds
+    'quantiles': [0.5, 0.9, 0.99],  # Summary quantiles since the exporter started
+    'record_samples': False,  # Also append every sample to the sample store
+}
+
+# Regression detection across benchmark history (see scripts/regression.py)
+REGRESSION = {
+    'baseline_runs': 10,  # Previous runs pooled as the baseline of the latest run
+    'alpha': 0.01,        # Significance level of the one-sided Mann-Whitney test
+    'min_effect': 0.05,   # Smallest relative increase (CI lower bound) that counts
+    'percentiles': [50, 99],  # Percentiles compared with bootstrap confidence intervals
+    'bootstrap_resamples': 1000,
+    'confidence': 0.95,
+    'change_point_threshold': 6.0,  # Minimum standardized level shift of a change point
+    'min_segment_runs': 5,  # Minimum runs on each side of a change point
+    'seed': 0,            # Bootstrap random seed, for reproducible results
+    'output': 'data/regression.json',  # Machine-readable diff
+    'cache': 'data/regression_cache.npz',  # Flat per-run latencies parsed from .benchmarks
+}
+
+# Latency histogram settings
+HISTOGRAM = {
+    'lowest_us': 1,               # Lowest discernible latency in microseconds
+    'highest_us': 60_000_000,     # Highest trackable latency in microseconds (60 s)
+    'significant_figures': 3,     # Decimal precision kept for each recorded latency
+    'percentiles': [50, 90, 99, 99.9],  # Percentiles shown in reports
+}
+
+# Local mock exchange server settings (see scripts/mock_exchange.py)
+MOCK_SERVER = {
+    'host': '127.0.0.1',
+    'port': 0,            # 0 picks a free port
+    'seed': None,         # Random seed for reproducible latency and errors
+    'latency': {
+        'distribution': 'lognormal',  # constant, uniform, normal or lognormal
+        'median_ms': 20.0,
+        'sigma': 0.3,     # lognormal shape
+        'stddev_ms': 5.0, # normal spread
+        'min_ms': 10.0,   # uniform bounds
+        'max_ms': 40.0,
+    },
+    'jitter_ms': 2.0,     # Uniform +/- jitter added to every response
+    'stall_probability': 0.0,  # Probability of an extra stall_ms delay
+    'stall_ms': 1000.0,
+    'error_rate': 0.0,    # Probability of an error response
+    'error_status': 503,
+    'throttle_rate': 0.0, # Probability of a 429 rate-limit response
+    'outbound_fraction': 0.5,  # Share of the delay spent before the server stamps the response
+    'workers': None,      # Requests served at once, the rest queue (None for unlimited)
+    'exchanges': {},      # Per-exchange overrides of the settings above
+    'log_requests': False,
+    # Mock mode (--mock): results are marked and kept apart from real exchange data;
+    # also switched on by the BENCHMARK_MOCK=1 environment variable (worker processes)
+    'enabled': os.environ.get('BENCHMARK_MOCK') == '1',
+    'benchmark_dir': '.benchmarks-mock',  # Run files, instead of .benchmarks
+    'store_dir': 'data/mock/store',  # Sample store, instead of DATA_STORAGE['store_dir']
+    'report_cache': 'data/mock/report_cache.json',
+    'report_file': 'benchmark_report_mock.html',  # HTML report, instead of benchmark_report_latest.html
+}
+
+# Response decoding settings (see scripts/decoders.py)
+DECODING = {
+    'backend': 'json',    # json (stdlib), orjson or msgspec (typed structs)
+    'payload_dir': 'data/payloads',  # Captured payloads replayed by decode_latency.py
+}
+
+# Client-side measurement floor calibration (see scripts/calibration.py)
+CALIBRATION = {
+    'enabled': True,      # Measure the client floor on loopback before each run
+    'rounds': 30,         # Loopback requests per endpoint
+}
+
+# WebSocket probe settings
+WS_SETTINGS = {
+    'duration': 60,       # Seconds to stay subscribed
+    'max_samples': 10000, # Most recent lag samples kept per channel (histograms keep everything)
+    'ping_interval': 20,  # Seconds between application-level "ping" heartbeats
+    'open_timeout': 10,   # Connection/handshake timeout in seconds
+    'reconnect_delay': 1.0,  # Seconds to wait before reconnecting
+    'max_reconnects': 10, # Give up after this many reconnects in one run
+    'gap_ms': 5000,       # Silence on a channel longer than this counts as a gap
+    'output_dir': 'data/ws',  # Where probe summaries are saved
+}
+
+# HTTP/1.1 vs HTTP/2 comparison (see scripts/h2_probe.py)
+H2_PROBE = {
+    'rounds': 20,         # Measured rounds; each round fetches all of an exchange's endpoints
+    'warmup_rounds': 1,   # Unmeasured rounds that open the connections
+    'protocols': ['http1-serial', 'http1', 'http2'],
+    'output_dir': 'data/h2',  # Where comparison summaries are saved
+}
+
+# Per-edge probing (see scripts/edges.py)
+EDGES = {
+    'rounds': 20,         # Samples per edge and endpoint
+    'rank_by': 'p50',     # Edge ranking: 'p50', 'p99' or 'mean'
+    'addresses': {},      # Host -> edge addresses, instead of resolving, e.g. {'www.okx.com': ['104.18.0.1']}
+    'output_dir': 'data/edges',  # Where ranked edges are saved
+    'mock_host': 'edges.mock.test',  # Host name of the --mock edges
+    'mock_edges': {'127.0.0.1': 1.0, '127.0.0.2': 1.5, '127.0.0.3': 2.5},  # Loopback edge -> latency factor
+}
+
+# Open-loop load test (see scripts/load_test.py)
+LOAD_TEST = {
+    'rates': [5, 10, 20, 50, 100, 200, 400],  # Target requests per second, one step each
+    'duration': 10,       # Seconds per step
+    'clients': 8,         # Concurrent clients, each on its own connection
+    'arrival': 'uniform', # Intended start times: 'uniform' or 'poisson'
+    'seed': 0,            # Random seed of Poisson arrivals
+    'knee_percentile': 99,  # Corrected percentile compared against the lowest rate
+    'knee_factor': 2.0,   # A step is past the knee once that percentile grows beyond this factor
+    'min_throughput_ratio': 0.9,  # ... or throughput falls below this share of the target
+    'max_error_rate': 0.01,  # ... or more requests than this share fail or are throttled
+    'stop_after_knee': True,  # Stop an endpoint at its first unsustainable step
+    'respect_rate_limits': True,  # Skip rates above RATE_LIMITS (off with --mock)
+    'mock_workers': 4,    # Requests the --mock server serves at once, the rest queue
+    'output_dir': 'data/load',  # Where results and curve charts are saved
+}
+
+# Synchronized cross-exchange sampling (see scripts/paired.py)
+PAIRED = {
+    'rounds': 100,        # Measured rounds; each round sends every shared endpoint once per exchange
+    'warmup_rounds': 2,   # Unmeasured rounds that open the connections
+    'confidence': 0.95,   # Confidence level of the difference intervals
+    'resamples': 2000,    # Bootstrap resamples
+    'seed': 0,            # Random seed of the bootstrap
+    'mock_factors': {'bitget': 1.2},  # Exchange -> latency factor of its --mock server
+    'output_dir': 'data/paired',  # Where paired summaries are saved
+}
+
+# Parallel pytest runner settings (see scripts/runner.py)
+RUNNER = {
+    'workers': None,      # Worker processes, None for one per group
+    'group_by': 'exchange',  # 'exchange' or 'endpoint': unit of work given to a worker
+}
+
+# Asyncio probe engine settings
+ASYNC_PROBE = {
+    'rounds': 5,          # Samples taken per endpoint
+    'concurrency': 4,     # Default maximum in-flight requests per exchange
+    'exchange_concurrency': {},  # Per-exchange overrides, e.g. {'okx': 8}
+}
+
 # Data storage settings
 DATA_STORAGE = {
     'max_entries': 1000,  # Maximum number of data points to keep per exchange
     'output_dir': 'docs',  # Directory to store benchmark data
+    'store_dir': 'data/store',  # Directory of the append-only columnar sample store
+    'record_samples': True,  # Append every benchmark sample to the sample store
+    'report_cache': 'data/report_cache.json',  # Parsed-result cache used by the HTML report
     'chart_width': 12,    # Width of charts in inches
     'chart_height': 7,    # Height of charts in inches
     'dpi': 300           # DPI for saved charts
 }
 
+# Retention of latency history (see scripts/retention.py)
+RETENTION = {
+    'raw_days': 7,        # Keep raw samples this long, then compact them into minute aggregates
+    'minute_days': 30,    # Keep minute aggregates this long, then compact them into hour aggregates
+    'hour_days': 365,     # Keep hour aggregates this long (None to keep them forever)
+    'aggregate_dir': 'data/aggregates',  # Directory of the minute and hour aggregates
+    'benchmark_runs': 1000,  # Newest pytest-benchmark run files kept per machine in .benchmarks/
+    'keep_files': 50,     # Newest timestamped CSV/chart/result files kept per series and extension
+    'result_dirs': ['data/ws', 'data/h2', 'data/edges', 'data/load', 'data/paired'],  # Timestamped probe results to prune
+}
+
 # Reporting settings
 REPORTING = {
     'chart_width': 12,
     'chart_height': 7,
     'dpi': 300,
+    'window_days': None,  # Only chart the most recent days of samples (None for all)
+    'pixels_per_bucket': 4,  # Chart width in pixels per min/max downsampling bucket
+    'chart_format': os.environ.get('CHART_FORMAT', 'png'),  # 'png', 'svg' or 'json' (data for client-side charts)
+    'chart_workers': None,  # Chart rendering processes (None for the CPU count)
+    'chart_cache': 'data/chart_cache.json',  # Input hash of every rendered chart, unchanged charts are skipped
 } 
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""
+Payload Decode Benchmark Module
+
+This module provides pytest-benchmark functions for the time it takes
+to decode order book and trades payloads of growing depth with every
+decoder backend. It runs offline: payloads are replayed from captures
+in DECODING['payload_dir'] (<exchange>_<endpoint>_<depth>.json) when
+present, and built from the mock exchange payloads otherwise.
+"""
+import json
+import os
+import random
+
+import pytest
+
+from .config import DECODING
+from .decoders import BACKENDS, get_decoder
+from .mock_exchange import okx_books, okx_trades, bitget_depth, bitget_trades
+
+# (exchange, endpoint) -> (payload builder, depth query parameter, depths)
+PAYLOADS = {
+    ('okx', 'book'): (okx_books, 'sz', [5, 50, 200, 400]),
+    ('okx', 'trades'): (okx_trades, 'limit', [10, 100, 500]),
+    ('bitget', 'book'): (bitget_depth, 'limit', [5, 20, 100]),
+    ('bitget', 'trades'): (bitget_trades, 'limit', [10, 50, 100]),
+}
+
+CASES = [
+    (exchange, endpoint_key, depth)
+    for (exchange, endpoint_key), (_, _, depths) in PAYLOADS.items()
+    for depth in depths
+]
+
+
+def load_payload(exchange, endpoint_key, depth):
+    """
+    Get the raw body of a payload, captured if available, synthetic otherwise
+
+    Args:
+        exchange (str): Exchange identifier
+        endpoint_key (str): Endpoint key
+        depth (int): Book depth or number of trades
+
+    Returns:
+        bytes: JSON body
+    """
+    capture = os.path.join(DECODING.get('payload_dir', 'data/payloads'), f"{exchange}_{endpoint_key}_{depth}.json")
+    if os.path.exists(capture):
+        with open(capture, 'rb') as f:
+            return f.read()
+    builder, parameter, _ = PAYLOADS[(exchange, endpoint_key)]
+    payload = builder({parameter: depth}, random.Random(depth))
+    return json.dumps(payload, separators=(',', ':')).encode()
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("exchange,endpoint_key,depth", CASES)
+@pytest.mark.benchmark(
+    min_time=0.1,
+    max_time=0.5,
+    min_rounds=5,
+    disable_gc=True,
+    warmup=True
+)
+def test_decode_benchmark(benchmark, exchange, endpoint_key, depth, backend):
+    """Benchmark decoding one payload with one backend"""
+    try:
+        decoder = get_decoder(exchange, endpoint_key, backend)
+    except ImportError as e:
+        pytest.skip(str(e))
+
+    content = load_payload(exchange, endpoint_key, depth)
+    benchmark.group = f"decode-{exchange}-{endpoint_key}-{depth}"
+    benchmark.extra_info['bytes'] = len(content)
+
+    payload = benchmark(decoder, content)
+    assert payload is not None
+
+
+def run_all_benchmarks():
+    """Run the decode benchmarks"""
+    print("\n=== Running Payload Decode Benchmarks ===")
+    pytest.main(["-v", __file__, "--benchmark-save=decode"])
+
+
+if __name__ == "__main__":
+    run_all_benchmarks()
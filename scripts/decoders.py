@@ -0,0 +1,177 @@
+"""
+Pluggable JSON decoders for API responses
+
+This module decodes response bodies with the backend selected in
+DECODING['backend']:
+
+- json: the standard library decoder (what response.json() uses)
+- orjson: orjson.loads, returning plain dicts and lists
+- msgspec: msgspec with typed structs for the order book and trades
+  payloads, so only the declared fields are decoded and validated;
+  other payloads are decoded untyped
+
+orjson and msgspec are optional and imported on first use. Decode time
+is measured separately from network time (see probe_endpoint).
+"""
+import json
+import time
+from typing import List, Optional
+
+from .config import DECODING
+
+BACKENDS = ('json', 'orjson', 'msgspec')
+
+_decoders = {}
+_msgspec_types = None
+
+
+def _import_backend(name):
+    try:
+        return __import__(name)
+    except ImportError:
+        raise ImportError(
+            f"Decoder backend '{name}' requires the '{name}' package: pip install {name}"
+        ) from None
+
+
+def msgspec_types():
+    """
+    Typed payload structs for the msgspec backend, by (exchange, endpoint)
+
+    Returns:
+        dict: (exchange, endpoint_key) to msgspec.Struct type
+    """
+    global _msgspec_types
+    if _msgspec_types is not None:
+        return _msgspec_types
+    msgspec = _import_backend('msgspec')
+
+    class OkxBook(msgspec.Struct):
+        asks: List[List[str]]
+        bids: List[List[str]]
+        ts: str
+
+    class OkxBookResponse(msgspec.Struct):
+        code: str
+        data: List[OkxBook]
+        msg: str = ""
+
+    class OkxTrade(msgspec.Struct):
+        instId: str
+        side: str
+        sz: str
+        px: str
+        tradeId: str
+        ts: str
+
+    class OkxTradesResponse(msgspec.Struct):
+        code: str
+        data: List[OkxTrade]
+        msg: str = ""
+
+    class BitgetBook(msgspec.Struct):
+        asks: List[List[str]]
+        bids: List[List[str]]
+        timestamp: str
+
+    class BitgetBookResponse(msgspec.Struct):
+        code: str
+        data: BitgetBook
+        msg: str = ""
+        requestTime: Optional[int] = None
+
+    class BitgetTrade(msgspec.Struct):
+        tradeId: str
+        price: str
+        size: str
+        side: str
+        timestamp: str
+        symbol: str
+
+    class BitgetTradesResponse(msgspec.Struct):
+        code: str
+        data: List[BitgetTrade]
+        msg: str = ""
+        requestTime: Optional[int] = None
+
+    _msgspec_types = {
+        ('okx', 'book'): OkxBookResponse,
+        ('okx', 'trades'): OkxTradesResponse,
+        ('bitget', 'book'): BitgetBookResponse,
+        ('bitget', 'trades'): BitgetTradesResponse,
+    }
+    return _msgspec_types
+
+
+def get_decoder(exchange=None, endpoint_key=None, backend=None):
+    """
+    Get the decode function of a backend
+
+    Args:
+        exchange (str, optional): Exchange identifier, selects a typed struct
+        endpoint_key (str, optional): Endpoint key, selects a typed struct
+        backend (str, optional): Backend name, defaults to DECODING['backend']
+
+    Returns:
+        callable: Function decoding bytes to a payload
+    """
+    backend = backend or DECODING.get('backend', 'json')
+    key = (backend, exchange, endpoint_key)
+    if key in _decoders:
+        return _decoders[key]
+
+    if backend == 'json':
+        decoder = json.loads
+    elif backend == 'orjson':
+        decoder = _import_backend('orjson').loads
+    elif backend == 'msgspec':
+        msgspec = _import_backend('msgspec')
+        payload_type = msgspec_types().get((exchange, endpoint_key))
+        untyped = msgspec.json.Decoder()
+        typed = msgspec.json.Decoder(payload_type) if payload_type is not None else None
+
+        def decoder(content):
+            try:
+                if typed is not None:
+                    try:
+                        return typed.decode(content)
+                    except msgspec.ValidationError:
+                        # Payload does not match the struct (e.g. an error response)
+                        pass
+                return untyped.decode(content)
+            except msgspec.DecodeError as e:
+                raise ValueError(str(e)) from e
+    else:
+        raise ValueError(f"Unknown decoder backend '{backend}', valid options are: {', '.join(BACKENDS)}")
+
+    _decoders[key] = decoder
+    return decoder
+
+
+def decode_payload(content, exchange=None, endpoint_key=None, backend=None):
+    """
+    Decode a response body and time the decode
+
+    Args:
+        content (bytes): Response body
+        exchange (str, optional): Exchange identifier
+        endpoint_key (str, optional): Endpoint key
+        backend (str, optional): Backend name, defaults to DECODING['backend']
+
+    Returns:
+        tuple: (payload, decode time in ms)
+
+    Raises:
+        ValueError: If the body is not valid JSON
+    """
+    decoder = get_decoder(exchange, endpoint_key, backend)
+    start = time.perf_counter()
+    payload = decoder(content)
+    return payload, (time.perf_counter() - start) * 1000
+
+
+def get_field(payload, name, default=None):
+    """Read a top-level field of a decoded payload, dict or typed struct"""
+    if isinstance(payload, dict):
+        return payload.get(name, default)
+    return getattr(payload, name, default)
@@ -0,0 +1,248 @@
+"""
+Spike-preserving downsampling for long latency charts
+
+This module reduces arbitrarily long latency series to a fixed number of
+time buckets for plotting. Every bucket keeps both its minimum and its
+maximum, so short spikes survive no matter how much data falls into one
+pixel column.
+
+For long histories a pyramid of precomputed rollups (count, sum, min,
+max per bucket, doubling the bucket width at every level) is kept per
+sample store series and cached on disk; each report only rolls up the
+rows appended since the last one. Drawing a window then starts from the
+coarsest rollup level that is still finer than one output bucket, so
+the cost of a redraw depends on the chart width rather than on the
+length of the window.
+"""
+import os
+
+import numpy as np
+
+ROLLUP_BASE_SECONDS = 60   # Bucket width of rollup level 0
+ROLLUP_LEVELS = 12         # Level k has buckets of 60 s * 2**k (up to ~34 days)
+
+
+def _reduce_buckets(bucket_ids, mins, maxs, sums, counts):
+    # Aggregate consecutive rows sharing a bucket id (ids must be sorted)
+    starts = np.flatnonzero(np.r_[True, bucket_ids[1:] != bucket_ids[:-1]])
+    return (
+        bucket_ids[starts],
+        np.minimum.reduceat(mins, starts),
+        np.maximum.reduceat(maxs, starts),
+        np.add.reduceat(sums, starts),
+        np.add.reduceat(counts, starts),
+    )
+
+
+def build_rollups(timestamps, values, base_seconds=ROLLUP_BASE_SECONDS, levels=ROLLUP_LEVELS):
+    """
+    Build the rollup pyramid of a series
+
+    Args:
+        timestamps (array): Sorted Unix timestamps in seconds
+        values (array): Latencies in ms
+        base_seconds (int): Bucket width of level 0
+        levels (int): Number of levels
+
+    Returns:
+        dict: Arrays named L<k>_bucket, L<k>_min, L<k>_max, L<k>_sum and
+        L<k>_count for every level, plus 'base_seconds'
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    rollups = {'base_seconds': np.array(base_seconds)}
+    if not len(values):
+        return rollups
+
+    level = _reduce_buckets(
+        np.floor(timestamps / base_seconds).astype(np.int64),
+        values, values, values, np.ones(len(values), dtype=np.int64)
+    )
+    for k in range(levels):
+        for name, array in zip(('bucket', 'min', 'max', 'sum', 'count'), level):
+            rollups[f'L{k}_{name}'] = array
+        # Halve the resolution for the next level
+        level = _reduce_buckets(level[0] >> 1, *level[1:])
+    return rollups
+
+
+def extend_rollups(rollups, timestamps, values):
+    """
+    Extend a rollup pyramid with samples newer than the ones it holds
+
+    The last bucket of every level may still be open, so it is merged
+    with the first new bucket when they coincide. The cost depends on the
+    new samples and the size of the pyramid, not on the history.
+
+    Args:
+        rollups (dict): Rollups from build_rollups, empty to start a new pyramid
+        timestamps (array): Sorted Unix timestamps in seconds, none older
+            than the samples already rolled up
+        values (array): Latencies in ms
+
+    Returns:
+        dict: Extended rollups
+    """
+    if 'L0_bucket' not in rollups:
+        base_seconds = int(rollups['base_seconds']) if 'base_seconds' in rollups else ROLLUP_BASE_SECONDS
+        return build_rollups(timestamps, values, base_seconds)
+    if not len(values):
+        return rollups
+
+    new = build_rollups(timestamps, values, int(rollups['base_seconds']))
+    extended = {'base_seconds': rollups['base_seconds']}
+    k = 0
+    while f'L{k}_bucket' in rollups:
+        old = [rollups[f'L{k}_{name}'] for name in ('bucket', 'min', 'max', 'sum', 'count')]
+        tail = [new[f'L{k}_{name}'] for name in ('bucket', 'min', 'max', 'sum', 'count')]
+        if len(old[0]) and old[0][-1] == tail[0][0]:
+            # Close the open bucket with the first new one
+            merged = _reduce_buckets(*(np.r_[o[-1:], t[:1]] for o, t in zip(old, tail)))
+            old = [o[:-1] for o in old]
+            tail = [np.r_[m, t[1:]] for m, t in zip(merged, tail)]
+        for name, o, t in zip(('bucket', 'min', 'max', 'sum', 'count'), old, tail):
+            extended[f'L{k}_{name}'] = np.concatenate([o, t])
+        k += 1
+    return extended
+
+
+def load_series_rollups(exchange, endpoint, cache_dir, store_dir=None):
+    """
+    Load the rollups of a sample store series, extending the cached ones
+
+    The cache records how many store rows it covers. Rows appended since
+    are rolled up and added; the pyramid is only rebuilt from scratch when
+    stored rows were rewritten (see sample_store.series_generation).
+    Failed and throttled requests are left out.
+
+    Args:
+        exchange (str): Exchange identifier
+        endpoint (str): Endpoint key
+        cache_dir (str): Directory of the .npz caches (<exchange>/<endpoint>.npz)
+        store_dir (str, optional): Sample store root directory
+
+    Returns:
+        dict: Rollups as returned by build_rollups
+    """
+    from .sample_store import series_length, series_generation, read_samples, FLAG_ERROR, FLAG_THROTTLED
+
+    rows = series_length(exchange, endpoint, store_dir)
+    generation = series_generation(exchange, endpoint, store_dir)
+    series = read_samples(exchange, endpoint, columns=['timestamp', 'latency', 'flags'], store_dir=store_dir)
+    first = float(series['timestamp'][0]) if rows else 0.0
+
+    cache_file = os.path.join(cache_dir, exchange, f'{endpoint}.npz')
+    rollups, covered = {}, 0
+    if os.path.exists(cache_file):
+        try:
+            with np.load(cache_file) as cached:
+                if (int(cached['generation']) == generation and int(cached['rows']) <= rows
+                        and float(cached['first_timestamp']) == first):
+                    covered = int(cached['rows'])
+                    rollups = {name: cached[name] for name in cached.files
+                               if name not in ('generation', 'rows', 'first_timestamp')}
+        except (OSError, ValueError, KeyError):
+            pass
+    if covered == rows and rollups:
+        return rollups
+
+    ok = (series['flags'][covered:] & (FLAG_ERROR | FLAG_THROTTLED)) == 0
+    rollups = extend_rollups(rollups, series['timestamp'][covered:][ok], series['latency'][covered:][ok])
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    with open(cache_file + '.tmp', 'wb') as f:
+        np.savez(f, generation=np.array(generation), rows=np.array(rows),
+                 first_timestamp=np.array(first), **rollups)
+    os.replace(cache_file + '.tmp', cache_file)
+    return rollups
+
+
+def minmax_buckets(timestamps, mins, maxs, n_buckets, start, end):
+    """
+    Reduce a series to at most n_buckets equal-width time buckets
+
+    Args:
+        timestamps (array): Sorted Unix timestamps in seconds
+        mins (array): Per-point minimum (the value itself for raw samples)
+        maxs (array): Per-point maximum (the value itself for raw samples)
+        n_buckets (int): Number of output buckets
+        start (float): Window start
+        end (float): Window end
+
+    Returns:
+        tuple: (x, y) arrays with the minimum and maximum of every
+        non-empty bucket, both placed at the bucket centre
+    """
+    width = max((end - start) / n_buckets, 1e-9)
+    bucket_ids = np.minimum(((timestamps - start) / width).astype(np.int64), n_buckets - 1)
+    ids, bucket_mins, bucket_maxs, _, _ = _reduce_buckets(
+        bucket_ids, mins, maxs, np.zeros(len(mins)), np.zeros(len(mins), dtype=np.int64)
+    )
+    centres = start + (ids + 0.5) * width
+    x = np.repeat(centres, 2)
+    y = np.empty(2 * len(ids))
+    y[0::2] = bucket_mins
+    y[1::2] = bucket_maxs
+    return x, y
+
+
+def downsample_series(timestamps, values, n_buckets, rollups=None, start=None, end=None):
+    """
+    Downsample a series for plotting while preserving spikes
+
+    Series that already fit in n_buckets are returned unchanged.
+
+    Args:
+        timestamps (array): Sorted Unix timestamps in seconds
+        values (array): Latencies in ms
+        n_buckets (int): Number of time buckets (roughly the plot width in pixels)
+        rollups (dict, optional): Precomputed rollups from build_rollups or
+            load_series_rollups, or a list of them (one per series)
+        start (float, optional): Window start, defaults to the first timestamp
+        end (float, optional): Window end, defaults to the last timestamp
+
+    Returns:
+        tuple: (x, y, downsampled) where downsampled tells whether the
+        series was reduced
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    if start is None:
+        start = timestamps[0] if len(timestamps) else 0.0
+    if end is None:
+        end = timestamps[-1] if len(timestamps) else 0.0
+
+    lo = np.searchsorted(timestamps, start, side='left')
+    hi = np.searchsorted(timestamps, end, side='right')
+    timestamps, values = timestamps[lo:hi], values[lo:hi]
+    if len(values) <= 2 * n_buckets:
+        return timestamps, values, False
+
+    # Start from the coarsest rollup level still finer than one output bucket
+    pyramids = [rollups] if isinstance(rollups, dict) else list(rollups or [])
+    pyramids = [pyramid for pyramid in pyramids if 'L0_bucket' in pyramid]
+    if pyramids:
+        base_seconds = float(pyramids[0]['base_seconds'])
+        target_width = (end - start) / n_buckets
+        level = None
+        k = 0
+        while all(f'L{k}_bucket' in pyramid for pyramid in pyramids) and base_seconds * 2 ** k <= target_width:
+            level = k
+            k += 1
+        if level is not None:
+            width = base_seconds * 2 ** level
+            centres, mins, maxs = [], [], []
+            for pyramid in pyramids:
+                buckets = pyramid[f'L{level}_bucket']
+                first = np.searchsorted(buckets, int(np.floor(start / width)), side='left')
+                last = np.searchsorted(buckets, int(np.floor(end / width)), side='right')
+                centres.append(np.clip(buckets[first:last] * width + width / 2, start, end))
+                mins.append(pyramid[f'L{level}_min'][first:last])
+                maxs.append(pyramid[f'L{level}_max'][first:last])
+            centres = np.concatenate(centres)
+            order = np.argsort(centres, kind='stable')
+            x, y = minmax_buckets(centres[order], np.concatenate(mins)[order], np.concatenate(maxs)[order],
+                                  n_buckets, start, end)
+            return x, y, True
+
+    x, y = minmax_buckets(timestamps, values, values, n_buckets, start, end)
+    return x, y, True
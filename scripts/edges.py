@@ -0,0 +1,327 @@
+"""
+Per-edge latency probing and fastest-edge selection
+
+Exchange hosts such as www.okx.com and api.bitget.com resolve to several
+CDN edge addresses, and a normal run measures whichever edge the
+resolver returns, mixing edges from sample to sample. This module
+resolves every address of each host used by an exchange's ENDPOINTS,
+probes each edge through its own session pinned to that address (the
+URL, SNI and Host header keep the real host name; only the TCP peer
+changes) and keeps a latency distribution per edge.
+
+Edges are probed round-robin, in a rotating order, so slow periods hit
+all edges alike. The result is a table per host ranked by
+EDGES['rank_by'], and the best edge of each host as hosts-file lines
+that can be pinned on trading hosts.
+
+    python -m scripts.edges [exchange|all] [--rounds N] [--mock] [--json]
+
+With --mock, loopback addresses (EDGES['mock_edges']) stand in for the
+edges of one host name, each served by its own mock exchange with a
+different latency.
+"""
+import copy
+import json
+import os
+import socket
+import statistics
+import sys
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from .config import ENDPOINTS, API_SETTINGS, EDGES
+from .benchmark_core import make_api_request
+from .session_pool import create_session, endpoint_url
+from .rate_limit import get_bucket, is_throttled
+from .histogram import LatencyHistogram
+
+
+def endpoint_hosts(exchange):
+    """
+    Group an exchange's endpoints by the host they are served from
+
+    Args:
+        exchange (str): Exchange identifier
+
+    Returns:
+        dict: (host, port) -> list of endpoint keys
+    """
+    hosts = {}
+    for endpoint_key in ENDPOINTS.get(exchange, {}):
+        parts = urlsplit(endpoint_url(exchange, endpoint_key))
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        hosts.setdefault((parts.hostname, port), []).append(endpoint_key)
+    return hosts
+
+
+def resolve_edges(host, port=443):
+    """
+    Resolve every edge address of a host
+
+    Args:
+        host (str): Host name
+        port (int): Port
+
+    Returns:
+        list: Unique IP addresses in resolver order; EDGES['addresses'][host]
+        when configured
+    """
+    override = EDGES.get('addresses', {}).get(host)
+    if override:
+        return list(override)
+    try:
+        infos = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+    except socket.gaierror as e:
+        print(f"Error: Failed to resolve {host}: {e}")
+        return []
+    return list(dict.fromkeys(info[4][0] for info in infos))
+
+
+def _timed_request(exchange, endpoint_key, session):
+    timestamp = time.time()
+    start = time.perf_counter()
+    success, response = make_api_request(exchange, endpoint_key, session=session)
+    latency = (time.perf_counter() - start) * 1000
+    if not success:
+        return None, str(response)
+    sample = {
+        'timestamp': timestamp,
+        'latency': latency,
+        'status': response.status_code,
+        'connection': getattr(response, 'connection_state', 'cold'),
+        'edge': getattr(response, 'peer_address', None),
+        'throttled': is_throttled(exchange, response),
+    }
+    sample.update(getattr(response, 'phase_timings', {}))
+    return sample, None
+
+
+def probe_edges(exchange, rounds=None):
+    """
+    Probe every edge of every host an exchange uses
+
+    Args:
+        exchange (str): Exchange identifier
+        rounds (int, optional): Samples per edge and endpoint, defaults to EDGES['rounds']
+
+    Returns:
+        list: Per-edge summaries (exchange, host, edge, samples, errors,
+        throttled, mean, p50, p99, connect and tls in ms)
+    """
+    rounds = rounds or EDGES.get('rounds', 20)
+    summaries = []
+    for (host, port), endpoint_keys in endpoint_hosts(exchange).items():
+        edges = resolve_edges(host, port)
+        sessions = {edge: create_session(pool_size=1, pinned_address=edge) for edge in edges}
+        results = {edge: {'latencies': [], 'errors': [], 'throttled': 0, 'handshake': None} for edge in edges}
+        try:
+            # The cold first request of each edge measures its TCP and TLS handshake
+            for edge, session in sessions.items():
+                sample, error = _timed_request(exchange, endpoint_keys[0], session)
+                if sample is not None:
+                    results[edge]['handshake'] = (sample['connect'], sample['tls'])
+                else:
+                    results[edge]['errors'].append(error)
+
+            for i in range(rounds):
+                order = edges[i % len(edges):] + edges[:i % len(edges)] if edges else []
+                for endpoint_key in endpoint_keys:
+                    bucket = get_bucket(exchange, endpoint_key)
+                    for edge in order:
+                        if bucket is not None:
+                            bucket.acquire()
+                        sample, error = _timed_request(exchange, endpoint_key, sessions[edge])
+                        result = results[edge]
+                        if sample is None:
+                            result['errors'].append(error)
+                        elif sample['throttled']:
+                            result['throttled'] += 1
+                        elif sample['status'] >= 400:
+                            result['errors'].append(f"HTTP {sample['status']}")
+                        else:
+                            result['latencies'].append(sample['latency'])
+        finally:
+            for session in sessions.values():
+                session.close()
+
+        for edge in edges:
+            result = results[edge]
+            latencies = result['latencies']
+            percentiles = LatencyHistogram.from_latencies(latencies).percentiles((50, 99)) if latencies else {}
+            summaries.append({
+                'exchange': exchange,
+                'host': host,
+                'edge': edge,
+                'samples': len(latencies),
+                'errors': len(result['errors']),
+                'throttled': result['throttled'],
+                'last_error': result['errors'][-1] if result['errors'] else None,
+                'mean': statistics.mean(latencies) if latencies else None,
+                'p50': percentiles.get(50),
+                'p99': percentiles.get(99),
+                'connect': result['handshake'][0] if result['handshake'] else None,
+                'tls': result['handshake'][1] if result['handshake'] else None,
+            })
+    return summaries
+
+
+def rank_edges(summaries, rank_by=None):
+    """
+    Rank the edges of each host, fastest first
+
+    Edges without a successful sample rank last.
+
+    Args:
+        summaries (list): Per-edge summaries from probe_edges
+        rank_by (str, optional): 'p50', 'p99' or 'mean', defaults to EDGES['rank_by']
+
+    Returns:
+        dict: Exchange -> host -> summaries sorted by rank, each with a 'rank' field
+    """
+    rank_by = rank_by or EDGES.get('rank_by', 'p50')
+    ranked = {}
+    for summary in summaries:
+        ranked.setdefault(summary['exchange'], {}).setdefault(summary['host'], []).append(summary)
+    for hosts in ranked.values():
+        for edges in hosts.values():
+            edges.sort(key=lambda s: (s[rank_by] is None, s[rank_by] or 0.0, s['errors']))
+            for rank, summary in enumerate(edges, 1):
+                summary['rank'] = rank
+    return ranked
+
+
+def best_edges(ranked):
+    """
+    Best edge of every host as hosts-file lines
+
+    Args:
+        ranked (dict): Output of rank_edges
+
+    Returns:
+        list: 'address host' lines for hosts with a working edge
+    """
+    best = {}
+    for hosts in ranked.values():
+        for host, edges in hosts.items():
+            if host not in best and edges and edges[0]['samples']:
+                best[host] = edges[0]['edge']
+    return [f"{edge} {host}" for host, edge in best.items()]
+
+
+def format_table(ranked):
+    """Format ranked edges as console lines"""
+    def ms(value):
+        return f"{value:>8.2f}" if value is not None else f"{'-':>8}"
+
+    lines = []
+    for exchange, hosts in ranked.items():
+        for host, edges in hosts.items():
+            lines.append(f"{exchange.upper()} {host}")
+            for summary in edges:
+                line = (f"  {summary['rank']:>2}. {summary['edge']:<40} {summary['samples']:>4} ok"
+                        f"  mean {ms(summary['mean'])} ms  p50 {ms(summary['p50'])} ms  p99 {ms(summary['p99'])} ms"
+                        f"  connect {ms(summary['connect'])} ms")
+                if summary['errors'] or summary['throttled']:
+                    line += f"  errors {summary['errors']}  throttled {summary['throttled']}"
+                lines.append(line)
+    return lines
+
+
+def save_edge_results(ranked, output_dir=None):
+    """
+    Save ranked edges to a timestamped JSON file
+
+    Args:
+        ranked (dict): Output of rank_edges
+        output_dir (str, optional): Directory, defaults to EDGES['output_dir']
+
+    Returns:
+        str: Path of the saved file
+    """
+    output_dir = output_dir or EDGES['output_dir']
+    os.makedirs(output_dir, exist_ok=True)
+    filename = os.path.join(output_dir, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_edges.json")
+    with open(filename, 'w') as f:
+        json.dump({'edges': ranked, 'best': best_edges(ranked)}, f, indent=2)
+    return filename
+
+
+def start_mock_edges(exchanges):
+    """
+    Serve one mock exchange per loopback address in EDGES['mock_edges']
+
+    All servers listen on the same port, and EDGES['mock_host'] resolves
+    to their addresses through EDGES['addresses'], like one host name
+    behind several CDN edges. Each edge scales the mock latency by its
+    factor in EDGES['mock_edges'].
+
+    Args:
+        exchanges (list): Exchanges to point at the mock edges
+
+    Returns:
+        list: Running servers; call shutdown() on each to stop them
+    """
+    from .mock_exchange import start_mock_server, MOCK_SERVER
+
+    servers = []
+    port = 0
+    for address, factor in EDGES['mock_edges'].items():
+        settings = copy.deepcopy(MOCK_SERVER)
+        for key in ('median_ms', 'min_ms', 'max_ms'):
+            settings['latency'][key] = settings['latency'].get(key, 0.0) * factor
+        server = start_mock_server(address, port, settings)
+        port = server.server_address[1]
+        servers.append(server)
+
+    host = EDGES['mock_host']
+    EDGES.setdefault('addresses', {})[host] = list(EDGES['mock_edges'])
+    for name in exchanges:
+        API_SETTINGS.setdefault('base_urls', {})[name] = f"http://{host}:{port}"
+    return servers
+
+
+def main():
+    """Command line entry point, returns 1 if a host has no working edge"""
+    args = sys.argv[1:]
+    options = {}
+    positional = []
+    i = 0
+    while i < len(args):
+        if args[i] in ('--mock', '--json'):
+            options[args[i][2:]] = True
+        elif args[i] == '--rounds' and i + 1 < len(args):
+            options['rounds'] = int(args[i + 1])
+            i += 1
+        else:
+            positional.append(args[i])
+        i += 1
+
+    exchange = positional[0].lower() if positional else 'all'
+    exchanges = list(ENDPOINTS) if exchange == 'all' else [exchange]
+    if any(name not in ENDPOINTS for name in exchanges):
+        print(f"Error: Invalid exchange '{exchange}'. Valid options are: {', '.join(ENDPOINTS)}, all")
+        return 1
+
+    servers = start_mock_edges(exchanges) if options.get('mock') else []
+    try:
+        summaries = [summary for name in exchanges for summary in probe_edges(name, options.get('rounds'))]
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+    ranked = rank_edges(summaries)
+    if options.get('json'):
+        print(json.dumps({'edges': ranked, 'best': best_edges(ranked)}, indent=2))
+    else:
+        print("\n".join(format_table(ranked)))
+        print("\nBest edges (hosts file):")
+        print("\n".join(best_edges(ranked)))
+        print(f"Results saved: {save_edge_results(ranked)}")
+    hosts = {host for exchange_hosts in ranked.values() for host in exchange_hosts}
+    return 1 if len(best_edges(ranked)) < len(hosts) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
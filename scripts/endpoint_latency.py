@@ -0,0 +1,53 @@
+"""
+Exchange API Latency Benchmark Module
+
+This module generates one pytest-benchmark test per exchange, endpoint
+and symbol from scripts/config.py: every endpoint in ENDPOINTS is probed
+with every symbol in EXCHANGES[exchange]['symbols'], and its response is
+checked with the exchange's declared validator. Adding a venue, endpoint
+or symbol only needs a config change.
+
+Per-exchange setup (pooled session, connection pre-warming, clock sync)
+is shared by all of an exchange's tests, and loopback calibration by all
+symbols of an endpoint, so setup cost grows with the number of exchanges
+and endpoints rather than with the number of tests.
+"""
+import pytest
+
+from .benchmark_core import benchmark_api_request, validate_response, case_id, iter_cases
+
+
+@pytest.mark.benchmark(
+    min_time=0.1,
+    max_time=0.5,
+    min_rounds=5,
+    disable_gc=True,
+    warmup=True
+)
+@pytest.mark.parametrize(
+    "exchange,endpoint_key,symbol",
+    [pytest.param(*case, id=case_id(*case)) for case in iter_cases()]
+)
+def test_endpoint_benchmark(benchmark, exchange, endpoint_key, symbol):
+    """Benchmark one exchange endpoint for one symbol"""
+    benchmark.group = exchange
+    success, result = benchmark_api_request(benchmark, exchange, endpoint_key, symbol)
+    assert success, f"{exchange.upper()} {endpoint_key} {symbol} API benchmark failed: {result}"
+
+    # Verify response data integrity
+    valid, error = validate_response(exchange, result['data'])
+    assert valid, f"API Error: {error}: {result['response'].text[:500]}"
+
+
+def run_all_benchmarks():
+    """
+    Run all generated benchmarks in one pytest session
+
+    scripts/runner.py runs subsets of them in parallel worker processes.
+    """
+    print("\n=== Running API Benchmarks ===")
+    pytest.main(["-v", __file__, "--benchmark-save=all"])
+
+
+if __name__ == "__main__":
+    run_all_benchmarks()
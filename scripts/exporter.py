@@ -0,0 +1,407 @@
+"""
+Prometheus/OpenMetrics exporter
+
+This module runs a long-lived probe loop over ENDPOINTS and serves the
+results on a local HTTP port for Prometheus to scrape:
+
+- cex_api_request_duration_seconds: histogram per exchange, endpoint and
+  phase (total, dns, connect, tls, ttfb, transfer), with the buckets in
+  EXPORTER['buckets_ms'], for histogram_quantile() over any window
+- cex_api_request_latency_seconds: summary with the EXPORTER['quantiles']
+  since the exporter started, from an HDR histogram (scripts/histogram.py)
+- cex_api_requests_total, cex_api_errors_total, cex_api_throttled_total:
+  counters per exchange and endpoint
+- cex_api_last_success_timestamp_seconds: gauge for staleness alerts
+
+Recording a sample costs a fixed number of O(1) bucket updates under a
+short lock. A scrape only copies the Prometheus bucket counts, sums and
+counts under that lock; the summary quantiles are read from each live
+HDR histogram under the series' own lock, without copying it, and the
+text is rendered outside both. Scrapes never wait on a request in
+flight and the probe loop never waits on a whole scrape. The Prometheus text format is
+served by default, OpenMetrics when the scraper asks for it.
+
+    python -m scripts.exporter [exchange|all] [--port N] [--mock]
+"""
+import bisect
+import math
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .config import ENDPOINTS, API_SETTINGS, EXPORTER, MOCK_SERVER
+from .benchmark_core import probe_endpoint, record_samples, series_name, iter_cases
+from .histogram import LatencyHistogram
+from .transport import PHASES
+
+PREFIX = 'cex_api'
+TEXT_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+OPENMETRICS_CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+
+class SeriesMetrics:
+    """
+    Latency metrics of one exchange, endpoint and phase
+
+    Args:
+        bounds (list): Histogram bucket upper bounds in ms, ascending
+    """
+    __slots__ = ('bounds', 'buckets', 'sum', 'count', 'histogram', 'lock')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)  # Non-cumulative; the last is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.histogram = LatencyHistogram()
+        self.lock = threading.Lock()  # Guards the HDR histogram only
+
+    def observe(self, latency_ms):
+        """Count a latency in ms in the buckets, sum and count (under the registry lock)"""
+        self.buckets[bisect.bisect_left(self.bounds, latency_ms)] += 1
+        self.sum += latency_ms
+        self.count += 1
+
+    def record(self, latency_ms):
+        """Record a latency in ms in the HDR histogram of the summary"""
+        with self.lock:
+            self.histogram.record(latency_ms)
+
+    def quantiles(self, quantiles):
+        """Summary quantiles from the live HDR histogram, see _quantiles"""
+        with self.lock:
+            return _quantiles(self.histogram, quantiles)
+
+    def snapshot(self):
+        """Copy of the buckets, sum and count for rendering; the HDR histogram is shared, not copied"""
+        copy = SeriesMetrics.__new__(SeriesMetrics)
+        copy.bounds = self.bounds
+        copy.buckets = list(self.buckets)
+        copy.sum = self.sum
+        copy.count = self.count
+        copy.histogram = self.histogram
+        copy.lock = self.lock
+        return copy
+
+
+def _quantiles(histogram, quantiles):
+    # All quantiles of an HDR histogram in one vectorized pass over its counts
+    import numpy as np
+
+    if not histogram.total_count:
+        return {q: math.nan for q in quantiles}
+    cumulative = np.cumsum(np.frombuffer(histogram.counts, dtype=np.uint64))
+    values = {}
+    for q in quantiles:
+        target = max(1, math.ceil(q * histogram.total_count))
+        index = int(np.searchsorted(cumulative, target))
+        lowest, size = histogram._value_range(index)
+        value = min(max(lowest + size - 1, histogram.min_value), histogram.max_value)
+        values[q] = value / 1000
+    return values
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _number(value):
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of the exported metrics
+
+    Args:
+        buckets_ms (list, optional): Histogram bucket bounds, defaults to EXPORTER['buckets_ms']
+        quantiles (list, optional): Summary quantiles, defaults to EXPORTER['quantiles']
+    """
+
+    COUNTERS = {
+        'requests': "Probe requests, including retries and failures",
+        'errors': "Failed probes: connection errors, exhausted retries and error statuses",
+        'throttled': "Responses rejected by the exchange's rate limit",
+    }
+
+    def __init__(self, buckets_ms=None, quantiles=None):
+        self.bounds = sorted(buckets_ms or EXPORTER.get('buckets_ms'))
+        self.quantiles = list(quantiles or EXPORTER.get('quantiles', [0.5, 0.9, 0.99]))
+        self._lock = threading.Lock()
+        self._latency = {}
+        self._counters = {name: {} for name in self.COUNTERS}
+        self._last_success = {}
+
+    def _count(self, name, key, amount=1):
+        counters = self._counters[name]
+        counters[key] = counters.get(key, 0) + amount
+
+    def observe(self, exchange, endpoint, sample=None, throttled=0, error=False):
+        """
+        Record the outcome of one probe
+
+        Args:
+            exchange (str): Exchange identifier
+            endpoint (str): Series name of the endpoint
+            sample (dict, optional): Latency sample of a successful probe
+            throttled (int): Throttled attempts of the probe
+            error (bool): Whether the probe failed
+        """
+        key = (exchange, endpoint)
+        recorded = []
+        with self._lock:
+            self._count('requests', key, 1 + (sample or {}).get('retries', 0))
+            if throttled:
+                self._count('throttled', key, throttled)
+            if error or sample is None:
+                self._count('errors', key)
+                return
+            self._last_success[key] = sample.get('timestamp', time.time())
+            for phase in ('total',) + PHASES:
+                value = sample['latency'] if phase == 'total' else sample.get(phase)
+                if value is None:
+                    continue
+                series = self._latency.get((exchange, endpoint, phase))
+                if series is None:
+                    series = self._latency[(exchange, endpoint, phase)] = SeriesMetrics(self.bounds)
+                series.observe(value)
+                recorded.append((series, value))
+        # The summary histograms have their own locks, so scrapes reading them never hold up the registry
+        for series, value in recorded:
+            series.record(value)
+
+    def snapshot(self):
+        """Consistent copy of the counters and buckets, taken under the lock (O(series), no histograms)"""
+        with self._lock:
+            return (
+                {key: series.snapshot() for key, series in self._latency.items()},
+                {name: dict(counters) for name, counters in self._counters.items()},
+                dict(self._last_success),
+            )
+
+    def render(self, openmetrics=False):
+        """
+        Render the metrics in the Prometheus text or OpenMetrics format
+
+        Args:
+            openmetrics (bool): Render OpenMetrics 1.0 instead of text 0.0.4
+
+        Returns:
+            str: Exposition text
+        """
+        latency, counters, last_success = self.snapshot()
+        lines = []
+
+        name = f"{PREFIX}_request_duration_seconds"
+        lines.append(f"# HELP {name} Request latency by phase.")
+        lines.append(f"# TYPE {name} histogram")
+        if openmetrics:
+            lines.append(f"# UNIT {name} seconds")
+        for (exchange, endpoint, phase), series in sorted(latency.items()):
+            cumulative = 0
+            for bound, count in zip(self.bounds + [math.inf], series.buckets):
+                cumulative += count
+                le = "+Inf" if math.isinf(bound) else _number(bound / 1000)
+                lines.append(f"{name}_bucket{_labels(exchange=exchange, endpoint=endpoint, phase=phase, le=le)} {cumulative}")
+            labels = _labels(exchange=exchange, endpoint=endpoint, phase=phase)
+            lines.append(f"{name}_sum{labels} {_number(series.sum / 1000)}")
+            lines.append(f"{name}_count{labels} {series.count}")
+
+        name = f"{PREFIX}_request_latency_seconds"
+        lines.append(f"# HELP {name} Request latency quantiles since the exporter started.")
+        lines.append(f"# TYPE {name} summary")
+        if openmetrics:
+            lines.append(f"# UNIT {name} seconds")
+        for (exchange, endpoint, phase), series in sorted(latency.items()):
+            for q, value in series.quantiles(self.quantiles).items():
+                lines.append(f"{name}{_labels(exchange=exchange, endpoint=endpoint, phase=phase, quantile=_number(q))} "
+                             f"{_number(value / 1000)}")
+            labels = _labels(exchange=exchange, endpoint=endpoint, phase=phase)
+            lines.append(f"{name}_sum{labels} {_number(series.sum / 1000)}")
+            lines.append(f"{name}_count{labels} {series.count}")
+
+        for counter, help_text in self.COUNTERS.items():
+            name = f"{PREFIX}_{counter}"
+            lines.append(f"# HELP {name if openmetrics else name + '_total'} {help_text}.")
+            lines.append(f"# TYPE {name if openmetrics else name + '_total'} counter")
+            for (exchange, endpoint), value in sorted(counters[counter].items()):
+                lines.append(f"{name}_total{_labels(exchange=exchange, endpoint=endpoint)} {value}")
+
+        name = f"{PREFIX}_last_success_timestamp_seconds"
+        lines.append(f"# HELP {name} Time of the last successful probe.")
+        lines.append(f"# TYPE {name} gauge")
+        for (exchange, endpoint), value in sorted(last_success.items()):
+            lines.append(f"{name}{_labels(exchange=exchange, endpoint=endpoint)} {_number(float(value))}")
+
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Request handler serving /metrics"""
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        openmetrics = 'application/openmetrics-text' in self.headers.get('Accept', '')
+        body = self.server.registry.render(openmetrics).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', OPENMETRICS_CONTENT_TYPE if openmetrics else TEXT_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the registry"""
+    daemon_threads = True
+
+    def __init__(self, address, registry):
+        self.registry = registry
+        super().__init__(address, MetricsHandler)
+
+
+def start_metrics_server(registry, host=None, port=None):
+    """
+    Serve a registry on a background thread
+
+    Args:
+        registry (MetricsRegistry): Metrics to serve
+        host (str, optional): Bind address, defaults to EXPORTER['host']
+        port (int, optional): Port, defaults to EXPORTER['port'] (0 picks a free port)
+
+    Returns:
+        MetricsServer: Running server; call shutdown() to stop it
+    """
+    host = host if host is not None else EXPORTER.get('host', '127.0.0.1')
+    port = port if port is not None else EXPORTER.get('port', 9464)
+    server = MetricsServer((host, port), registry)
+    thread = threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True)
+    thread.start()
+    return server
+
+
+def probe_loop(registry, cases, stop, interval=None):
+    """
+    Probe a list of endpoints round-robin until stopped
+
+    Every endpoint is probed about once per interval; rate limits and
+    retries are handled by probe_endpoint.
+
+    Args:
+        registry (MetricsRegistry): Where outcomes are recorded
+        cases (list): (exchange, endpoint_key, symbol) tuples
+        stop (threading.Event): Set to stop the loop
+        interval (float, optional): Seconds per endpoint, defaults to EXPORTER['interval']
+    """
+    interval = interval if interval is not None else EXPORTER.get('interval', 5.0)
+    record = EXPORTER.get('record_samples', False)
+    while not stop.is_set():
+        cycle_start = time.monotonic()
+        for exchange, endpoint_key, symbol in cases:
+            if stop.is_set():
+                return
+            throttled = []
+            failed = []
+            success, _, sample = probe_endpoint(exchange, endpoint_key, symbol, throttled=throttled, failed=failed)
+            name = series_name(exchange, endpoint_key, symbol)
+            error = not success or sample['status'] >= 400
+            registry.observe(exchange, name, sample if success else None, len(throttled), error)
+            if record:
+                record_samples(exchange, name, sorted(([sample] if success else []) + throttled + failed,
+                                                      key=lambda s: s['timestamp']))
+        stop.wait(max(0.0, interval - (time.monotonic() - cycle_start)))
+
+
+def run_exporter(exchanges=None, host=None, port=None, stop=None):
+    """
+    Probe the endpoints continuously and serve the metrics
+
+    One probe thread runs per exchange, so a slow venue does not delay
+    the others.
+
+    Args:
+        exchanges (list, optional): Exchange identifiers, defaults to all in ENDPOINTS
+        host (str, optional): Bind address
+        port (int, optional): Port
+        stop (threading.Event, optional): Set to stop; runs until interrupted otherwise
+
+    Returns:
+        MetricsRegistry: The registry, once stopped
+    """
+    exchanges = exchanges if exchanges is not None else list(ENDPOINTS)
+    stop = stop or threading.Event()
+    registry = MetricsRegistry()
+    server = start_metrics_server(registry, host, port)
+    print(f"Serving metrics at http://{server.server_address[0]}:{server.server_address[1]}/metrics")
+
+    threads = [
+        threading.Thread(target=probe_loop, args=(registry, list(iter_cases([exchange])), stop),
+                         name=f"probe-{exchange}", daemon=True)
+        for exchange in exchanges
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        while not stop.wait(1.0):
+            pass
+    except KeyboardInterrupt:
+        stop.set()
+    finally:
+        for thread in threads:
+            thread.join()
+        server.shutdown()
+        server.server_close()
+    return registry
+
+
+def main():
+    """Command line entry point"""
+    args = sys.argv[1:]
+    options = {}
+    positional = []
+    i = 0
+    while i < len(args):
+        if args[i] == '--mock':
+            options['mock'] = True
+        elif args[i] in ('--port', '--host') and i + 1 < len(args):
+            options[args[i][2:]] = args[i + 1]
+            i += 1
+        else:
+            positional.append(args[i])
+        i += 1
+
+    exchange = positional[0].lower() if positional else 'all'
+    exchanges = list(ENDPOINTS) if exchange == 'all' else [exchange]
+    if any(name not in ENDPOINTS for name in exchanges):
+        print(f"Error: Invalid exchange '{exchange}'. Valid options are: {', '.join(ENDPOINTS)}, all")
+        return 1
+
+    if options.get('mock'):
+        from .mock_exchange import start_mock_server
+        mock = start_mock_server()
+        MOCK_SERVER['enabled'] = True  # Record to the mock store, never the real one
+        for name in exchanges:
+            API_SETTINGS.setdefault('base_urls', {})[name] = mock.base_url
+        print(f"Using mock exchange at {mock.base_url}")
+
+    run_exporter(exchanges, options.get('host'), int(options['port']) if 'port' in options else None)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,351 @@
+"""
+HTTP/2 multiplexing probe and protocol comparison
+
+This module fetches all of an exchange's ENDPOINTS together, once per
+round, with each of the transports in H2_PROBE['protocols']:
+
+- http1-serial: one HTTP/1.1 keep-alive connection, one request after
+  the other (what a single requests.Session does)
+- http1: HTTP/1.1 requests in parallel, one connection per in-flight
+  request
+- http2: every request as a multiplexed stream over one HTTP/2
+  connection
+
+and reports per exchange and protocol the request latency (mean, p50,
+p99), the round latency (time until all endpoints have answered), the
+throughput in requests per second and the number of connections used.
+Connections are opened by H2_PROBE['warmup_rounds'] unmeasured rounds
+first, so the comparison is between warm transports.
+
+The protocols of an exchange take turns round by round, in a rotating
+order, so they see the same network conditions and share the rate limit
+evenly. Rate-limit tokens for a whole round are reserved, and waited
+for, before the round's clock starts: round latency and throughput
+measure the transport, not the token bucket.
+
+Requires the optional httpx package with HTTP/2 support
+(pip install .[http2]). Against the mock exchange (--mock) the HTTP/2
+runs use a local h2c stand-in (MockH2Server). Run with:
+
+    python -m scripts.h2_probe [exchange|all] [--rounds N] [--protocol P] [--mock] [--json]
+"""
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from contextlib import AsyncExitStack
+from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit
+
+from .config import ENDPOINTS, API_SETTINGS, CONNECTION_POOL, H2_PROBE
+from .session_pool import endpoint_url
+from .rate_limit import get_bucket
+from .histogram import LatencyHistogram
+
+PROTOCOLS = ('http1-serial', 'http1', 'http2')
+
+
+def import_httpx():
+    """Import the optional httpx package, with an informative error if missing"""
+    try:
+        import httpx
+        import h2  # noqa: F401  (httpx's HTTP/2 support)
+    except ImportError:
+        raise ImportError(
+            "HTTP/2 probing requires 'httpx' with HTTP/2 support: pip install .[http2]"
+        ) from None
+    return httpx
+
+
+def create_client(protocol):
+    """
+    Create the async client of a protocol
+
+    Args:
+        protocol (str): One of PROTOCOLS
+
+    Returns:
+        httpx.AsyncClient: Client; HTTP/2 clients speak HTTP/2 only, so
+        cleartext URLs use prior knowledge (h2c)
+    """
+    if protocol not in PROTOCOLS:
+        raise ValueError(f"Unknown protocol '{protocol}', expected one of {', '.join(PROTOCOLS)}")
+    httpx = import_httpx()
+    http2 = protocol == 'http2'
+    return httpx.AsyncClient(
+        http1=not http2,
+        http2=http2,
+        timeout=API_SETTINGS.get('timeout', 10),
+        limits=httpx.Limits(max_connections=1 if protocol != 'http1' else CONNECTION_POOL.get('pool_size', 10)),
+        headers={'User-Agent': API_SETTINGS['user_agent']} if API_SETTINGS.get('user_agent') else None,
+    )
+
+
+def _rebase(url, base_url):
+    # Point a URL at another server, keeping path and query (see session_pool.resolve_url)
+    base = urlsplit(base_url)
+    parts = urlsplit(url)
+    return urlunsplit((base.scheme, base.netloc, base.path.rstrip('/') + parts.path, parts.query, ''))
+
+
+def _reserve_round(exchange, urls):
+    # Take the rate-limit tokens of a whole round; returns the seconds until all are usable
+    waits = [bucket.reserve() for bucket in (get_bucket(exchange, key) for key, _ in urls) if bucket is not None]
+    return max(waits, default=0.0)
+
+
+async def _fetch(client, endpoint_key, url):
+    timestamp = time.time()
+    start = time.perf_counter()
+    try:
+        response = await client.get(url)
+    except Exception as e:
+        return {'endpoint': endpoint_key, 'error': f"{type(e).__name__}: {e}", 'timestamp': timestamp}
+    return {
+        'endpoint': endpoint_key,
+        'latency': (time.perf_counter() - start) * 1000,
+        'status': response.status_code,
+        'http_version': response.http_version,
+        'timestamp': timestamp,
+    }
+
+
+async def _round(client, exchange, urls, serial):
+    # Returns the results and the round latency in ms, not counting the rate-limit wait
+    await asyncio.sleep(_reserve_round(exchange, urls))
+    round_start = time.perf_counter()
+    if serial:
+        results = [await _fetch(client, key, url) for key, url in urls]
+    else:
+        results = await asyncio.gather(*(_fetch(client, key, url) for key, url in urls))
+    return list(results), (time.perf_counter() - round_start) * 1000
+
+
+def _connections(client):
+    # Connections currently held by the client's pool
+    pool = getattr(client, '_transport', None)
+    pool = getattr(pool, '_pool', None)
+    return len(getattr(pool, 'connections', []))
+
+
+async def probe_exchange(exchange, protocols, rounds=None, symbol=None, base_urls=None):
+    """
+    Fetch all endpoints of an exchange per round, the protocols taking turns
+
+    Every measured round runs each protocol once, starting one protocol
+    further along the list than the round before, so no protocol always
+    goes first or always inherits a drained rate-limit bucket.
+
+    Args:
+        exchange (str): Exchange identifier
+        protocols (list): Protocols from PROTOCOLS
+        rounds (int, optional): Measured rounds, defaults to H2_PROBE['rounds']
+        symbol (str, optional): Symbol, defaults to the exchange's first symbol
+        base_urls (dict, optional): Protocol -> base URL to send that
+            protocol's requests to instead, e.g. an HTTP/2-only server
+
+    Returns:
+        list: Summaries (see summarize_protocol) in protocol order
+    """
+    rounds = rounds or H2_PROBE.get('rounds', 20)
+    base_urls = base_urls or {}
+    urls = {}
+    for protocol in protocols:
+        urls[protocol] = [(key, endpoint_url(exchange, key, symbol)) for key in ENDPOINTS[exchange]]
+        if base_urls.get(protocol):
+            urls[protocol] = [(key, _rebase(url, base_urls[protocol])) for key, url in urls[protocol]]
+    samples = {protocol: [] for protocol in protocols}
+    round_latencies = {protocol: [] for protocol in protocols}
+
+    async with AsyncExitStack() as stack:
+        clients = {protocol: await stack.enter_async_context(create_client(protocol)) for protocol in protocols}
+        for _ in range(H2_PROBE.get('warmup_rounds', 1)):
+            for protocol in protocols:
+                await _round(clients[protocol], exchange, urls[protocol], protocol == 'http1-serial')
+
+        for i in range(rounds):
+            for protocol in protocols[i % len(protocols):] + protocols[:i % len(protocols)]:
+                results, latency = await _round(clients[protocol], exchange, urls[protocol],
+                                                protocol == 'http1-serial')
+                samples[protocol].extend(results)
+                round_latencies[protocol].append(latency)
+        connections = {protocol: _connections(client) for protocol, client in clients.items()}
+
+    return [summarize_protocol(exchange, protocol, samples[protocol], round_latencies[protocol],
+                               sum(round_latencies[protocol]) / 1000, connections[protocol])
+            for protocol in protocols]
+
+
+async def probe_protocol(exchange, protocol, rounds=None, symbol=None):
+    """
+    Fetch all endpoints of an exchange per round over one protocol
+
+    Args:
+        exchange (str): Exchange identifier
+        protocol (str): One of PROTOCOLS
+        rounds (int, optional): Measured rounds, defaults to H2_PROBE['rounds']
+        symbol (str, optional): Symbol, defaults to the exchange's first symbol
+
+    Returns:
+        dict: Summary with request and round latency, throughput, errors
+        and connections; 'samples' holds the raw per-request results
+    """
+    return (await probe_exchange(exchange, [protocol], rounds, symbol))[0]
+
+
+def summarize_protocol(exchange, protocol, samples, round_latencies, elapsed, connections=None):
+    """
+    Summarize the samples of one exchange and protocol
+
+    Args:
+        exchange (str): Exchange identifier
+        protocol (str): Protocol name
+        samples (list): Per-request results from probe_protocol
+        round_latencies (list): Round latencies in ms
+        elapsed (float): Measured time in seconds, excluding rate-limit waits
+        connections (int, optional): Connections held by the client at the end
+
+    Returns:
+        dict: Summary
+    """
+    ok = [s for s in samples if 'latency' in s and s['status'] < 400]
+    failed = [s for s in samples if 'latency' not in s or s['status'] >= 400]
+    latencies = [s['latency'] for s in ok]
+    percentiles = LatencyHistogram.from_latencies(latencies).percentiles((50, 99)) if latencies else {}
+    return {
+        'exchange': exchange,
+        'protocol': protocol,
+        'http_version': ok[0]['http_version'] if ok else None,
+        'requests': len(samples),
+        'errors': len(failed),
+        'last_error': (failed[-1].get('error') or f"HTTP {failed[-1]['status']}") if failed else None,
+        'mean': statistics.mean(latencies) if latencies else None,
+        'p50': percentiles.get(50),
+        'p99': percentiles.get(99),
+        'round_mean': statistics.mean(round_latencies) if round_latencies else None,
+        'throughput': len(ok) / elapsed if elapsed else 0.0,
+        'connections': connections,
+        'samples': samples,
+    }
+
+
+async def compare_protocols(exchanges=None, protocols=None, rounds=None, base_urls=None):
+    """
+    Run every protocol against every exchange
+
+    Exchanges run concurrently; the protocols of one exchange take turns
+    round by round (see probe_exchange) so they share its rate limit evenly.
+
+    Args:
+        exchanges (list, optional): Exchange identifiers, defaults to all in ENDPOINTS
+        protocols (list, optional): Protocols, defaults to H2_PROBE['protocols']
+        rounds (int, optional): Measured rounds per protocol
+        base_urls (dict, optional): Protocol -> base URL override
+
+    Returns:
+        list: Summaries, grouped by exchange in protocol order
+    """
+    exchanges = exchanges if exchanges is not None else list(ENDPOINTS)
+    protocols = list(protocols or H2_PROBE.get('protocols', list(PROTOCOLS)))
+
+    results = await asyncio.gather(*(probe_exchange(exchange, protocols, rounds, base_urls=base_urls)
+                                     for exchange in exchanges))
+    return [summary for summaries in results for summary in summaries]
+
+
+def format_summary(summary):
+    """Format a protocol summary as a console line"""
+    def ms(value):
+        return f"{value:>8.2f}" if value is not None else f"{'-':>8}"
+
+    line = (f"{summary['exchange'].upper():<8} {summary['protocol']:<13}"
+            f"  mean {ms(summary['mean'])} ms  p50 {ms(summary['p50'])} ms  p99 {ms(summary['p99'])} ms"
+            f"  round {ms(summary['round_mean'])} ms  {summary['throughput']:>8.1f} req/s"
+            f"  conns {summary['connections'] if summary['connections'] is not None else '-'}")
+    if summary['errors']:
+        line += f"  errors {summary['errors']}"
+    return line
+
+
+def save_h2_results(summaries, output_dir=None):
+    """
+    Save protocol summaries to a timestamped JSON file
+
+    Args:
+        summaries (list): Protocol summaries
+        output_dir (str, optional): Directory, defaults to H2_PROBE['output_dir']
+
+    Returns:
+        str: Path of the saved file
+    """
+    output_dir = output_dir or H2_PROBE['output_dir']
+    os.makedirs(output_dir, exist_ok=True)
+    filename = os.path.join(output_dir, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_protocols.json")
+    with open(filename, 'w') as f:
+        json.dump(summaries, f, indent=2)
+    return filename
+
+
+def main():
+    """Command line entry point"""
+    args = sys.argv[1:]
+    options = {'protocols': []}
+    positional = []
+    i = 0
+    while i < len(args):
+        if args[i] in ('--mock', '--json'):
+            options[args[i][2:]] = True
+        elif args[i] == '--rounds' and i + 1 < len(args):
+            options['rounds'] = int(args[i + 1])
+            i += 1
+        elif args[i] == '--protocol' and i + 1 < len(args):
+            options['protocols'].append(args[i + 1])
+            i += 1
+        else:
+            positional.append(args[i])
+        i += 1
+
+    exchange = positional[0].lower() if positional else 'all'
+    exchanges = list(ENDPOINTS) if exchange == 'all' else [exchange]
+    if any(name not in ENDPOINTS for name in exchanges):
+        print(f"Error: Invalid exchange '{exchange}'. Valid options are: {', '.join(ENDPOINTS)}, all")
+        return 1
+    unknown = [protocol for protocol in options['protocols'] if protocol not in PROTOCOLS]
+    if unknown:
+        print(f"Error: Invalid protocol '{unknown[0]}'. Valid options are: {', '.join(PROTOCOLS)}")
+        return 1
+
+    protocols = options['protocols'] or H2_PROBE.get('protocols', list(PROTOCOLS))
+    servers = []
+    try:
+        if options.get('mock'):
+            # The HTTP/1.1 and HTTP/2 stand-ins serve the same routes and latency model;
+            # HTTP/2 requests are sent to the server that speaks it
+            from .mock_exchange import start_mock_server, start_h2_mock_server
+            servers = [start_mock_server(), start_h2_mock_server()]
+            for name in exchanges:
+                API_SETTINGS.setdefault('base_urls', {})[name] = servers[0].base_url
+            summaries = asyncio.run(compare_protocols(exchanges, protocols, options.get('rounds'),
+                                                      base_urls={'http2': servers[1].base_url}))
+        else:
+            summaries = asyncio.run(compare_protocols(exchanges, protocols, options.get('rounds')))
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+    if options.get('json'):
+        print(json.dumps([{k: v for k, v in s.items() if k != 'samples'} for s in summaries], indent=2))
+    else:
+        for summary in summaries:
+            print(format_summary(summary))
+            if summary['errors'] and summary['last_error']:
+                print(f"  Error: {summary['last_error']}")
+        print(f"Results saved: {save_h2_results(summaries)}")
+    return 1 if any(summary['errors'] == summary['requests'] for summary in summaries) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
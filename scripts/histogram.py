@@ -0,0 +1,238 @@
+"""
+HDR-style latency histogram
+
+This module provides a fixed-memory, log-linear latency histogram in the
+style of HdrHistogram. Values are recorded in integer microseconds with
+a configurable number of significant figures, so every recorded value
+is kept within a bounded relative error no matter how many samples are
+recorded. Histograms with the same layout merge losslessly by adding
+their bucket counts, which makes them suitable for aggregating tail
+percentiles over many runs and machines.
+"""
+import math
+from array import array
+
+from .config import HISTOGRAM
+
+
+class LatencyHistogram:
+    """
+    Log-linear histogram of latencies
+
+    Args:
+        lowest (int): Lowest discernible value in microseconds
+        highest (int): Highest trackable value in microseconds; larger
+            values are clamped to it
+        significant_figures (int): Decimal precision kept for each value (1-5)
+    """
+
+    def __init__(self, lowest=None, highest=None, significant_figures=None):
+        self.lowest = int(lowest or HISTOGRAM['lowest_us'])
+        self.highest = int(highest or HISTOGRAM['highest_us'])
+        self.significant_figures = int(significant_figures or HISTOGRAM['significant_figures'])
+        if not 1 <= self.significant_figures <= 5:
+            raise ValueError("significant_figures must be between 1 and 5")
+        if self.lowest < 1 or self.highest < 2 * self.lowest:
+            raise ValueError("highest must be at least twice lowest, and lowest at least 1")
+
+        largest_single_unit = 2 * 10 ** self.significant_figures
+        self.unit_magnitude = int(math.floor(math.log2(self.lowest)))
+        self.sub_bucket_count_magnitude = int(math.ceil(math.log2(largest_single_unit)))
+        self.sub_bucket_half_count_magnitude = self.sub_bucket_count_magnitude - 1
+        self.sub_bucket_count = 1 << self.sub_bucket_count_magnitude
+        self.sub_bucket_half_count = self.sub_bucket_count // 2
+        self.sub_bucket_mask = (self.sub_bucket_count - 1) << self.unit_magnitude
+
+        smallest_untrackable = self.sub_bucket_count << self.unit_magnitude
+        self.bucket_count = 1
+        while smallest_untrackable <= self.highest:
+            smallest_untrackable <<= 1
+            self.bucket_count += 1
+
+        self.counts = array('Q', bytes(8 * (self.bucket_count + 1) * self.sub_bucket_half_count))
+        self.total_count = 0
+        self.min_value = None
+        self.max_value = None
+
+    @property
+    def layout(self):
+        """Tuple identifying the bucket layout; only equal layouts can merge"""
+        return (self.lowest, self.highest, self.significant_figures)
+
+    def _counts_index(self, value):
+        bucket_index = (value | self.sub_bucket_mask).bit_length() - self.unit_magnitude \
+            - self.sub_bucket_count_magnitude
+        sub_bucket_index = value >> (bucket_index + self.unit_magnitude)
+        return ((bucket_index + 1) << self.sub_bucket_half_count_magnitude) \
+            + (sub_bucket_index - self.sub_bucket_half_count)
+
+    def _value_range(self, index):
+        # Lowest value and size of the range of values counted at an index
+        bucket_index = (index >> self.sub_bucket_half_count_magnitude) - 1
+        sub_bucket_index = (index & (self.sub_bucket_half_count - 1)) + self.sub_bucket_half_count
+        if bucket_index < 0:
+            sub_bucket_index -= self.sub_bucket_half_count
+            bucket_index = 0
+        lowest = sub_bucket_index << (bucket_index + self.unit_magnitude)
+        return lowest, 1 << (bucket_index + self.unit_magnitude)
+
+    def record(self, latency_ms, count=1):
+        """
+        Record a latency
+
+        Args:
+            latency_ms (float): Latency in ms
+            count (int): Number of occurrences to record
+        """
+        value = min(max(int(round(latency_ms * 1000)), 0), self.highest)
+        self.counts[self._counts_index(value)] += count
+        self.total_count += count
+        self.min_value = value if self.min_value is None else min(self.min_value, value)
+        self.max_value = value if self.max_value is None else max(self.max_value, value)
+
+    def record_many(self, latencies_ms):
+        """
+        Record an array of latencies in one vectorized pass
+
+        Args:
+            latencies_ms (array-like): Latencies in ms
+        """
+        import numpy as np
+
+        values = np.clip(np.rint(np.asarray(latencies_ms, dtype=np.float64) * 1000), 0, self.highest)
+        values = values.astype(np.int64)
+        if not len(values):
+            return
+
+        # Integer bit length via the float exponent (exact below 2**53)
+        bit_length = np.frexp((values | self.sub_bucket_mask).astype(np.float64))[1]
+        bucket_index = bit_length - self.unit_magnitude - self.sub_bucket_count_magnitude
+        sub_bucket_index = values >> (bucket_index + self.unit_magnitude)
+        indices = ((bucket_index + 1) << self.sub_bucket_half_count_magnitude) \
+            + (sub_bucket_index - self.sub_bucket_half_count)
+
+        counts = np.frombuffer(self.counts, dtype=np.uint64)
+        counts += np.bincount(indices, minlength=len(counts)).astype(np.uint64)
+        self.total_count += len(values)
+        low, high = int(values.min()), int(values.max())
+        self.min_value = low if self.min_value is None else min(self.min_value, low)
+        self.max_value = high if self.max_value is None else max(self.max_value, high)
+
+    def merge(self, other):
+        """
+        Add another histogram's counts to this one
+
+        Args:
+            other (LatencyHistogram): Histogram with the same layout
+
+        Returns:
+            LatencyHistogram: self
+        """
+        if other.layout != self.layout:
+            raise ValueError(f"Cannot merge histogram with layout {other.layout} into {self.layout}")
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.total_count += other.total_count
+        if other.min_value is not None:
+            self.min_value = other.min_value if self.min_value is None else min(self.min_value, other.min_value)
+            self.max_value = other.max_value if self.max_value is None else max(self.max_value, other.max_value)
+        return self
+
+    def value_at_percentile(self, percentile):
+        """
+        Get the latency at a percentile
+
+        Args:
+            percentile (float): Percentile between 0 and 100
+
+        Returns:
+            float: Latency in ms (highest value equivalent to the bucket
+            reached), or None if the histogram is empty
+        """
+        if not self.total_count:
+            return None
+
+        target = max(1, int(math.ceil(min(percentile, 100.0) / 100.0 * self.total_count)))
+        running = 0
+        for index, count in enumerate(self.counts):
+            running += count
+            if running >= target:
+                lowest, size = self._value_range(index)
+                value = min(lowest + size - 1, self.max_value)
+                return max(value, self.min_value) / 1000
+        return self.max_value / 1000
+
+    def percentiles(self, percentiles=(50, 90, 99, 99.9)):
+        """
+        Get latencies at several percentiles
+
+        Args:
+            percentiles (iterable): Percentiles between 0 and 100
+
+        Returns:
+            dict: Percentile to latency in ms
+        """
+        return {p: self.value_at_percentile(p) for p in percentiles}
+
+    def mean(self):
+        """Mean latency in ms using bucket midpoints, or None if empty"""
+        if not self.total_count:
+            return None
+        total = 0
+        for index, count in enumerate(self.counts):
+            if count:
+                lowest, size = self._value_range(index)
+                total += count * (lowest + size / 2)
+        return total / self.total_count / 1000
+
+    def to_dict(self):
+        """
+        Serialize to a compact JSON-compatible dict
+
+        Only non-empty buckets are stored, as [index, count] pairs.
+        """
+        return {
+            'lowest': self.lowest,
+            'highest': self.highest,
+            'significant_figures': self.significant_figures,
+            'total': self.total_count,
+            'min': self.min_value,
+            'max': self.max_value,
+            'counts': [[index, count] for index, count in enumerate(self.counts) if count]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Deserialize a dict produced by to_dict
+
+        Args:
+            data (dict): Serialized histogram
+
+        Returns:
+            LatencyHistogram: Histogram
+        """
+        histogram = cls(data['lowest'], data['highest'], data['significant_figures'])
+        for index, count in data.get('counts', []):
+            histogram.counts[index] = count
+        histogram.total_count = data.get('total', sum(count for _, count in data.get('counts', [])))
+        histogram.min_value = data.get('min')
+        histogram.max_value = data.get('max')
+        return histogram
+
+    @classmethod
+    def from_latencies(cls, latencies):
+        """
+        Build a histogram from a list of latencies in ms
+
+        Args:
+            latencies (iterable): Latencies in ms
+
+        Returns:
+            LatencyHistogram: Histogram
+        """
+        histogram = cls()
+        for latency in latencies:
+            histogram.record(latency)
+        return histogram
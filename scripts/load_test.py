@@ -0,0 +1,397 @@
+"""
+Open-loop load test: latency versus throughput
+
+The benchmarks send one request at a time, which says nothing about how
+an endpoint behaves when many clients poll it at once. This module
+offers each endpoint of ENDPOINTS a series of target request rates
+(LOAD_TEST['rates']) for LOAD_TEST['duration'] seconds each, served by
+LOAD_TEST['clients'] concurrent clients.
+
+The load is open-loop: request i has an intended start time fixed up
+front (evenly spaced, or Poisson arrivals), whether or not earlier
+requests have completed. When every client is busy, requests start late,
+and their latency is measured from the intended start time rather than
+from the actual send. This corrects for coordinated omission: a stalled
+server delays the requests that would have been sent during the stall,
+and a closed-loop client would never see them queue. The uncorrected
+service time (actual send to completion) is kept alongside.
+
+Each step yields achieved throughput and corrected percentiles; together
+they form the throughput-latency curve. The knee is the highest step
+that is still sustainable: throughput keeps up with the target
+(LOAD_TEST['min_throughput_ratio']), the error rate stays low and the
+corrected LOAD_TEST['knee_percentile'] stays within
+LOAD_TEST['knee_factor'] times its value at the lowest rate.
+
+Load tests against real venues are capped at their published rate
+limits (RATE_LIMITS) unless LOAD_TEST['respect_rate_limits'] is off,
+which --mock does for the local stand-in:
+
+    python -m scripts.load_test [exchange|all] [--endpoint KEY] [--rates 10,20,50]
+                                [--duration S] [--clients N] [--mock] [--json]
+"""
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+
+from .config import ENDPOINTS, API_SETTINGS, LOAD_TEST, MOCK_SERVER
+from .benchmark_core import make_api_request, series_name
+from .session_pool import create_session
+from .rate_limit import get_bucket, is_throttled
+from .histogram import LatencyHistogram
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def arrival_times(rate, duration, arrival=None, seed=None):
+    """
+    Intended start times of an open-loop step
+
+    Args:
+        rate (float): Target requests per second
+        duration (float): Step length in seconds
+        arrival (str, optional): 'uniform' or 'poisson', defaults to LOAD_TEST['arrival']
+        seed (int, optional): Random seed of Poisson arrivals
+
+    Returns:
+        list: Offsets in seconds from the start of the step
+    """
+    arrival = arrival or LOAD_TEST.get('arrival', 'uniform')
+    count = max(1, int(rate * duration))
+    if arrival == 'poisson':
+        rng = random.Random(seed)
+        times = []
+        t = 0.0
+        for _ in range(count):
+            t += rng.expovariate(rate)
+            times.append(t)
+        return times
+    return [i / rate for i in range(count)]
+
+
+def run_step(exchange, endpoint_key, rate, duration=None, clients=None, symbol=None):
+    """
+    Offer one target rate to an endpoint
+
+    Args:
+        exchange (str): Exchange identifier
+        endpoint_key (str): Endpoint key
+        rate (float): Target requests per second
+        duration (float, optional): Seconds, defaults to LOAD_TEST['duration']
+        clients (int, optional): Concurrent clients, defaults to LOAD_TEST['clients']
+        symbol (str, optional): Symbol, defaults to the exchange's first symbol
+
+    Returns:
+        dict: rate, requests, completed, errors, throttled, throughput
+        (successful responses per second), latency (corrected percentiles
+        in ms), service (uncorrected percentiles in ms) and start_lag_p99
+        (how late requests started, in ms)
+    """
+    duration = duration or LOAD_TEST.get('duration', 10)
+    clients = clients or LOAD_TEST.get('clients', 8)
+    schedule = arrival_times(rate, duration, seed=LOAD_TEST.get('seed'))
+    sessions = [create_session(pool_size=1) for _ in range(clients)]
+
+    # Open every client's connection before the clock starts
+    for session in sessions:
+        make_api_request(exchange, endpoint_key, symbol, session=session)
+
+    lock = threading.Lock()
+    state = {'next': 0}
+    corrected, service, lags = [], [], []
+    counts = {'errors': 0, 'throttled': 0}
+    finished = []
+    start = time.perf_counter() + 0.05
+
+    def client(session):
+        while True:
+            with lock:
+                index = state['next']
+                state['next'] += 1
+            if index >= len(schedule):
+                return
+            intended = start + schedule[index]
+            wait = intended - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            sent = time.perf_counter()
+            success, response = make_api_request(exchange, endpoint_key, symbol, session=session)
+            done = time.perf_counter()
+            with lock:
+                finished.append(done)
+                lags.append((sent - intended) * 1000)
+                if not success:
+                    counts['errors'] += 1
+                elif is_throttled(exchange, response):
+                    counts['throttled'] += 1
+                elif response.status_code >= 400:
+                    counts['errors'] += 1
+                else:
+                    corrected.append((done - intended) * 1000)
+                    service.append((done - sent) * 1000)
+
+    threads = [threading.Thread(target=client, args=(session,), daemon=True) for session in sessions]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        for session in sessions:
+            session.close()
+
+    elapsed = max(max(finished, default=start) - start, schedule[-1], 1e-9)
+    return {
+        'rate': rate,
+        'requests': len(schedule),
+        'completed': len(finished),
+        'errors': counts['errors'],
+        'throttled': counts['throttled'],
+        'throughput': len(corrected) / elapsed,
+        'latency': LatencyHistogram.from_latencies(corrected).percentiles(PERCENTILES) if corrected else {},
+        'service': LatencyHistogram.from_latencies(service).percentiles((50, 99)) if service else {},
+        'start_lag_p99': LatencyHistogram.from_latencies([max(lag, 0.0) for lag in lags]).percentiles((99,))[99]
+        if lags else None,
+    }
+
+
+def is_sustainable(step, baseline):
+    """
+    Whether a step is within the knee criteria of LOAD_TEST
+
+    Args:
+        step (dict): Step result from run_step
+        baseline (dict): Step result at the lowest rate
+
+    Returns:
+        bool: Throughput kept up, errors stayed low and the corrected
+        knee percentile stayed within knee_factor of the baseline
+    """
+    percentile = LOAD_TEST.get('knee_percentile', 99)
+    latency = step['latency'].get(percentile)
+    reference = baseline['latency'].get(percentile)
+    if latency is None or reference is None:
+        return False
+    failed = step['errors'] + step['throttled']
+    return (
+        step['throughput'] >= LOAD_TEST.get('min_throughput_ratio', 0.9) * step['rate']
+        and failed <= LOAD_TEST.get('max_error_rate', 0.01) * step['requests']
+        and latency <= LOAD_TEST.get('knee_factor', 2.0) * reference
+    )
+
+
+def find_knee(steps):
+    """
+    Knee of a throughput-latency curve
+
+    Args:
+        steps (list): Step results in increasing rate order
+
+    Returns:
+        dict: rate, throughput and latency (corrected knee percentile in ms)
+        of the last sustainable step before the first one that is not;
+        None if even the lowest rate is not sustainable
+    """
+    knee = None
+    percentile = LOAD_TEST.get('knee_percentile', 99)
+    for step in steps:
+        if not is_sustainable(step, steps[0]):
+            break
+        knee = {'rate': step['rate'], 'throughput': step['throughput'], 'latency': step['latency'][percentile]}
+    return knee
+
+
+def load_test_endpoint(exchange, endpoint_key, rates=None, duration=None, clients=None, symbol=None):
+    """
+    Step an endpoint through increasing target rates
+
+    Rates above the endpoint's rate limit are skipped while
+    LOAD_TEST['respect_rate_limits'] is on. With LOAD_TEST['stop_after_knee'],
+    the test stops at the first unsustainable step.
+
+    Args:
+        exchange (str): Exchange identifier
+        endpoint_key (str): Endpoint key
+        rates (list, optional): Target rates, defaults to LOAD_TEST['rates']
+        duration (float, optional): Seconds per step
+        clients (int, optional): Concurrent clients
+        symbol (str, optional): Symbol, defaults to the exchange's first symbol
+
+    Returns:
+        dict: exchange, endpoint, clients, steps and knee
+    """
+    rates = sorted(rates or LOAD_TEST.get('rates', [5, 10, 20, 50]))
+    clients = clients or LOAD_TEST.get('clients', 8)
+    limit = None
+    if LOAD_TEST.get('respect_rate_limits', True):
+        bucket = get_bucket(exchange, endpoint_key)
+        limit = bucket.rate if bucket is not None else None
+
+    steps = []
+    for rate in rates:
+        if limit is not None and rate > limit:
+            print(f"Skipping {rate:g} req/s on {exchange} {endpoint_key}: above the rate limit of {limit:g} req/s")
+            continue
+        step = run_step(exchange, endpoint_key, rate, duration, clients, symbol)
+        steps.append(step)
+        if LOAD_TEST.get('stop_after_knee', True) and not is_sustainable(step, steps[0]):
+            break
+
+    return {
+        'exchange': exchange,
+        'endpoint': series_name(exchange, endpoint_key, symbol),
+        'clients': clients,
+        'steps': steps,
+        'knee': find_knee(steps) if steps else None,
+    }
+
+
+def curve_chart(result, output_dir=None):
+    """
+    Chart spec of a throughput-latency curve (see scripts/charts.py)
+
+    Args:
+        result (dict): Output of load_test_endpoint
+        output_dir (str, optional): Directory, defaults to LOAD_TEST['output_dir']
+
+    Returns:
+        dict: Chart spec
+    """
+    output_dir = output_dir or LOAD_TEST['output_dir']
+    steps = result['steps']
+    knee = result['knee']
+    return {
+        'kind': 'curve',
+        'path': os.path.join(output_dir, f"{result['exchange']}_{result['endpoint'].replace('/', '_')}_load"),
+        'title': f"{result['exchange'].upper()} {result['endpoint']} latency vs throughput ({result['clients']} clients)",
+        'xlabel': 'Throughput (req/s)',
+        'ylabel': 'Latency (ms)',
+        'data': {
+            'x': [step['throughput'] for step in steps],
+            'series': {
+                'p50 (corrected)': [step['latency'].get(50) for step in steps],
+                'p99 (corrected)': [step['latency'].get(99) for step in steps],
+                'p99 (service time)': [step['service'].get(99) for step in steps],
+            },
+            'marker': {'x': knee['throughput'], 'label': f"Knee: {knee['rate']:g} req/s"} if knee else None,
+            'log_y': True,
+        },
+    }
+
+
+def format_result(result):
+    """Format a load test result as console lines"""
+    def ms(value):
+        return f"{value:>9.2f}" if value is not None else f"{'-':>9}"
+
+    lines = [f"{result['exchange'].upper()} {result['endpoint']} ({result['clients']} clients)",
+             f"  {'rate':>7} {'req/s':>8} {'p50':>9} {'p99':>9} {'p99.9':>9} {'svc p99':>9} {'lag p99':>9}  errors"]
+    for step in result['steps']:
+        lines.append(
+            f"  {step['rate']:>7g} {step['throughput']:>8.1f} {ms(step['latency'].get(50))} {ms(step['latency'].get(99))}"
+            f" {ms(step['latency'].get(99.9))} {ms(step['service'].get(99))} {ms(step['start_lag_p99'])}"
+            f"  {step['errors'] + step['throttled']}"
+        )
+    knee = result['knee']
+    if knee:
+        lines.append(f"  knee: {knee['rate']:g} req/s ({knee['throughput']:.1f} achieved, "
+                     f"p{LOAD_TEST.get('knee_percentile', 99):g} {knee['latency']:.2f} ms)")
+    else:
+        lines.append("  knee: none (lowest rate not sustainable)")
+    return lines
+
+
+def save_load_results(results, output_dir=None):
+    """
+    Save load test results to a timestamped JSON file and render their charts
+
+    Args:
+        results (list): Outputs of load_test_endpoint
+        output_dir (str, optional): Directory, defaults to LOAD_TEST['output_dir']
+
+    Returns:
+        str: Path of the saved file
+    """
+    from .charts import render_charts
+
+    output_dir = output_dir or LOAD_TEST['output_dir']
+    os.makedirs(output_dir, exist_ok=True)
+    filename = os.path.join(output_dir, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_load.json")
+    with open(filename, 'w') as f:
+        json.dump(results, f, indent=2)
+    render_charts([curve_chart(result, output_dir) for result in results if result['steps']])
+    return filename
+
+
+def main():
+    """Command line entry point"""
+    args = sys.argv[1:]
+    options = {'endpoints': []}
+    positional = []
+    i = 0
+    while i < len(args):
+        if args[i] in ('--mock', '--json'):
+            options[args[i][2:]] = True
+        elif args[i] == '--endpoint' and i + 1 < len(args):
+            options['endpoints'].append(args[i + 1])
+            i += 1
+        elif args[i] == '--rates' and i + 1 < len(args):
+            options['rates'] = [float(rate) for rate in args[i + 1].split(',')]
+            i += 1
+        elif args[i] in ('--duration', '--clients') and i + 1 < len(args):
+            options[args[i][2:]] = float(args[i + 1]) if args[i] == '--duration' else int(args[i + 1])
+            i += 1
+        else:
+            positional.append(args[i])
+        i += 1
+
+    exchange = positional[0].lower() if positional else 'all'
+    exchanges = list(ENDPOINTS) if exchange == 'all' else [exchange]
+    if any(name not in ENDPOINTS for name in exchanges):
+        print(f"Error: Invalid exchange '{exchange}'. Valid options are: {', '.join(ENDPOINTS)}, all")
+        return 1
+    valid = list(dict.fromkeys(key for name in exchanges for key in ENDPOINTS[name]))
+    unknown = [key for key in options['endpoints'] if key not in valid]
+    if unknown:
+        print(f"Error: Invalid endpoint '{unknown[0]}'. Endpoints of {', '.join(exchanges)}: {', '.join(valid)}")
+        return 1
+
+    server = None
+    if options.get('mock'):
+        from .mock_exchange import start_mock_server
+        settings = dict(MOCK_SERVER, workers=LOAD_TEST.get('mock_workers'))
+        server = start_mock_server(settings=settings)
+        for name in exchanges:
+            API_SETTINGS.setdefault('base_urls', {})[name] = server.base_url
+        LOAD_TEST['respect_rate_limits'] = False
+        print(f"Using mock exchange at {server.base_url} ({settings['workers'] or 'unlimited'} workers)")
+
+    results = []
+    try:
+        for name in exchanges:
+            for endpoint_key in ENDPOINTS[name]:
+                if options['endpoints'] and endpoint_key not in options['endpoints']:
+                    continue
+                result = load_test_endpoint(name, endpoint_key, options.get('rates'),
+                                            options.get('duration'), options.get('clients'))
+                results.append(result)
+                if not options.get('json'):
+                    print("\n".join(format_result(result)))
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    if options.get('json'):
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"Results saved: {save_load_results(results)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,483 @@
+"""
+Local mock exchange server
+
+This module serves stand-ins for the public OKX and Bitget REST
+endpoints used in ENDPOINTS, with response bodies shaped like the real
+ones. It injects configurable latency (distribution, jitter, occasional
+stalls) and error responses, so benchmarks can run offline, measure the
+tool's own overhead, and reproduce tail events on demand.
+
+MockH2Server serves the same routes over HTTP/2 (needs the optional h2
+package) for protocol comparisons.
+
+Point an exchange at it through API_SETTINGS['base_urls'], or run:
+
+    python -m scripts.mock_exchange [port]
+"""
+import asyncio
+import json
+import random
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from .config import MOCK_SERVER
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def _levels(mid, count, side, rng):
+    step = 0.1 if side == 'ask' else -0.1
+    return [(round(mid + step * (i + 1), 1), round(rng.uniform(0.001, 5.0), 4)) for i in range(count)]
+
+
+def okx_ticker(query, rng):
+    inst_id = query.get('instId', 'BTC-USDT')
+    last = round(rng.uniform(60000, 70000), 1)
+    return {"code": "0", "msg": "", "data": [{
+        "instType": "SPOT", "instId": inst_id, "last": str(last), "lastSz": "0.0013",
+        "askPx": str(last + 0.1), "askSz": "1.2207", "bidPx": str(last), "bidSz": "0.3851",
+        "open24h": str(last - 512.3), "high24h": str(last + 820.0), "low24h": str(last - 1200.5),
+        "volCcy24h": "612789402.5182", "vol24h": "9421.6643",
+        "ts": str(_now_ms()), "sodUtc0": str(last - 300.2), "sodUtc8": str(last - 120.9)
+    }]}
+
+
+def okx_books(query, rng):
+    depth = min(int(query.get('sz', 1)), 400)
+    mid = rng.uniform(60000, 70000)
+    return {"code": "0", "msg": "", "data": [{
+        "asks": [[str(px), str(sz), "0", str(rng.randint(1, 9))] for px, sz in _levels(mid, depth, 'ask', rng)],
+        "bids": [[str(px), str(sz), "0", str(rng.randint(1, 9))] for px, sz in _levels(mid, depth, 'bid', rng)],
+        "ts": str(_now_ms())
+    }]}
+
+
+def okx_trades(query, rng):
+    limit = min(int(query.get('limit', 100)), 500)
+    inst_id = query.get('instId', 'BTC-USDT')
+    now = _now_ms()
+    return {"code": "0", "msg": "", "data": [{
+        "instId": inst_id, "side": rng.choice(["buy", "sell"]),
+        "sz": str(round(rng.uniform(0.0001, 2.0), 6)), "px": str(round(rng.uniform(60000, 70000), 1)),
+        "tradeId": str(500000000 - i), "ts": str(now - i * 37)
+    } for i in range(limit)]}
+
+
+def bitget_ticker(query, rng):
+    symbol = query.get('symbol', 'BTCUSDT_UMCBL')
+    last = round(rng.uniform(60000, 70000), 1)
+    return {"code": "00000", "msg": "success", "requestTime": _now_ms(), "data": {
+        "symbol": symbol, "last": str(last), "bestAsk": str(last + 0.1), "bestBid": str(last),
+        "bidSz": "2.154", "askSz": "0.871", "high24h": str(last + 910.0), "low24h": str(last - 1005.5),
+        "timestamp": str(_now_ms()), "priceChangePercent": "0.0124", "baseVolume": "131245.892",
+        "quoteVolume": "8563412987.4501", "usdtVolume": "8563412987.4501", "openUtc": str(last - 410.5),
+        "chgUtc": "0.0063", "indexPrice": str(last - 3.2), "fundingRate": "0.0001", "holdingAmount": "61234.117"
+    }}
+
+
+def bitget_depth(query, rng):
+    depth = min(int(query.get('limit', 100)), 100)
+    mid = rng.uniform(60000, 70000)
+    return {"code": "00000", "msg": "success", "requestTime": _now_ms(), "data": {
+        "asks": [[str(px), str(sz)] for px, sz in _levels(mid, depth, 'ask', rng)],
+        "bids": [[str(px), str(sz)] for px, sz in _levels(mid, depth, 'bid', rng)],
+        "timestamp": str(_now_ms())
+    }}
+
+
+def bitget_trades(query, rng):
+    limit = min(int(query.get('limit', 100)), 100)
+    symbol = query.get('symbol', 'BTCUSDT_UMCBL')
+    now = _now_ms()
+    return {"code": "00000", "msg": "success", "requestTime": _now_ms(), "data": [{
+        "tradeId": str(1100000000000000000 - i), "price": str(round(rng.uniform(60000, 70000), 1)),
+        "size": str(round(rng.uniform(0.001, 2.0), 3)), "side": rng.choice(["buy", "sell"]),
+        "timestamp": str(now - i * 41), "symbol": symbol
+    } for i in range(limit)]}
+
+
+def okx_time(query, rng):
+    return {"code": "0", "msg": "", "data": [{"ts": str(_now_ms())}]}
+
+
+def bitget_time(query, rng):
+    now = _now_ms()
+    return {"code": "00000", "msg": "success", "requestTime": now, "data": now}
+
+
+# URL path -> (exchange, payload builder)
+ROUTES = {
+    '/api/v5/public/time': ('okx', okx_time),
+    '/api/spot/v1/public/time': ('bitget', bitget_time),
+    '/api/v5/market/ticker': ('okx', okx_ticker),
+    '/api/v5/market/books': ('okx', okx_books),
+    '/api/v5/market/trades': ('okx', okx_trades),
+    '/api/mix/v1/market/ticker': ('bitget', bitget_ticker),
+    '/api/mix/v1/market/depth': ('bitget', bitget_depth),
+    '/api/mix/v1/market/trades': ('bitget', bitget_trades),
+}
+
+# Error bodies in each exchange's own format, by HTTP status
+ERROR_BODIES = {
+    'okx': {
+        429: {"code": "50011", "msg": "Too Many Requests", "data": []},
+        'default': {"code": "50001", "msg": "Service temporarily unavailable, please try again later.", "data": []},
+    },
+    'bitget': {
+        429: {"code": "429", "msg": "Too Many Requests", "requestTime": 0, "data": None},
+        'default': {"code": "40010", "msg": "Request timed out", "requestTime": 0, "data": None},
+    },
+}
+
+
+def get_exchange_settings(exchange, settings=None):
+    """
+    Get the effective latency/error settings for one exchange
+
+    Args:
+        exchange (str): Exchange identifier
+        settings (dict, optional): Server settings, defaults to MOCK_SERVER
+
+    Returns:
+        dict: Settings with the exchange's overrides applied
+    """
+    settings = settings if settings is not None else MOCK_SERVER
+    effective = {k: v for k, v in settings.items() if k != 'exchanges'}
+    effective.update(settings.get('exchanges', {}).get(exchange, {}))
+    return effective
+
+
+def sample_delay(settings, rng):
+    """
+    Draw the injected response delay in seconds
+
+    Args:
+        settings (dict): Effective exchange settings
+        rng (random.Random): Random source
+
+    Returns:
+        float: Delay in seconds
+    """
+    latency = settings.get('latency', {})
+    distribution = latency.get('distribution', 'constant')
+    median = latency.get('median_ms', 0.0)
+
+    if distribution == 'lognormal':
+        delay = median * rng.lognormvariate(0.0, latency.get('sigma', 0.3)) if median > 0 else 0.0
+    elif distribution == 'normal':
+        delay = rng.gauss(median, latency.get('stddev_ms', 0.0))
+    elif distribution == 'uniform':
+        delay = rng.uniform(latency.get('min_ms', 0.0), latency.get('max_ms', median))
+    else:
+        delay = median
+
+    jitter = settings.get('jitter_ms', 0.0)
+    if jitter:
+        delay += rng.uniform(-jitter, jitter)
+    if rng.random() < settings.get('stall_probability', 0.0):
+        delay += settings.get('stall_ms', 1000.0)
+    return max(delay, 0.0) / 1000
+
+
+def draw_response(exchange, builder, query, settings, rng):
+    """
+    Draw the status and body of a response: throttled, failed or normal
+
+    Args:
+        exchange (str): Exchange identifier
+        builder (callable): Payload builder of the route
+        query (dict): Query parameters
+        settings (dict): Effective exchange settings
+        rng (random.Random): Random source
+
+    Returns:
+        tuple: (HTTP status, payload)
+    """
+    if rng.random() < settings.get('throttle_rate', 0.0):
+        return 429, ERROR_BODIES[exchange][429]
+    if rng.random() < settings.get('error_rate', 0.0):
+        status = settings.get('error_status', 503)
+        return status, ERROR_BODIES[exchange].get(status, ERROR_BODIES[exchange]['default'])
+    return 200, builder(query, rng)
+
+
+class MockExchangeHandler(BaseHTTPRequestHandler):
+    """Request handler serving the mock exchange routes"""
+    protocol_version = 'HTTP/1.1'
+    # Buffer writes so headers and body leave in one segment, like a real server
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        route = ROUTES.get(parts.path)
+        if route is None:
+            self._send_json(404, {"code": "404", "msg": f"Not Found: {parts.path}"})
+            return
+
+        exchange, builder = route
+        settings = get_exchange_settings(exchange, self.server.settings)
+        rng = self.server.rng
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+
+        # A saturated backend: beyond 'workers' requests in service, requests queue
+        with self.server.workers or nullcontext():
+            # Split the delay around the point where the payload is stamped,
+            # so outbound and return legs can be told apart
+            delay = sample_delay(settings, rng)
+            outbound = delay * settings.get('outbound_fraction', 0.5)
+            time.sleep(outbound)
+
+            status, payload = draw_response(exchange, builder, query, settings, rng)
+            time.sleep(delay - outbound)
+        self._send_json(status, payload)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, separators=(',', ':')).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.settings.get('log_requests', False):
+            super().log_message(format, *args)
+
+
+class MockExchangeServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the mock settings and random source"""
+    daemon_threads = True
+
+    def __init__(self, address, settings=None):
+        self.settings = settings if settings is not None else MOCK_SERVER
+        self.rng = random.Random(self.settings.get('seed'))
+        workers = self.settings.get('workers')
+        self.workers = threading.BoundedSemaphore(workers) if workers else None
+        super().__init__(address, MockExchangeHandler)
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_mock_server(host=None, port=None, settings=None):
+    """
+    Start the mock exchange server on a background thread
+
+    Args:
+        host (str, optional): Bind address, defaults to MOCK_SERVER['host']
+        port (int, optional): Port, defaults to MOCK_SERVER['port'] (0 picks a free port)
+        settings (dict, optional): Server settings, defaults to MOCK_SERVER
+
+    Returns:
+        MockExchangeServer: Running server; call shutdown() to stop it
+    """
+    settings = settings if settings is not None else MOCK_SERVER
+    if host is None:
+        host = settings.get('host', '127.0.0.1')
+    if port is None:
+        port = settings.get('port', 0)
+
+    server = MockExchangeServer((host, port), settings)
+    thread = threading.Thread(target=server.serve_forever, name='mock-exchange', daemon=True)
+    thread.start()
+    return server
+
+
+def import_h2():
+    """Import the optional h2 package, with an informative error if missing"""
+    try:
+        import h2.config
+        import h2.connection
+        import h2.events
+        import h2.exceptions
+    except ImportError:
+        raise ImportError(
+            "The HTTP/2 mock exchange requires the 'h2' package: pip install .[http2]"
+        ) from None
+    return h2
+
+
+class MockH2Server:
+    """
+    HTTP/2 stand-in for the mock exchange, on a background thread
+
+    Serves the same routes, payloads, delays and errors as
+    MockExchangeServer over cleartext HTTP/2 with prior knowledge (h2c),
+    handling the streams of a connection concurrently, so clients can
+    multiplex requests over a single connection.
+
+    Args:
+        host (str): Bind address
+        port (int): Port (0 picks a free port)
+        settings (dict, optional): Server settings, defaults to MOCK_SERVER
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, settings=None):
+        self.host = host
+        self.port = port
+        self.settings = settings if settings is not None else MOCK_SERVER
+        self.rng = random.Random(self.settings.get('seed'))
+        self.connections = 0
+        self.workers = None
+        self._loop = None
+        self._stop = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._serve, name='mock-exchange-h2', daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        """Start serving and wait until the port is bound"""
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def shutdown(self):
+        """Stop the server and its thread"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+        self._thread.join(timeout=5)
+
+    def server_close(self):
+        """Counterpart of MockExchangeServer.server_close; shutdown already closes the socket"""
+
+    def _serve(self):
+        asyncio.run(self._main())
+
+    async def _main(self):
+        import_h2()
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        workers = self.settings.get('workers')
+        self.workers = asyncio.Semaphore(workers) if workers else None
+        server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        async with server:
+            self.port = server.sockets[0].getsockname()[1]
+            self._ready.set()
+            await self._stop.wait()
+
+    async def _handle_connection(self, reader, writer):
+        h2 = import_h2()
+        conn = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=False))
+        conn.initiate_connection()
+        writer.write(conn.data_to_send())
+        self.connections += 1
+        # Stream id -> event set when the peer opens its flow-control window
+        windows = {}
+        streams = set()
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                for event in conn.receive_data(data):
+                    if isinstance(event, h2.events.RequestReceived):
+                        headers = {name.decode() if isinstance(name, bytes) else name:
+                                   value.decode() if isinstance(value, bytes) else value
+                                   for name, value in event.headers}
+                        task = asyncio.ensure_future(
+                            self._respond(conn, writer, event.stream_id, headers.get(':path', '/'), windows))
+                        streams.add(task)
+                        task.add_done_callback(streams.discard)
+                    elif isinstance(event, h2.events.WindowUpdated):
+                        for stream_id, window in windows.items():
+                            if event.stream_id in (0, stream_id):
+                                window.set()
+                    elif isinstance(event, h2.events.ConnectionTerminated):
+                        return
+                writer.write(conn.data_to_send())
+                await writer.drain()
+        except (ConnectionError, h2.exceptions.ProtocolError):
+            pass
+        finally:
+            for task in streams:
+                task.cancel()
+            writer.close()
+
+    async def _respond(self, conn, writer, stream_id, path, windows):
+        parts = urlsplit(path)
+        route = ROUTES.get(parts.path)
+        if route is None:
+            status, payload = 404, {"code": "404", "msg": f"Not Found: {parts.path}"}
+        else:
+            exchange, builder = route
+            settings = get_exchange_settings(exchange, self.settings)
+            query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+            async with self.workers or nullcontext():
+                delay = sample_delay(settings, self.rng)
+                outbound = delay * settings.get('outbound_fraction', 0.5)
+                await asyncio.sleep(outbound)
+                status, payload = draw_response(exchange, builder, query, settings, self.rng)
+                await asyncio.sleep(delay - outbound)
+
+        body = json.dumps(payload, separators=(',', ':')).encode()
+        conn.send_headers(stream_id, [
+            (':status', str(status)),
+            ('content-type', 'application/json'),
+            ('content-length', str(len(body))),
+        ])
+        windows[stream_id] = asyncio.Event()
+        try:
+            while body:
+                window = min(conn.local_flow_control_window(stream_id), conn.max_outbound_frame_size)
+                if window <= 0:
+                    windows[stream_id].clear()
+                    writer.write(conn.data_to_send())
+                    await windows[stream_id].wait()
+                    continue
+                conn.send_data(stream_id, body[:window], end_stream=len(body) <= window)
+                body = body[window:]
+            writer.write(conn.data_to_send())
+            await writer.drain()
+        finally:
+            del windows[stream_id]
+
+
+def start_h2_mock_server(host=None, port=None, settings=None):
+    """
+    Start the HTTP/2 mock exchange on a background thread
+
+    Args:
+        host (str, optional): Bind address, defaults to MOCK_SERVER['host']
+        port (int, optional): Port, defaults to MOCK_SERVER['port'] (0 picks a free port)
+        settings (dict, optional): Server settings, defaults to MOCK_SERVER
+
+    Returns:
+        MockH2Server: Running server; call shutdown() to stop it
+    """
+    settings = settings if settings is not None else MOCK_SERVER
+    if host is None:
+        host = settings.get('host', '127.0.0.1')
+    if port is None:
+        port = settings.get('port', 0)
+    return MockH2Server(host, port, settings).start()
+
+
+def main():
+    """Command line entry point: serve the mock exchange until interrupted"""
+    args = sys.argv[1:]
+    port = int(args[0]) if args else MOCK_SERVER.get('port', 0) or 8765
+    server = MockExchangeServer((MOCK_SERVER.get('host', '127.0.0.1'), port))
+    print(f"Mock exchange listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,331 @@
+"""
+Synchronized cross-exchange sampling with paired differences
+
+The benchmarks measure one exchange after the other, minutes apart, so
+comparing their results also compares two different moments of the
+local network. This module measures matching endpoints of several
+exchanges (e.g. okx.book and bitget.book) at the same instant instead:
+
+- every exchange gets its own worker thread and session, warmed by
+  PAIRED['warmup_rounds'] unmeasured rounds
+- in each round the workers first wait for their rate limit, then meet
+  at a barrier and send their request as soon as it opens, so all
+  requests of a round see the same network conditions; the spread of
+  the actual send times is recorded as the round's skew
+- for every pair of exchanges, the per-round difference of latencies
+  (first minus second) is summarized with bootstrap confidence intervals
+  of its mean and median, and the share of rounds the first one won
+
+Conditions shared by both requests of a round (local congestion, Wi-Fi,
+the client machine itself) cancel out in the difference, so a paired
+comparison needs far fewer rounds than comparing two separate runs. The
+summary reports this as 'efficiency': the variance of an unpaired
+comparison divided by the variance of the paired one, i.e. how many
+times more samples separate runs would need for the same precision.
+
+    python -m scripts.paired [exchange exchange ...] [--endpoint KEY] [--rounds N] [--mock] [--json]
+
+With --mock each exchange gets its own mock server, its latency scaled
+by PAIRED['mock_factors'].
+"""
+import copy
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+from .config import ENDPOINTS, API_SETTINGS, PAIRED
+from .benchmark_core import make_api_request
+from .session_pool import create_session
+from .rate_limit import get_bucket, is_throttled
+
+
+def shared_endpoints(exchanges):
+    """
+    Endpoint keys offered by every one of the exchanges
+
+    Args:
+        exchanges (list): Exchange identifiers
+
+    Returns:
+        list: Endpoint keys in the order of the first exchange
+    """
+    return [key for key in ENDPOINTS.get(exchanges[0], {})
+            if all(key in ENDPOINTS.get(exchange, {}) for exchange in exchanges[1:])]
+
+
+def _worker(exchange, endpoint_keys, rounds, warmup, barrier, results):
+    session = create_session(pool_size=1)
+    try:
+        for i in range(warmup + rounds):
+            for endpoint_key in endpoint_keys:
+                bucket = get_bucket(exchange, endpoint_key)
+                if bucket is not None:
+                    bucket.acquire()
+                barrier.wait()
+                sent = time.perf_counter()
+                success, response = make_api_request(exchange, endpoint_key, session=session)
+                latency = (time.perf_counter() - sent) * 1000
+                if i < warmup:
+                    continue
+                if not success:
+                    sample = {'error': str(response)}
+                elif is_throttled(exchange, response):
+                    sample = {'error': 'throttled'}
+                elif response.status_code >= 400:
+                    sample = {'error': f"HTTP {response.status_code}"}
+                else:
+                    sample = {'latency': latency, 'connection': getattr(response, 'connection_state', 'cold')}
+                sample['sent'] = sent
+                results[endpoint_key].append(sample)
+    except threading.BrokenBarrierError:
+        pass
+    except Exception:
+        # Release the other workers instead of leaving them at the barrier
+        barrier.abort()
+        raise
+    finally:
+        session.close()
+
+
+def sample_rounds(exchanges, endpoint_keys=None, rounds=None):
+    """
+    Measure endpoints of several exchanges at the same instant, round by round
+
+    Args:
+        exchanges (list): Two or more exchange identifiers
+        endpoint_keys (list, optional): Endpoints, defaults to shared_endpoints(exchanges)
+        rounds (int, optional): Measured rounds, defaults to PAIRED['rounds']
+
+    Returns:
+        dict: Endpoint key -> exchange -> list of per-round samples
+        ('latency' in ms or 'error', and 'sent', the perf_counter send time)
+    """
+    endpoint_keys = endpoint_keys or shared_endpoints(exchanges)
+    rounds = rounds or PAIRED.get('rounds', 100)
+    barrier = threading.Barrier(len(exchanges), timeout=API_SETTINGS.get('timeout', 10) * 3)
+    results = {exchange: {key: [] for key in endpoint_keys} for exchange in exchanges}
+    threads = [
+        threading.Thread(
+            target=_worker, name=f'paired-{exchange}', daemon=True,
+            args=(exchange, endpoint_keys, rounds, PAIRED.get('warmup_rounds', 2), barrier, results[exchange]),
+        )
+        for exchange in exchanges
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {key: {exchange: results[exchange][key] for exchange in exchanges} for key in endpoint_keys}
+
+
+def paired_stats(first, second, confidence=None, resamples=None, seed=None):
+    """
+    Paired comparison of two latency series measured round by round
+
+    Args:
+        first (list): Latencies in ms of the first exchange
+        second (list): Latencies in ms of the second exchange, same rounds
+        confidence (float, optional): Defaults to PAIRED['confidence']
+        resamples (int, optional): Bootstrap resamples, defaults to PAIRED['resamples']
+        seed (int, optional): Random seed, defaults to PAIRED['seed']
+
+    Returns:
+        dict: rounds, mean/median difference (first - second) with their
+        confidence intervals, win_rate of the first, correlation, efficiency
+        and verdict ('first', 'second' or 'tie')
+    """
+    import numpy as np
+
+    confidence = confidence if confidence is not None else PAIRED.get('confidence', 0.95)
+    resamples = resamples or PAIRED.get('resamples', 2000)
+    first = np.asarray(first, dtype=np.float64)
+    second = np.asarray(second, dtype=np.float64)
+    diffs = first - second
+    n = len(diffs)
+    if n < 2:
+        return {'rounds': n, 'mean': None, 'mean_ci': None, 'median': None, 'median_ci': None,
+                'win_rate': None, 'correlation': None, 'efficiency': None, 'verdict': 'tie'}
+
+    rng = np.random.default_rng(seed if seed is not None else PAIRED.get('seed', 0))
+    resampled = diffs[rng.integers(0, n, size=(resamples, n))]
+    tail = (1 - confidence) / 2 * 100
+    mean_ci = np.percentile(resampled.mean(axis=1), [tail, 100 - tail])
+    median_ci = np.percentile(np.median(resampled, axis=1), [tail, 100 - tail])
+
+    paired_var = diffs.var(ddof=1)
+    unpaired_var = first.var(ddof=1) + second.var(ddof=1)
+    correlated = first.std() > 0 and second.std() > 0
+    if mean_ci[1] < 0:
+        verdict = 'first'
+    elif mean_ci[0] > 0:
+        verdict = 'second'
+    else:
+        verdict = 'tie'
+    return {
+        'rounds': n,
+        'mean': float(diffs.mean()),
+        'mean_ci': [float(mean_ci[0]), float(mean_ci[1])],
+        'median': float(np.median(diffs)),
+        'median_ci': [float(median_ci[0]), float(median_ci[1])],
+        'win_rate': float((diffs < 0).mean() + (diffs == 0).mean() / 2),
+        'correlation': float(np.corrcoef(first, second)[0, 1]) if correlated else None,
+        'efficiency': float(unpaired_var / paired_var) if paired_var else None,
+        'verdict': verdict,
+    }
+
+
+def compare_pairs(samples):
+    """
+    Paired comparison of every pair of exchanges on every endpoint
+
+    Rounds in which either side failed are left out of that pair.
+
+    Args:
+        samples (dict): Output of sample_rounds
+
+    Returns:
+        list: One summary per endpoint and pair, with the paired_stats
+        fields plus first, second, endpoint, errors and skew (mean and max
+        spread of send times within a round, in ms)
+    """
+    summaries = []
+    for endpoint_key, by_exchange in samples.items():
+        for first, second in itertools.combinations(by_exchange, 2):
+            rounds = list(zip(by_exchange[first], by_exchange[second]))
+            ok = [(a, b) for a, b in rounds if 'latency' in a and 'latency' in b]
+            skews = [abs(a['sent'] - b['sent']) * 1000 for a, b in rounds]
+            summary = {
+                'endpoint': endpoint_key,
+                'first': first,
+                'second': second,
+                'errors': {first: sum('error' in a for a, _ in rounds), second: sum('error' in b for _, b in rounds)},
+                'skew_mean': sum(skews) / len(skews) if skews else None,
+                'skew_max': max(skews) if skews else None,
+                'first_mean': sum(a['latency'] for a, _ in ok) / len(ok) if ok else None,
+                'second_mean': sum(b['latency'] for _, b in ok) / len(ok) if ok else None,
+            }
+            summary.update(paired_stats([a['latency'] for a, _ in ok], [b['latency'] for _, b in ok]))
+            summaries.append(summary)
+    return summaries
+
+
+def format_summary(summary):
+    """Format a paired summary as console lines"""
+    first, second = summary['first'].upper(), summary['second'].upper()
+    head = f"{summary['endpoint']:<12} {first} vs {second}  {summary['rounds']} rounds"
+    if summary['mean'] is None:
+        return [f"{head}  not enough paired rounds"]
+    verdict = {'first': f"{first} faster", 'second': f"{second} faster", 'tie': "no significant difference"}
+    efficiency = f"{summary['efficiency']:.1f}x" if summary['efficiency'] is not None else '-'
+    return [
+        f"{head}  {verdict[summary['verdict']]}",
+        f"  mean   {first} {summary['first_mean']:.2f} ms  {second} {summary['second_mean']:.2f} ms",
+        f"  diff   mean {summary['mean']:+.2f} ms [{summary['mean_ci'][0]:+.2f}, {summary['mean_ci'][1]:+.2f}]"
+        f"  median {summary['median']:+.2f} ms [{summary['median_ci'][0]:+.2f}, {summary['median_ci'][1]:+.2f}]",
+        f"  {first} won {summary['win_rate'] * 100:.0f}% of rounds  efficiency vs separate runs {efficiency}"
+        f"  skew {summary['skew_mean']:.3f} ms (max {summary['skew_max']:.3f})",
+    ]
+
+
+def save_paired_results(summaries, output_dir=None):
+    """
+    Save paired summaries to a timestamped JSON file
+
+    Args:
+        summaries (list): Output of compare_pairs
+        output_dir (str, optional): Directory, defaults to PAIRED['output_dir']
+
+    Returns:
+        str: Path of the saved file
+    """
+    output_dir = output_dir or PAIRED['output_dir']
+    os.makedirs(output_dir, exist_ok=True)
+    filename = os.path.join(output_dir, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_paired.json")
+    with open(filename, 'w') as f:
+        json.dump(summaries, f, indent=2)
+    return filename
+
+
+def start_mock_servers(exchanges):
+    """
+    Serve every exchange from its own mock server
+
+    Each server scales the mock latency by the exchange's factor in
+    PAIRED['mock_factors'] (1.0 if absent).
+
+    Args:
+        exchanges (list): Exchanges to point at the mock servers
+
+    Returns:
+        list: Running servers; call shutdown() on each to stop them
+    """
+    from .mock_exchange import start_mock_server, MOCK_SERVER
+
+    servers = []
+    for name in exchanges:
+        settings = copy.deepcopy(MOCK_SERVER)
+        factor = PAIRED.get('mock_factors', {}).get(name, 1.0)
+        for key in ('median_ms', 'min_ms', 'max_ms'):
+            settings['latency'][key] = settings['latency'].get(key, 0.0) * factor
+        server = start_mock_server(settings=settings)
+        API_SETTINGS.setdefault('base_urls', {})[name] = server.base_url
+        servers.append(server)
+    return servers
+
+
+def main():
+    """Command line entry point"""
+    args = sys.argv[1:]
+    options = {'endpoints': []}
+    positional = []
+    i = 0
+    while i < len(args):
+        if args[i] in ('--mock', '--json'):
+            options[args[i][2:]] = True
+        elif args[i] == '--rounds' and i + 1 < len(args):
+            options['rounds'] = int(args[i + 1])
+            i += 1
+        elif args[i] == '--endpoint' and i + 1 < len(args):
+            options['endpoints'].append(args[i + 1])
+            i += 1
+        else:
+            positional.append(args[i].lower())
+        i += 1
+
+    exchanges = positional or list(ENDPOINTS)
+    invalid = [name for name in exchanges if name not in ENDPOINTS]
+    if invalid:
+        print(f"Error: Invalid exchange '{invalid[0]}'. Valid options are: {', '.join(ENDPOINTS)}")
+        return 1
+    if len(exchanges) < 2:
+        print("Error: Paired sampling needs at least two exchanges")
+        return 1
+    shared = shared_endpoints(exchanges)
+    unknown = [key for key in options['endpoints'] if key not in shared]
+    if unknown:
+        print(f"Error: Invalid endpoint '{unknown[0]}'. Endpoints shared by {', '.join(exchanges)}: {', '.join(shared)}")
+        return 1
+
+    servers = start_mock_servers(exchanges) if options.get('mock') else []
+    try:
+        summaries = compare_pairs(sample_rounds(exchanges, options['endpoints'] or shared, options.get('rounds')))
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+    if options.get('json'):
+        print(json.dumps(summaries, indent=2))
+    else:
+        for summary in summaries:
+            print("\n".join(format_summary(summary)))
+        print(f"Results saved: {save_paired_results(summaries)}")
+    return 1 if any(summary['mean'] is None for summary in summaries) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Lightweight latency probe
+
+This module is the probe-only entry point for small probe hosts and cron
+containers: it samples the configured endpoints, appends every sample to
+the sample store and prints a one-line summary per endpoint. Its import
+graph is limited to the HTTP client (requests and the instrumented
+transport) and the recorder; pandas, matplotlib, pytest and NumPy are
+never imported (see scripts/startup_latency.py for the import budget).
+
+    python -m scripts.probe [exchange|all] [--rounds N] [--endpoint KEY] [--mock] [--json]
+"""
+import json
+import statistics
+import sys
+
+from .config import ENDPOINTS, ASYNC_PROBE, API_SETTINGS, MOCK_SERVER
+from .benchmark_core import probe_endpoint, record_samples, series_name, iter_cases
+from .histogram import LatencyHistogram
+
+
+def run_probe(exchanges=None, endpoints=None, rounds=None):
+    """
+    Sample every configured endpoint and record the samples
+
+    Args:
+        exchanges (list, optional): Exchange identifiers, defaults to all in ENDPOINTS
+        endpoints (list, optional): Endpoint keys to probe, defaults to all
+        rounds (int, optional): Samples per endpoint, defaults to ASYNC_PROBE['rounds']
+
+    Returns:
+        list: Per-endpoint summaries (exchange, endpoint, samples, errors,
+        throttled, mean, p50, p99 in ms)
+    """
+    rounds = rounds or ASYNC_PROBE.get('rounds', 5)
+    summaries = []
+    for exchange, endpoint_key, symbol in iter_cases(exchanges):
+        if endpoints and endpoint_key not in endpoints:
+            continue
+        samples = []
+        throttled = []
+        failed = []
+        errors = []
+        for _ in range(rounds):
+            success, result, sample = probe_endpoint(exchange, endpoint_key, symbol, throttled=throttled,
+                                                     failed=failed)
+            if success:
+                samples.append(sample)
+            else:
+                errors.append(str(result))
+
+        name = series_name(exchange, endpoint_key, symbol)
+        record_samples(exchange, name, sorted(samples + throttled + failed, key=lambda s: s['timestamp']))
+        latencies = [s['latency'] for s in samples]
+        percentiles = LatencyHistogram.from_latencies(latencies).percentiles((50, 99)) if latencies else {}
+        summaries.append({
+            'exchange': exchange,
+            'endpoint': name,
+            'samples': len(samples),
+            'errors': len(errors),
+            'throttled': len(throttled),
+            'mean': statistics.mean(latencies) if latencies else None,
+            'p50': percentiles.get(50),
+            'p99': percentiles.get(99),
+            'last_error': errors[-1] if errors else None,
+        })
+    return summaries
+
+
+def format_summary(summary):
+    """Format an endpoint summary as a console line"""
+    def ms(value):
+        return f"{value:>8.2f}" if value is not None else f"{'-':>8}"
+
+    line = (f"{summary['exchange'].upper():<8} {summary['endpoint']:<24} "
+            f"{summary['samples']:>4} ok  mean {ms(summary['mean'])} ms"
+            f"  p50 {ms(summary['p50'])} ms  p99 {ms(summary['p99'])} ms")
+    if summary['errors'] or summary['throttled']:
+        line += f"  errors {summary['errors']}  throttled {summary['throttled']}"
+    return line
+
+
+def main():
+    """Command line entry point, returns 1 if an endpoint had no successful sample"""
+    args = sys.argv[1:]
+    options = {'endpoints': []}
+    positional = []
+    i = 0
+    while i < len(args):
+        if args[i] in ('--mock', '--json'):
+            options[args[i][2:]] = True
+        elif args[i] == '--rounds' and i + 1 < len(args):
+            options['rounds'] = int(args[i + 1])
+            i += 1
+        elif args[i] == '--endpoint' and i + 1 < len(args):
+            options['endpoints'].append(args[i + 1])
+            i += 1
+        else:
+            positional.append(args[i])
+        i += 1
+
+    exchange = positional[0].lower() if positional else 'all'
+    exchanges = list(ENDPOINTS) if exchange == 'all' else [exchange]
+    if any(name not in ENDPOINTS for name in exchanges):
+        print(f"Error: Invalid exchange '{exchange}'. Valid options are: {', '.join(ENDPOINTS)}, all")
+        return 1
+
+    server = None
+    if options.get('mock'):
+        from .mock_exchange import start_mock_server
+        server = start_mock_server()
+        MOCK_SERVER['enabled'] = True  # Record to the mock store, never the real one
+        for name in exchanges:
+            API_SETTINGS.setdefault('base_urls', {})[name] = server.base_url
+
+    try:
+        summaries = run_probe(exchanges, options['endpoints'], options.get('rounds'))
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    if options.get('json'):
+        print(json.dumps(summaries, indent=2))
+    else:
+        for summary in summaries:
+            print(format_summary(summary))
+            if not summary['samples'] and summary['last_error']:
+                print(f"  Error: {summary['last_error']}")
+    return 1 if any(not summary['samples'] for summary in summaries) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
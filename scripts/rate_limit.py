@@ -0,0 +1,162 @@
+"""
+Rate limiting and retries for exchange requests
+
+This module keeps probes just under each venue's published public rate
+limits with one token bucket per exchange endpoint, configured in
+RATE_LIMITS. Buckets refill continuously at a safety fraction of the
+published rate and allow bursts up to the published limit, so sample
+throughput stays as high as the venue allows.
+
+Throttled responses (HTTP 429 or the exchange's own rate-limit codes)
+are detected, marked and retried with exponential backoff and full
+jitter, honouring Retry-After when the venue sends it; they never count
+as latency samples.
+"""
+import random
+import re
+import threading
+import time
+
+from .config import RATE_LIMITS, API_SETTINGS
+
+_buckets = {}
+_lock = threading.Lock()
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket
+
+    Args:
+        rate (float): Tokens added per second
+        capacity (float): Maximum burst size
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = max(float(capacity), 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self):
+        """
+        Take one token, returning how long the caller must wait before using it
+
+        Returns:
+            float: Seconds to wait (0 if a token is available now)
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.blocked_until - now, 0.0)
+
+    def acquire(self):
+        """
+        Block until a token is available
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def penalize(self, seconds):
+        """Stop handing out tokens for the given number of seconds (after a throttle)"""
+        with self._lock:
+            now = time.monotonic()
+            self.blocked_until = max(self.blocked_until, now + seconds)
+            self._refill(now)
+            self.tokens = min(self.tokens, 0.0)
+
+
+def get_bucket(exchange, endpoint_key):
+    """
+    Get the token bucket of an exchange endpoint
+
+    Endpoints without their own entry in RATE_LIMITS share the exchange's
+    'default' bucket.
+
+    Args:
+        exchange (str): Exchange identifier
+        endpoint_key (str): Endpoint key
+
+    Returns:
+        TokenBucket: Bucket, or None if the exchange has no configured limits
+    """
+    limits = RATE_LIMITS.get('exchanges', {}).get(exchange)
+    if not RATE_LIMITS.get('enabled', True) or not limits:
+        return None
+    key = endpoint_key if endpoint_key in limits else 'default'
+    limit = limits.get(key)
+    if not limit:
+        return None
+
+    with _lock:
+        bucket = _buckets.get((exchange, key))
+        if bucket is None:
+            safety = RATE_LIMITS.get('safety_factor', 0.9)
+            bucket = _buckets[(exchange, key)] = TokenBucket(
+                rate=limit['requests'] / limit['per'] * safety,
+                capacity=limit['requests'] * safety
+            )
+        return bucket
+
+
+def reset_buckets():
+    """Forget all buckets, e.g. after changing RATE_LIMITS"""
+    with _lock:
+        _buckets.clear()
+
+
+def is_throttled(exchange, response):
+    """
+    Tell whether a response is a rate-limit rejection
+
+    Args:
+        exchange (str): Exchange identifier
+        response (requests.Response): Response
+
+    Returns:
+        bool: True for HTTP 429 or one of the exchange's throttle codes
+    """
+    if response.status_code == 429:
+        return True
+    codes = RATE_LIMITS.get('exchanges', {}).get(exchange, {}).get('throttle_codes', [])
+    if not codes:
+        return False
+    match = re.search(rb'"code"\s*:\s*"?(\w+)', response.content[:256])
+    return bool(match) and match.group(1).decode() in codes
+
+
+def backoff_delay(attempt, response=None):
+    """
+    Delay before retry number attempt (0-based), with full jitter
+
+    Args:
+        attempt (int): Number of attempts already retried
+        response (requests.Response, optional): Throttled response whose
+            Retry-After header, if any, sets a lower bound
+
+    Returns:
+        float: Seconds to wait
+    """
+    base = API_SETTINGS.get('retry_backoff', 0.5)
+    cap = API_SETTINGS.get('retry_backoff_max', 8.0)
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after:
+        try:
+            delay = max(delay, float(retry_after))
+        except ValueError:
+            pass
+    return delay
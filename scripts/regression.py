@@ -0,0 +1,544 @@
+"""
+Statistical regression detection across benchmark history
+
+This module compares the latest run of every exchange endpoint with its
+stored history in .benchmarks/ and flags latency regressions. History is
+kept per machine directory (.benchmarks/<machine>/), so runs from
+different hosts or Python builds are never pooled into one baseline:
+
+- the latest run is tested against the pooled samples of the previous
+  REGRESSION['baseline_runs'] runs with a one-sided Mann-Whitney U test,
+  and bootstrap confidence intervals on the change of the median and p99;
+  a regression is significant when the test rejects at REGRESSION['alpha']
+  and the lower confidence bound of a percentile's increase exceeds
+  REGRESSION['min_effect'] of the baseline
+- the median of the latest run is checked against
+  BENCHMARK_SETTINGS['latency_threshold']
+- change points in the per-run medians over the whole history are found
+  by binary segmentation on the log scale
+
+The latencies of every run are kept in a flat NumPy cache
+(REGRESSION['cache']) so only new result files are parsed, and all
+statistics are computed on flat arrays without per-sample Python loops.
+The command line exits with status 1 on a regression and writes a
+machine-readable diff:
+
+    python -m scripts.regression [benchmark_dir] [--baseline N] [--output FILE|-]
+"""
+import datetime
+import json
+import math
+import os
+import statistics
+import sys
+
+import numpy as np
+
+from .config import EXCHANGES, BENCHMARK_SETTINGS, REGRESSION
+from .benchmark_core import benchmark_label, sample_latencies
+
+CACHE_VERSION = 2
+
+
+def endpoint_key(exchange, label):
+    """Endpoint key of a report label, e.g. 'okx_book@ETH-USDT' -> 'book'"""
+    prefix = f"{exchange}_"
+    if label.startswith(prefix):
+        label = label[len(prefix):]
+    return label.split('@', 1)[0]
+
+
+def parse_run(file_path):
+    """
+    Read the latencies of every exchange endpoint from one result file
+
+    Args:
+        file_path (str): pytest-benchmark JSON file
+
+    Returns:
+        tuple: (run time in Unix seconds or NaN, list of
+        (series key, latencies in ms, run mean in ms) tuples)
+    """
+    with open(file_path, 'r') as f:
+        data = json.load(f)
+    try:
+        run_time = datetime.datetime.fromisoformat(data['datetime']).timestamp()
+    except (KeyError, TypeError, ValueError):
+        run_time = float('nan')
+
+    rows = []
+    for benchmark in data.get('benchmarks', []):
+        group = benchmark.get('group', 'unknown')
+        if group not in EXCHANGES or benchmark.get('extra_info', {}).get('mock'):
+            # Mock runs are loopback latency, not exchange history
+            continue
+        latencies = sample_latencies(benchmark.get('extra_info', {}).get('samples', []))
+        mean = statistics.mean(latencies) if latencies else benchmark.get('stats', {}).get('mean', 0) * 1000
+        rows.append((f"{group}/{benchmark_label(benchmark)}", latencies, mean))
+    return run_time, rows
+
+
+def _empty_cache():
+    return {
+        'files': np.empty(0, dtype=str), 'mtimes': np.empty(0, dtype=np.int64),
+        'sizes': np.empty(0, dtype=np.int64), 'run_times': np.empty(0),
+        'series': np.empty(0, dtype=str),
+        'row_file': np.empty(0, dtype=np.int64), 'row_series': np.empty(0, dtype=np.int64),
+        'row_count': np.empty(0, dtype=np.int64), 'row_mean': np.empty(0),
+        'values': np.empty(0),
+    }
+
+
+def _load_cache(cache_file):
+    try:
+        with np.load(cache_file) as data:
+            if int(data['version']) == CACHE_VERSION:
+                return {key: data[key] for key in data.files if key != 'version'}
+    except (OSError, KeyError, ValueError):
+        pass
+    return _empty_cache()
+
+
+def _gather(counts, keep):
+    # Indices into the flat values of the rows selected by keep (mask or indices)
+    starts = np.cumsum(counts) - counts
+    counts, starts = counts[keep], starts[keep]
+    return np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(counts.sum())
+
+
+def update_cache(benchmark_dir, cache_file):
+    """
+    Bring the flat history cache up to date with the result files
+
+    Files whose mtime and size are unchanged are reused from the cache;
+    new or changed files are parsed, and deleted files dropped.
+
+    Args:
+        benchmark_dir (str): Directory holding pytest-benchmark JSON files
+        cache_file (str): .npz cache file
+
+    Returns:
+        dict: Cache arrays (files, run_times, series, row_* and values)
+    """
+    cache = _load_cache(cache_file)
+    scanned = sorted(
+        (os.path.relpath(os.path.join(root, file), benchmark_dir), os.stat(os.path.join(root, file)))
+        for root, dirs, files in os.walk(benchmark_dir)
+        for file in files if file.endswith('.json')
+    )
+    cached = {
+        key: (index, mtime, size)
+        for index, (key, mtime, size) in enumerate(zip(cache['files'], cache['mtimes'], cache['sizes']))
+    }
+
+    kept = []
+    new = []
+    for key, stat in scanned:
+        entry = cached.get(key)
+        if entry and entry[1] == stat.st_mtime_ns and entry[2] == stat.st_size:
+            kept.append(entry[0])
+        else:
+            new.append((key, stat))
+    if not new and len(kept) == len(cache['files']):
+        return cache
+
+    # Keep the rows and values of unchanged files, renumbering the files
+    kept = np.array(kept, dtype=np.int64)
+    remap = np.full(len(cache['files']), -1, dtype=np.int64)
+    remap[kept] = np.arange(len(kept))
+    keep_rows = remap[cache['row_file']] >= 0
+    values = [cache['values'][_gather(cache['row_count'], keep_rows)]]
+    files = list(cache['files'][kept])
+    mtimes = list(cache['mtimes'][kept])
+    sizes = list(cache['sizes'][kept])
+    run_times = list(cache['run_times'][kept])
+    series = list(cache['series'])
+    series_index = {name: index for index, name in enumerate(series)}
+    row_file = [remap[cache['row_file'][keep_rows]]]
+    row_series = [cache['row_series'][keep_rows]]
+    row_count = [cache['row_count'][keep_rows]]
+    row_mean = [cache['row_mean'][keep_rows]]
+
+    for key, stat in new:
+        try:
+            run_time, rows = parse_run(os.path.join(benchmark_dir, key))
+        except Exception as e:
+            print(f"Error processing {key}: {str(e)}")
+            continue
+        file_index = len(files)
+        files.append(key)
+        mtimes.append(stat.st_mtime_ns)
+        sizes.append(stat.st_size)
+        run_times.append(run_time)
+        # Series are per machine directory, e.g. Linux-CPython-3.11-64bit/okx/okx_book
+        machine = os.path.dirname(key).replace(os.sep, '/')
+        for name, latencies, mean in rows:
+            name = f"{machine}/{name}"
+            if name not in series_index:
+                series_index[name] = len(series)
+                series.append(name)
+            row_file.append(np.array([file_index]))
+            row_series.append(np.array([series_index[name]]))
+            row_count.append(np.array([len(latencies)]))
+            row_mean.append(np.array([mean], dtype=float))
+            values.append(np.array(latencies, dtype=float))
+
+    cache = {
+        'files': np.array(files, dtype=str), 'mtimes': np.array(mtimes, dtype=np.int64),
+        'sizes': np.array(sizes, dtype=np.int64), 'run_times': np.array(run_times, dtype=float),
+        'series': np.array(series, dtype=str),
+        'row_file': np.concatenate(row_file).astype(np.int64),
+        'row_series': np.concatenate(row_series).astype(np.int64),
+        'row_count': np.concatenate(row_count).astype(np.int64),
+        'row_mean': np.concatenate(row_mean).astype(float),
+        'values': np.concatenate(values).astype(float),
+    }
+    cache_dir = os.path.dirname(cache_file)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    with open(cache_file + '.tmp', 'wb') as f:
+        np.savez(f, version=CACHE_VERSION, **cache)
+    os.replace(cache_file + '.tmp', cache_file)
+    return cache
+
+
+def run_medians(values, run_ids, n_runs):
+    """
+    Median of every run of a flat sample array, without a Python loop
+
+    Args:
+        values (np.ndarray): Latencies of all runs
+        run_ids (np.ndarray): Run index of each latency
+        n_runs (int): Number of runs
+
+    Returns:
+        np.ndarray: Median per run, NaN for runs without samples
+    """
+    medians = np.full(n_runs, np.nan)
+    if not len(values):
+        return medians
+    order = np.lexsort((values, run_ids))
+    ordered, ids = values[order], run_ids[order]
+    counts = np.bincount(ids, minlength=n_runs)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    has = counts > 0
+    low = starts[has] + (counts[has] - 1) // 2
+    high = starts[has] + counts[has] // 2
+    medians[has] = (ordered[low] + ordered[high]) / 2
+    return medians
+
+
+def load_history(benchmark_dir=None, cache_file=None):
+    """
+    Load the per-run latencies of every exchange endpoint
+
+    Args:
+        benchmark_dir (str, optional): Directory holding pytest-benchmark
+            JSON files, defaults to ./.benchmarks
+        cache_file (str, optional): History cache, defaults to REGRESSION['cache']
+
+    Returns:
+        dict: (machine, exchange, endpoint label) to a series dict with 'files',
+        'times' (Unix seconds per run, oldest first), 'values' (flat
+        latencies in ms), 'run_ids' (run index per value) and 'centers'
+        (median per run, or the run mean for runs without raw samples)
+    """
+    benchmark_dir = benchmark_dir or os.path.join(os.getcwd(), '.benchmarks')
+    if not os.path.isdir(benchmark_dir):
+        return {}
+    cache = update_cache(benchmark_dir, cache_file or REGRESSION.get('cache', os.path.join('data', 'regression_cache.npz')))
+
+    history = {}
+    for series_id, name in enumerate(cache['series']):
+        rows = np.flatnonzero(cache['row_series'] == series_id)
+        files = cache['row_file'][rows]
+        # Oldest run first; runs without a time sort by file name
+        rows = rows[np.lexsort((cache['files'][files], cache['run_times'][files]))]
+        files = cache['row_file'][rows]
+        values = cache['values'][_gather(cache['row_count'], rows)]
+        run_ids = np.repeat(np.arange(len(rows)), cache['row_count'][rows])
+        centers = run_medians(values, run_ids, len(rows))
+        centers = np.where(np.isnan(centers), cache['row_mean'][rows], centers)
+        machine, exchange, label = name.rsplit('/', 2)
+        history[(machine, exchange, label)] = {
+            'files': [os.path.basename(file) for file in cache['files'][files]],
+            'times': cache['run_times'][files],
+            'values': values,
+            'run_ids': run_ids,
+            'centers': centers,
+        }
+    return history
+
+
+def rank_data(values):
+    """
+    Ranks starting at 1, ties sharing their average rank
+
+    Returns:
+        tuple: (ranks, tie group sizes)
+    """
+    order = np.argsort(values, kind='mergesort')
+    ordered = values[order]
+    boundaries = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1], True])
+    sizes = np.diff(boundaries)
+    average = (boundaries[:-1] + boundaries[1:] + 1) / 2
+    ranks = np.empty(len(values))
+    ranks[order] = np.repeat(average, sizes)
+    return ranks, sizes
+
+
+def mann_whitney(candidate, baseline):
+    """
+    One-sided Mann-Whitney U test that candidate latencies are larger
+
+    Uses the normal approximation with tie and continuity corrections.
+
+    Args:
+        candidate (np.ndarray): Latencies of the run under test
+        baseline (np.ndarray): Pooled baseline latencies
+
+    Returns:
+        tuple: (U statistic of the candidate, p-value)
+    """
+    n1, n2 = len(candidate), len(baseline)
+    ranks, ties = rank_data(np.concatenate((candidate, baseline)))
+    u = ranks[:n1].sum() - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - (ties ** 3 - ties).sum() / (n * (n - 1)))
+    if variance <= 0:
+        return float(u), 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    return float(u), 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def bootstrap_percentiles(candidate, baseline, percentiles, resamples, confidence, rng):
+    """
+    Bootstrap confidence intervals on the change of latency percentiles
+
+    All resamples are drawn and reduced in one array operation per side.
+
+    Args:
+        candidate (np.ndarray): Latencies of the run under test
+        baseline (np.ndarray): Pooled baseline latencies
+        percentiles (list): Percentiles to compare, e.g. [50, 99]
+        resamples (int): Bootstrap resamples
+        confidence (float): Confidence level of the intervals
+        rng (np.random.Generator): Random generator
+
+    Returns:
+        dict: 'p50', 'p99', ... to baseline, candidate, delta and ci (ms)
+    """
+    def resampled(values):
+        indices = rng.integers(0, len(values), size=(resamples, len(values)))
+        return np.percentile(values[indices], percentiles, axis=1)
+
+    deltas = resampled(candidate) - resampled(baseline)
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(deltas, [tail, 100 - tail], axis=1)
+    base = np.percentile(baseline, percentiles)
+    cand = np.percentile(candidate, percentiles)
+
+    return {
+        f"p{percentile:g}": {
+            'baseline': float(base[i]),
+            'candidate': float(cand[i]),
+            'delta': float(cand[i] - base[i]),
+            'ci': [float(low[i]), float(high[i])],
+        }
+        for i, percentile in enumerate(percentiles)
+    }
+
+
+def detect_change_points(centers, threshold=None, min_segment=None):
+    """
+    Find level shifts in a series of per-run latencies by binary segmentation
+
+    Every segment is split where the standardized difference of the mean
+    log latency before and after is largest, as long as it exceeds the
+    threshold. The noise level is estimated from successive differences,
+    so it is not inflated by the shifts themselves.
+
+    Args:
+        centers (np.ndarray): Per-run latency, oldest first
+        threshold (float, optional): Defaults to REGRESSION['change_point_threshold']
+        min_segment (int, optional): Defaults to REGRESSION['min_segment_runs']
+
+    Returns:
+        list: Indices of the first run after each change point, ascending
+    """
+    threshold = threshold if threshold is not None else REGRESSION.get('change_point_threshold', 6.0)
+    min_segment = min_segment or REGRESSION.get('min_segment_runs', 5)
+    y = np.log(np.clip(centers[np.isfinite(centers)], 1e-6, None))
+    if len(y) < 2 * min_segment:
+        return []
+
+    diffs = np.diff(y)
+    sigma = 1.4826 * np.median(np.abs(diffs - np.median(diffs))) / math.sqrt(2)
+    if sigma <= 0:
+        sigma = np.std(diffs) / math.sqrt(2)
+    if sigma <= 0:
+        return []
+
+    found = []
+    segments = [(0, len(y))]
+    while segments:
+        lo, hi = segments.pop()
+        n = hi - lo
+        if n < 2 * min_segment:
+            continue
+        sums = np.cumsum(y[lo:hi])
+        k = np.arange(min_segment, n - min_segment + 1)
+        left = sums[k - 1] / k
+        right = (sums[-1] - sums[k - 1]) / (n - k)
+        score = np.abs(right - left) / (sigma * np.sqrt(1 / k + 1 / (n - k)))
+        best = int(np.argmax(score))
+        if score[best] >= threshold:
+            split = lo + int(k[best])
+            found.append(split)
+            segments.extend([(lo, split), (split, hi)])
+    return sorted(found)
+
+
+def compare_series(machine, exchange, label, series, settings, rng):
+    """
+    Compare the latest run of one exchange endpoint with its history
+
+    Args:
+        machine (str): Machine directory of the series
+        exchange (str): Exchange identifier
+        label (str): Endpoint label from the report
+        series (dict): Series from load_history
+        settings (dict): REGRESSION settings
+        rng (np.random.Generator): Bootstrap random generator
+
+    Returns:
+        dict: JSON-serializable comparison, with 'regressed' and 'reasons'
+    """
+    files, centers = series['files'], series['centers']
+    latest = len(files) - 1
+    values, run_ids = series['values'], series['run_ids']
+    baseline_start = max(0, latest - settings.get('baseline_runs', 10))
+
+    candidate = values[run_ids == latest]
+    baseline = values[(run_ids >= baseline_start) & (run_ids < latest)]
+    reasons = []
+    entry = {
+        'machine': machine,
+        'exchange': exchange,
+        'endpoint': label,
+        'candidate': files[latest],
+        'baseline_runs': latest - baseline_start,
+        'samples': [int(len(candidate)), int(len(baseline))],
+        'median': float(centers[latest]),
+    }
+
+    threshold = BENCHMARK_SETTINGS.get('latency_threshold', {}).get(endpoint_key(exchange, label))
+    if threshold is not None and centers[latest] > threshold:
+        reasons.append(f"median {centers[latest]:.2f} ms above threshold {threshold} ms")
+
+    if len(candidate) >= 2 and len(baseline) >= 2:
+        _, p_value = mann_whitney(candidate, baseline)
+        percentiles = bootstrap_percentiles(
+            candidate, baseline,
+            settings.get('percentiles', [50, 99]),
+            settings.get('bootstrap_resamples', 1000),
+            settings.get('confidence', 0.95),
+            rng
+        )
+        entry['p_value'] = p_value
+        entry['percentiles'] = percentiles
+        if p_value < settings.get('alpha', 0.01):
+            for name, change in percentiles.items():
+                if change['ci'][0] > settings.get('min_effect', 0.05) * change['baseline']:
+                    reasons.append(f"{name} up {change['delta']:+.2f} ms "
+                                   f"(CI {change['ci'][0]:.2f}..{change['ci'][1]:.2f}, p={p_value:.2g})")
+
+    entry['change_points'] = [
+        {
+            'file': files[index],
+            'before': float(np.median(centers[max(0, index - settings.get('min_segment_runs', 5)):index])),
+            'after': float(np.median(centers[index:index + settings.get('min_segment_runs', 5)])),
+        }
+        for index in detect_change_points(centers, settings.get('change_point_threshold'),
+                                          settings.get('min_segment_runs'))
+    ]
+    entry['regressed'] = bool(reasons)
+    entry['reasons'] = reasons
+    return entry
+
+
+def compare_history(history, settings=None):
+    """
+    Compare the latest run of every exchange endpoint with its history
+
+    Args:
+        history (dict): Series from load_history
+        settings (dict, optional): Overrides of REGRESSION
+
+    Returns:
+        dict: Machine-readable diff with 'series' and 'regressions'
+    """
+    settings = dict(REGRESSION, **(settings or {}))
+    rng = np.random.default_rng(settings.get('seed'))
+    series = [
+        compare_series(machine, exchange, label, history[(machine, exchange, label)], settings, rng)
+        for machine, exchange, label in sorted(history)
+    ]
+    return {
+        'generated': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'settings': settings,
+        'series': series,
+        'regressions': [f"{entry['machine']}/{entry['endpoint']}" for entry in series if entry['regressed']],
+    }
+
+
+def main():
+    """Command line entry point, returns 1 if any endpoint regressed"""
+    args = sys.argv[1:]
+    settings = {}
+    output = REGRESSION.get('output', os.path.join('data', 'regression.json'))
+    positional = []
+    i = 0
+    while i < len(args):
+        if args[i] == '--baseline' and i + 1 < len(args):
+            settings['baseline_runs'] = int(args[i + 1])
+            i += 1
+        elif args[i] == '--output' and i + 1 < len(args):
+            output = args[i + 1]
+            i += 1
+        else:
+            positional.append(args[i])
+        i += 1
+
+    history = load_history(positional[0] if positional else None)
+    if not history:
+        print("No benchmark history found")
+        return 0
+    diff = compare_history(history, settings)
+
+    if output == '-':
+        print(json.dumps(diff, indent=2))
+    else:
+        output_dir = os.path.dirname(output)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        with open(output, 'w') as f:
+            json.dump(diff, f, indent=2)
+        machine = None
+        for entry in diff['series']:
+            if entry['machine'] != machine:
+                machine = entry['machine']
+                print(machine)
+            status = "REGRESSED" if entry['regressed'] else "ok"
+            print(f"  {entry['endpoint']:<30} {entry['median']:>10.2f} ms  {status}"
+                  + (f": {'; '.join(entry['reasons'])}" if entry['reasons'] else ""))
+            for change in entry['change_points']:
+                print(f"  {'':<30} change point at {change['file']}: "
+                      f"{change['before']:.2f} -> {change['after']:.2f} ms")
+        print(f"Regression diff saved: {output}")
+
+    return 1 if diff['regressions'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
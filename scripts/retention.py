@@ -0,0 +1,446 @@
+"""
+Bounded retention for latency history
+
+Left alone, every run adds to .benchmarks/, data/*_latency_data.json,
+the sample store and the timestamped CSV/chart files in docs/. This
+module keeps all of them bounded, so storage and report load time stop
+growing however long the monitor runs:
+
+- Raw samples stay in the sample store for RETENTION['raw_days']. Older
+  samples are compacted into per-minute aggregates, which are kept for
+  RETENTION['minute_days'] and then compacted into per-hour aggregates,
+  kept for RETENTION['hour_days'].
+- Every aggregate row holds count, errors, min, max, sum and a compact
+  log-bucketed histogram (HIST_BUCKETS per octave), so percentiles of any
+  period can still be estimated after the raw samples are gone.
+- Superseded files are deleted: the oldest .benchmarks (and mock) runs beyond
+  RETENTION['benchmark_runs'], the oldest entries of the legacy JSON
+  files beyond DATA_STORAGE['max_entries'], and the oldest timestamped
+  artifacts and probe results beyond RETENTION['keep_files'].
+
+Aggregates are stored like the sample store, one flat file per column:
+
+    <aggregate_dir>/<tier>/<exchange>/<endpoint>/<column>.bin
+
+Compaction is idempotent: aggregates are appended before raw rows are
+removed, and rows falling in an already aggregated bucket are skipped,
+so an interrupted run can simply be repeated. Run it between probe runs,
+not while a recorder is appending.
+
+    python -m scripts.retention [--dry-run]
+"""
+import glob
+import json
+import math
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+from .config import DATA_STORAGE, RETENTION
+from .sample_store import (
+    get_store_dir, list_series, read_samples, drop_before, FLAG_ERROR, FLAG_THROTTLED,
+)
+
+# Tier name -> bucket width in seconds
+TIERS = {'minute': 60, 'hour': 3600}
+
+AGGREGATE_COLUMNS = {
+    'bucket': 'f8',   # Bucket start, Unix time in seconds
+    'count': 'u4',    # Latency samples
+    'errors': 'u4',   # Failed or throttled requests
+    'min': 'f4',      # Latency in ms
+    'max': 'f4',
+    'sum': 'f8',
+}
+
+# Histogram: HIST_PER_OCTAVE log-spaced buckets per doubling from HIST_LOWEST_MS
+HIST_LOWEST_MS = 0.05
+HIST_PER_OCTAVE = 4
+HIST_BUCKETS = 88  # Up to about 200 s; the first bucket also holds anything lower
+
+
+def hist_index(latencies):
+    """Histogram bucket of each latency in ms"""
+    latencies = np.maximum(np.asarray(latencies, dtype=np.float64), HIST_LOWEST_MS)
+    index = np.floor(np.log2(latencies / HIST_LOWEST_MS) * HIST_PER_OCTAVE).astype(np.int64)
+    return np.clip(index, 0, HIST_BUCKETS - 1)
+
+
+def hist_upper(index):
+    """Upper bound in ms of a histogram bucket"""
+    return HIST_LOWEST_MS * 2 ** ((index + 1) / HIST_PER_OCTAVE)
+
+
+def hist_percentiles(hist, percentiles, low=None, high=None):
+    """
+    Estimate percentiles from an aggregated histogram
+
+    Args:
+        hist (array): Bucket counts
+        percentiles (list): Percentiles to estimate
+        low (float, optional): Known minimum in ms, to clamp estimates
+        high (float, optional): Known maximum in ms, to clamp estimates
+
+    Returns:
+        dict: Percentile -> latency in ms, interpolated within its bucket
+        (one bucket spans about 19%); empty without samples
+    """
+    hist = np.asarray(hist, dtype=np.int64)
+    total = int(hist.sum())
+    if not total:
+        return {}
+    cumulative = np.cumsum(hist)
+    values = {}
+    for p in percentiles:
+        rank = max(1, math.ceil(p / 100 * total))
+        index = int(np.searchsorted(cumulative, rank))
+        # Geometric interpolation by rank within the bucket
+        below = cumulative[index] - hist[index]
+        value = hist_upper(index - 1) * 2 ** ((rank - below) / hist[index] / HIST_PER_OCTAVE)
+        if high is not None:
+            value = min(value, high)
+        if low is not None:
+            value = max(value, low)
+        values[p] = float(value)
+    return values
+
+
+def get_aggregate_dir(aggregate_dir=None):
+    """Get the aggregate root directory"""
+    return aggregate_dir or RETENTION.get('aggregate_dir', os.path.join('data', 'aggregates'))
+
+
+def _tier_dir(tier, exchange, endpoint, aggregate_dir=None):
+    return os.path.join(get_aggregate_dir(aggregate_dir), tier, exchange, endpoint)
+
+
+def read_aggregates(tier, exchange, endpoint, start=None, end=None, aggregate_dir=None):
+    """
+    Read the aggregates of a series
+
+    Args:
+        tier (str): 'minute' or 'hour'
+        exchange (str): Exchange identifier
+        endpoint (str): Endpoint key
+        start (float, optional): Window start, Unix time in seconds (inclusive)
+        end (float, optional): Window end, Unix time in seconds (exclusive)
+        aggregate_dir (str, optional): Aggregate root directory
+
+    Returns:
+        dict: AGGREGATE_COLUMNS arrays plus 'hist' (rows x HIST_BUCKETS)
+    """
+    tier_dir = _tier_dir(tier, exchange, endpoint, aggregate_dir)
+    columns = {}
+    for column, dtype in AGGREGATE_COLUMNS.items():
+        path = os.path.join(tier_dir, f"{column}.bin")
+        columns[column] = np.fromfile(path, dtype=dtype) if os.path.exists(path) else np.empty(0, dtype=dtype)
+    path = os.path.join(tier_dir, 'hist.bin')
+    hist = np.fromfile(path, dtype='u4') if os.path.exists(path) else np.empty(0, dtype='u4')
+    rows = min([len(values) for values in columns.values()] + [len(hist) // HIST_BUCKETS])
+    columns = {column: values[:rows] for column, values in columns.items()}
+    columns['hist'] = hist[:rows * HIST_BUCKETS].reshape(rows, HIST_BUCKETS)
+
+    lo = int(np.searchsorted(columns['bucket'], start, side='left')) if start is not None else 0
+    hi = int(np.searchsorted(columns['bucket'], end, side='left')) if end is not None else rows
+    return {column: values[lo:hi] for column, values in columns.items()}
+
+
+def _write_aggregates(tier, exchange, endpoint, aggregates, append, aggregate_dir=None):
+    tier_dir = _tier_dir(tier, exchange, endpoint, aggregate_dir)
+    os.makedirs(tier_dir, exist_ok=True)
+    for column in list(AGGREGATE_COLUMNS) + ['hist']:
+        dtype = AGGREGATE_COLUMNS.get(column, 'u4')
+        path = os.path.join(tier_dir, f"{column}.bin")
+        values = np.ascontiguousarray(aggregates[column], dtype=dtype)
+        if append:
+            with open(path, 'ab') as f:
+                values.tofile(f)
+        else:
+            values.tofile(path + '.tmp')
+            os.replace(path + '.tmp', path)
+
+
+def aggregate_samples(timestamps, latencies, ok, width):
+    """
+    Aggregate raw samples into fixed-width time buckets
+
+    Args:
+        timestamps (array): Sorted Unix timestamps in seconds
+        latencies (array): Latencies in ms
+        ok (array): Boolean mask of latency samples (not failed or throttled)
+        width (int): Bucket width in seconds
+
+    Returns:
+        dict: AGGREGATE_COLUMNS arrays plus 'hist', one row per non-empty bucket
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    if not len(timestamps):
+        return _empty_aggregates()
+    latencies = np.asarray(latencies, dtype=np.float64)
+    ok = np.asarray(ok, dtype=bool)
+
+    bucket_ids = np.floor(timestamps / width).astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, bucket_ids[1:] != bucket_ids[:-1]])
+    rows = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(timestamps)]))
+
+    hist = np.zeros((len(starts), HIST_BUCKETS), dtype=np.uint32)
+    np.add.at(hist, (rows[ok], hist_index(latencies[ok])), 1)
+    return {
+        'bucket': bucket_ids[starts].astype(np.float64) * width,
+        'count': np.add.reduceat(ok.astype(np.uint32), starts),
+        'errors': np.add.reduceat((~ok).astype(np.uint32), starts),
+        'min': np.minimum.reduceat(np.where(ok, latencies, np.inf), starts),
+        'max': np.maximum.reduceat(np.where(ok, latencies, -np.inf), starts),
+        'sum': np.add.reduceat(np.where(ok, latencies, 0.0), starts),
+        'hist': hist,
+    }
+
+
+def rebucket(aggregates, width):
+    """
+    Merge aggregates into coarser buckets
+
+    Args:
+        aggregates (dict): Aggregates with sorted buckets
+        width (int): New bucket width in seconds, a multiple of the old one
+
+    Returns:
+        dict: Merged aggregates
+    """
+    if not len(aggregates['bucket']):
+        return _empty_aggregates()
+    bucket_ids = np.floor(aggregates['bucket'] / width).astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, bucket_ids[1:] != bucket_ids[:-1]])
+    return {
+        'bucket': bucket_ids[starts].astype(np.float64) * width,
+        'count': np.add.reduceat(aggregates['count'], starts),
+        'errors': np.add.reduceat(aggregates['errors'], starts),
+        'min': np.minimum.reduceat(aggregates['min'], starts),
+        'max': np.maximum.reduceat(aggregates['max'], starts),
+        'sum': np.add.reduceat(aggregates['sum'], starts),
+        'hist': np.add.reduceat(aggregates['hist'], starts, axis=0),
+    }
+
+
+def _empty_aggregates():
+    empty = {column: np.empty(0, dtype=dtype) for column, dtype in AGGREGATE_COLUMNS.items()}
+    empty['hist'] = np.empty((0, HIST_BUCKETS), dtype=np.uint32)
+    return empty
+
+
+def _after(aggregates, bucket):
+    # Rows strictly after an already stored bucket
+    keep = aggregates['bucket'] > bucket
+    return {column: values[keep] for column, values in aggregates.items()}
+
+
+def compact_series(exchange, endpoint, now=None, dry_run=False, store_dir=None, aggregate_dir=None):
+    """
+    Apply the retention tiers to one series
+
+    Args:
+        exchange (str): Exchange identifier
+        endpoint (str): Endpoint key
+        now (float, optional): Current Unix time, defaults to time.time()
+        dry_run (bool): Only count what would change
+        store_dir (str, optional): Sample store root directory
+        aggregate_dir (str, optional): Aggregate root directory
+
+    Returns:
+        dict: raw_removed, minute_added, minute_removed, hour_added and
+        hour_removed row counts
+    """
+    now = now if now is not None else time.time()
+    stats = dict.fromkeys(('raw_removed', 'minute_added', 'minute_removed', 'hour_added', 'hour_removed'), 0)
+
+    # Raw samples -> minute aggregates, whole minutes only
+    raw_cutoff = math.floor((now - RETENTION['raw_days'] * 86400) / TIERS['minute']) * TIERS['minute']
+    old = read_samples(exchange, endpoint, end=raw_cutoff, columns=['timestamp', 'latency', 'flags'],
+                       store_dir=store_dir)
+    if len(old['timestamp']):
+        minutes = read_aggregates('minute', exchange, endpoint, aggregate_dir=aggregate_dir)
+        last = minutes['bucket'][-1] if len(minutes['bucket']) else -np.inf
+        ok = (old['flags'] & (FLAG_ERROR | FLAG_THROTTLED)) == 0
+        added = _after(aggregate_samples(old['timestamp'], old['latency'], ok, TIERS['minute']), last)
+        stats['minute_added'] = len(added['bucket'])
+        stats['raw_removed'] = len(old['timestamp'])
+        del old
+        if not dry_run:
+            _write_aggregates('minute', exchange, endpoint, added, append=True, aggregate_dir=aggregate_dir)
+            drop_before(exchange, endpoint, raw_cutoff, store_dir)
+
+    # Minute aggregates -> hour aggregates, whole hours only
+    minute_cutoff = math.floor((now - RETENTION['minute_days'] * 86400) / TIERS['hour']) * TIERS['hour']
+    minutes = read_aggregates('minute', exchange, endpoint, aggregate_dir=aggregate_dir)
+    expired = minutes['bucket'] < minute_cutoff
+    if expired.any():
+        hours = read_aggregates('hour', exchange, endpoint, aggregate_dir=aggregate_dir)
+        last = hours['bucket'][-1] if len(hours['bucket']) else -np.inf
+        added = _after(rebucket({column: values[expired] for column, values in minutes.items()}, TIERS['hour']), last)
+        stats['hour_added'] = len(added['bucket'])
+        stats['minute_removed'] = int(expired.sum())
+        if not dry_run:
+            _write_aggregates('hour', exchange, endpoint, added, append=True, aggregate_dir=aggregate_dir)
+            kept = {column: values[~expired] for column, values in minutes.items()}
+            _write_aggregates('minute', exchange, endpoint, kept, append=False, aggregate_dir=aggregate_dir)
+
+    # Hour aggregates past their retention are dropped
+    if RETENTION.get('hour_days'):
+        hours = read_aggregates('hour', exchange, endpoint, aggregate_dir=aggregate_dir)
+        expired = hours['bucket'] < now - RETENTION['hour_days'] * 86400
+        stats['hour_removed'] = int(expired.sum())
+        if expired.any() and not dry_run:
+            kept = {column: values[~expired] for column, values in hours.items()}
+            _write_aggregates('hour', exchange, endpoint, kept, append=False, aggregate_dir=aggregate_dir)
+    return stats
+
+
+def _remove(paths, dry_run):
+    for path in paths:
+        if not dry_run:
+            os.remove(path)
+    return len(paths)
+
+
+# pytest-benchmark run file: counter prefix, then the run name
+BENCHMARK_RUN = re.compile(r'^(?P<counter>\d+)_.*\.json$')
+
+
+def prune_benchmark_runs(benchmark_dir=None, keep=None, dry_run=False):
+    """
+    Delete the oldest pytest-benchmark run files beyond a limit
+
+    Runs are ordered by their numeric counter prefix (which outgrows four
+    digits), per machine directory.
+
+    Args:
+        benchmark_dir (str, optional): Directory to prune, defaults to both
+            the real and the mock run directory (see get_benchmark_dir)
+        keep (int, optional): Runs kept per machine, defaults to RETENTION['benchmark_runs']
+        dry_run (bool): Only count what would be deleted
+
+    Returns:
+        int: Files deleted
+    """
+    from .benchmark_core import get_benchmark_dir
+
+    benchmark_dirs = [benchmark_dir] if benchmark_dir else [get_benchmark_dir(mock) for mock in (False, True)]
+    keep = keep if keep is not None else RETENTION.get('benchmark_runs', 1000)
+    deleted = 0
+    for directory in benchmark_dirs:
+        for root, dirs, files in os.walk(directory):
+            runs = sorted((int(match.group('counter')), file)
+                          for match, file in ((BENCHMARK_RUN.match(file), file) for file in files) if match)
+            if len(runs) > keep:
+                deleted += _remove([os.path.join(root, file) for _, file in runs[:len(runs) - keep]], dry_run)
+    return deleted
+
+
+def trim_latency_data(data_dir=None, keep=None, dry_run=False):
+    """
+    Keep only the newest entries of the legacy data/*_latency_data.json files
+
+    Returns:
+        int: Entries removed
+    """
+    data_dir = data_dir or 'data'
+    keep = keep if keep is not None else DATA_STORAGE.get('max_entries', 1000)
+    removed = 0
+    for path in glob.glob(os.path.join(data_dir, '*_latency_data.json')):
+        try:
+            with open(path, 'r') as f:
+                entries = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error: Failed to read {path}: {e}")
+            continue
+        if len(entries) <= keep:
+            continue
+        entries.sort(key=lambda entry: float(entry.get('timestamp', 0)))
+        removed += len(entries) - keep
+        if not dry_run:
+            with open(path + '.tmp', 'w') as f:
+                json.dump(entries[-keep:], f, indent=2)
+            os.replace(path + '.tmp', path)
+    return removed
+
+
+# Timestamped outputs: directory key -> file name pattern; the group is the series a file belongs to
+TIMESTAMPED_FILES = {
+    'output_dir': re.compile(r'^(?P<series>\w+?_benchmark)_\d{8}_\d{6}\.(?P<ext>\w+)$'),
+    'result_dirs': re.compile(r'^\d{8}_\d{6}_(?P<series>\w+)\.(?P<ext>json)$'),
+}
+
+
+def prune_timestamped_files(directory, pattern, keep=None, dry_run=False):
+    """
+    Delete all but the newest timestamped files of each series in a directory
+
+    Returns:
+        int: Files deleted
+    """
+    keep = keep if keep is not None else RETENTION.get('keep_files', 50)
+    if not os.path.isdir(directory):
+        return 0
+    groups = {}
+    for file in os.listdir(directory):
+        match = pattern.match(file)
+        if match:
+            groups.setdefault((match.group('series'), match.group('ext')), []).append(file)
+    deleted = 0
+    for files in groups.values():
+        files.sort()  # The timestamp format sorts chronologically
+        deleted += _remove([os.path.join(directory, file) for file in files[:-keep]] if len(files) > keep else [],
+                           dry_run)
+    return deleted
+
+
+def run_retention(now=None, dry_run=False, store_dir=None, aggregate_dir=None, benchmark_dir=None):
+    """
+    Apply every retention rule
+
+    Args:
+        now (float, optional): Current Unix time, defaults to time.time()
+        dry_run (bool): Only count what would change
+        store_dir (str, optional): Sample store root directory
+        aggregate_dir (str, optional): Aggregate root directory
+        benchmark_dir (str, optional): pytest-benchmark directory, defaults to
+            ./.benchmarks and the mock run directory
+
+    Returns:
+        dict: Counts of compacted rows and deleted files
+    """
+    report = dict.fromkeys(('raw_removed', 'minute_added', 'minute_removed', 'hour_added', 'hour_removed'), 0)
+    for exchange, endpoint in list_series(get_store_dir(store_dir)):
+        for key, value in compact_series(exchange, endpoint, now, dry_run, store_dir, aggregate_dir).items():
+            report[key] += value
+
+    report['benchmark_runs_deleted'] = prune_benchmark_runs(benchmark_dir, dry_run=dry_run)
+    report['latency_entries_removed'] = trim_latency_data(dry_run=dry_run)
+    report['files_deleted'] = prune_timestamped_files(
+        DATA_STORAGE.get('output_dir', 'docs'), TIMESTAMPED_FILES['output_dir'], dry_run=dry_run)
+    for directory in RETENTION.get('result_dirs', []):
+        report['files_deleted'] += prune_timestamped_files(
+            directory, TIMESTAMPED_FILES['result_dirs'], dry_run=dry_run)
+    return report
+
+
+def main():
+    """Command line entry point"""
+    dry_run = '--dry-run' in sys.argv[1:]
+    started = time.perf_counter()
+    report = run_retention(dry_run=dry_run)
+    prefix = "Would remove" if dry_run else "Removed"
+    print(f"{prefix} {report['raw_removed']} raw samples into {report['minute_added']} minute aggregates")
+    print(f"{prefix} {report['minute_removed']} minute aggregates into {report['hour_added']} hour aggregates, "
+          f"{report['hour_removed']} expired hour aggregates")
+    print(f"{prefix} {report['benchmark_runs_deleted']} benchmark runs, {report['files_deleted']} old result files "
+          f"and {report['latency_entries_removed']} legacy latency entries")
+    print(f"Retention finished in {time.perf_counter() - started:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
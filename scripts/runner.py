@@ -0,0 +1,147 @@
+"""
+Parallel benchmark runner
+
+This module runs the pytest-benchmark suites of several exchanges at
+once. Tests are split into groups (one per exchange, or one per
+exchange endpoint) and every group runs in its own pytest worker
+process, so wall time is bounded by the slowest group rather than the
+sum of all of them. A failing endpoint only fails its own tests.
+
+pytest-xdist is not used: pytest-benchmark disables itself under xdist.
+Instead every worker writes --benchmark-json to a temporary file, and
+the runner merges them into one consolidated result file per run in
+.benchmarks/, in the same layout as --benchmark-save.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import ENDPOINTS, API_SETTINGS, ADAPTIVE, RUNNER, MOCK_SERVER
+from .benchmark_core import save_run_results, case_id, iter_cases
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def get_test_groups(exchanges=None, group_by=None):
+    """
+    Split the benchmark tests into groups run by separate workers
+
+    Args:
+        exchanges (list, optional): Exchange identifiers, defaults to all in ENDPOINTS
+        group_by (str, optional): 'exchange' or 'endpoint', defaults to RUNNER['group_by']
+
+    Returns:
+        list: (group name, list of pytest node ids) tuples
+    """
+    exchanges = exchanges if exchanges is not None else list(ENDPOINTS)
+    group_by = group_by or RUNNER.get('group_by', 'exchange')
+
+    module = os.path.join(PACKAGE_DIR, "endpoint_latency.py")
+    groups = {}
+    for exchange, endpoint_key, symbol in iter_cases(exchanges):
+        group = f"{exchange}-{endpoint_key}" if group_by == 'endpoint' else exchange
+        node_id = f"{module}::test_endpoint_benchmark[{case_id(exchange, endpoint_key, symbol)}]"
+        groups.setdefault(group, []).append(node_id)
+    return list(groups.items())
+
+
+def worker_env():
+    """Environment for worker processes, carrying in-process base URL, adaptive and mock mode overrides"""
+    env = dict(os.environ)
+    env['API_BASE_URLS'] = json.dumps(API_SETTINGS.get('base_urls', {}))
+    env['BENCHMARK_ADAPTIVE'] = '1' if ADAPTIVE.get('enabled', False) else '0'
+    env['BENCHMARK_MOCK'] = '1' if MOCK_SERVER.get('enabled', False) else '0'
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [os.path.dirname(PACKAGE_DIR), env.get('PYTHONPATH')]))
+    return env
+
+
+def run_group(name, node_ids, json_file, env=None):
+    """
+    Run one group of tests in a pytest worker process
+
+    Args:
+        name (str): Group name
+        node_ids (list): pytest node ids
+        json_file (str): Where the worker writes its --benchmark-json results
+        env (dict, optional): Worker environment
+
+    Returns:
+        tuple: (group name, pytest exit code, elapsed seconds)
+    """
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-m', 'pytest', '-v', '-p', 'no:cacheprovider', *node_ids, f"--benchmark-json={json_file}"],
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    elapsed = time.perf_counter() - start
+    # Print each worker's output in one piece instead of interleaved
+    print(f"\n--- {name} ({elapsed:.2f} s) ---")
+    print(completed.stdout.rstrip())
+    if completed.stderr.strip():
+        print(completed.stderr.rstrip())
+    return name, completed.returncode, elapsed
+
+
+def run_parallel_benchmarks(exchanges=None, name=None, workers=None, group_by=None):
+    """
+    Run the benchmarks of several exchanges in parallel worker processes
+
+    Args:
+        exchanges (list, optional): Exchange identifiers, defaults to all in ENDPOINTS
+        name (str, optional): Run name, defaults to the exchanges joined by '-'
+        workers (int, optional): Worker processes, defaults to RUNNER['workers']
+            or one per group
+        group_by (str, optional): 'exchange' or 'endpoint'
+
+    Returns:
+        tuple: (path of the consolidated result file or None, list of failed groups)
+    """
+    exchanges = exchanges if exchanges is not None else list(ENDPOINTS)
+    groups = get_test_groups(exchanges, group_by)
+    if not groups:
+        return None, []
+    workers = workers or RUNNER.get('workers') or len(groups)
+    print(f"\n=== Running {len(groups)} benchmark groups on {min(workers, len(groups))} workers ===")
+
+    env = worker_env()
+    benchmarks = []
+    failed = []
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        json_files = {group: os.path.join(tmp_dir, f"{group}.json") for group, _ in groups}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(run_group, group, node_ids, json_files[group], env)
+                for group, node_ids in groups
+            ]
+            outcomes = [future.result() for future in futures]
+
+        for group, returncode, _ in outcomes:
+            if returncode != 0:
+                failed.append(group)
+            try:
+                with open(json_files[group], 'r') as f:
+                    benchmarks.extend(json.load(f).get('benchmarks', []))
+            except (OSError, ValueError) as e:
+                print(f"Error reading results of group {group}: {str(e)}")
+
+    print(f"\nRan {len(groups)} groups in {time.perf_counter() - start:.2f} s"
+          + (f", failed: {', '.join(failed)}" if failed else ""))
+    if not benchmarks:
+        print("Error: No benchmark results, nothing saved")
+        return None, failed
+
+    result_file = save_run_results(benchmarks, name or "-".join(exchanges))
+    print(f"Results saved: {result_file}")
+    return result_file, failed
+
+
+if __name__ == "__main__":
+    result_file, failed = run_parallel_benchmarks(sys.argv[1:] or None)
+    sys.exit(1 if result_file is None or failed else 0)
@@ -0,0 +1,471 @@
+"""
+Append-only columnar sample store
+
+This module stores every latency sample in a local, append-only columnar
+layout so that reports can read a time window without parsing history:
+
+    <store_dir>/<exchange>/<endpoint>/<column>.bin
+
+Each column is a flat file of fixed-size native values, appended with the
+standard library only. Readers memory-map the columns with NumPy and
+slice them by time with a binary search on the timestamp column, so a
+window read returns zero-copy views regardless of how much history the
+store holds. Timestamps within a series must be appended in
+non-decreasing order.
+"""
+import os
+import sys
+import json
+import time
+import datetime
+from array import array
+
+from .config import DATA_STORAGE, MOCK_SERVER, EXCHANGES
+
+# Column name -> array typecode (also understood by NumPy as a dtype)
+COLUMNS = {
+    'timestamp': 'd',  # Unix time in seconds
+    'latency': 'd',    # Total latency in ms
+    'dns': 'f',        # Phase timings in ms
+    'connect': 'f',
+    'tls': 'f',
+    'ttfb': 'f',
+    'transfer': 'f',
+    'status': 'h',     # HTTP status code, 0 if unknown
+    'flags': 'B',      # FLAG_* bits
+}
+
+FLAG_WARM = 1      # Served on a reused connection
+FLAG_SUMMARY = 2   # Aggregate imported from a run without raw samples
+FLAG_ERROR = 4     # Request failed or returned an error status
+FLAG_THROTTLED = 8 # Rejected by the exchange's rate limit, not a latency sample
+
+
+def get_store_dir(store_dir=None):
+    """Get the store root directory; mock mode records to a separate store"""
+    if store_dir:
+        return store_dir
+    if MOCK_SERVER.get('enabled'):
+        return MOCK_SERVER['store_dir']
+    return DATA_STORAGE.get('store_dir', os.path.join('data', 'store'))
+
+
+def _series_dir(exchange, endpoint, store_dir=None):
+    return os.path.join(get_store_dir(store_dir), exchange, endpoint)
+
+
+def _column_length(path, typecode):
+    try:
+        return os.path.getsize(path) // array(typecode).itemsize
+    except OSError:
+        return 0
+
+
+def series_length(exchange, endpoint, store_dir=None):
+    """
+    Get the number of complete rows stored for a series
+
+    A row only counts once every column has been written.
+    """
+    series_dir = _series_dir(exchange, endpoint, store_dir)
+    return min(_column_length(os.path.join(series_dir, f"{column}.bin"), typecode)
+               for column, typecode in COLUMNS.items())
+
+
+def last_timestamp(exchange, endpoint, store_dir=None):
+    """
+    Get the timestamp of the last stored row of a series
+
+    Returns:
+        float: Unix time in seconds, or None if the series is empty
+    """
+    rows = series_length(exchange, endpoint, store_dir)
+    if not rows:
+        return None
+    path = os.path.join(_series_dir(exchange, endpoint, store_dir), 'timestamp.bin')
+    values = array(COLUMNS['timestamp'])
+    with open(path, 'rb') as f:
+        f.seek((rows - 1) * values.itemsize)
+        values.fromfile(f, 1)
+    return values[0]
+
+
+def series_generation(exchange, endpoint, store_dir=None):
+    """
+    Get the rewrite generation of a series
+
+    The generation starts at 0 and is bumped whenever rows already stored
+    are rewritten (merge_samples, drop_before), so caches derived from
+    the series can tell a plain append from a rewrite.
+
+    Returns:
+        int: Generation
+    """
+    try:
+        with open(os.path.join(_series_dir(exchange, endpoint, store_dir), 'generation'), 'r') as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def _bump_generation(exchange, endpoint, store_dir=None):
+    path = os.path.join(_series_dir(exchange, endpoint, store_dir), 'generation')
+    with open(path + '.tmp', 'w') as f:
+        f.write(str(series_generation(exchange, endpoint, store_dir) + 1))
+    os.replace(path + '.tmp', path)
+
+
+def sample_to_row(sample):
+    """
+    Convert a benchmark sample dict to a store row
+
+    Args:
+        sample (dict): Sample with 'latency' and optional timestamp,
+            phase timings, status and connection state
+
+    Returns:
+        dict: Column name to value
+    """
+    flags = 0
+    if sample.get('connection') == 'warm':
+        flags |= FLAG_WARM
+    if sample.get('error') or sample.get('status', 0) >= 400:
+        flags |= FLAG_ERROR
+    if sample.get('throttled'):
+        flags |= FLAG_THROTTLED
+    flags |= sample.get('flags', 0)
+
+    return {
+        'timestamp': sample.get('timestamp', time.time()),
+        'latency': sample['latency'],
+        'dns': sample.get('dns', 0.0),
+        'connect': sample.get('connect', 0.0),
+        'tls': sample.get('tls', 0.0),
+        'ttfb': sample.get('ttfb', 0.0),
+        'transfer': sample.get('transfer', 0.0),
+        'status': sample.get('status', 0),
+        'flags': flags,
+    }
+
+
+def append_samples(exchange, endpoint, samples, store_dir=None):
+    """
+    Append samples to a series
+
+    Args:
+        exchange (str): Exchange identifier
+        endpoint (str): Endpoint key
+        samples (list): Sample dicts (see sample_to_row)
+        store_dir (str, optional): Store root directory
+
+    Returns:
+        int: Number of rows appended
+
+    Raises:
+        ValueError: If the samples are older than the last stored row
+    """
+    rows = sorted((sample_to_row(s) for s in samples), key=lambda r: r['timestamp'])
+    if not rows:
+        return 0
+
+    last = last_timestamp(exchange, endpoint, store_dir)
+    if last is not None and rows[0]['timestamp'] < last:
+        raise ValueError(f"Samples for {exchange}/{endpoint} are older than the last stored row")
+
+    series_dir = _series_dir(exchange, endpoint, store_dir)
+    os.makedirs(series_dir, exist_ok=True)
+    length = series_length(exchange, endpoint, store_dir)
+
+    for column, typecode in COLUMNS.items():
+        path = os.path.join(series_dir, f"{column}.bin")
+        with open(path, 'ab') as f:
+            # Drop the tail of a column left longer than the others by an interrupted append
+            if _column_length(path, typecode) > length:
+                f.truncate(length * array(typecode).itemsize)
+            array(typecode, (row[column] for row in rows)).tofile(f)
+
+    return len(rows)
+
+
+def _read_column(exchange, endpoint, column, rows, store_dir=None):
+    values = array(COLUMNS[column])
+    if rows:
+        with open(os.path.join(_series_dir(exchange, endpoint, store_dir), f"{column}.bin"), 'rb') as f:
+            values.fromfile(f, rows)
+    return values
+
+
+def merge_samples(exchange, endpoint, samples, store_dir=None):
+    """
+    Insert samples into a series in timestamp order
+
+    Unlike append_samples this accepts samples older than the last stored
+    row, at the cost of rewriting the whole series. Meant for one-off
+    imports, not for recording.
+
+    Returns:
+        int: Number of rows inserted
+    """
+    new_rows = [sample_to_row(s) for s in samples]
+    if not new_rows:
+        return 0
+
+    last = last_timestamp(exchange, endpoint, store_dir)
+    if last is None or min(row['timestamp'] for row in new_rows) >= last:
+        return append_samples(exchange, endpoint, samples, store_dir)
+
+    length = series_length(exchange, endpoint, store_dir)
+    existing = {column: _read_column(exchange, endpoint, column, length, store_dir) for column in COLUMNS}
+    rows = [{column: existing[column][i] for column in COLUMNS} for i in range(length)] + new_rows
+    rows.sort(key=lambda row: row['timestamp'])
+
+    series_dir = _series_dir(exchange, endpoint, store_dir)
+    for column, typecode in COLUMNS.items():
+        path = os.path.join(series_dir, f"{column}.bin")
+        with open(path + '.tmp', 'wb') as f:
+            array(typecode, (row[column] for row in rows)).tofile(f)
+        os.replace(path + '.tmp', path)
+    _bump_generation(exchange, endpoint, store_dir)
+
+    return len(new_rows)
+
+
+def drop_before(exchange, endpoint, cutoff, store_dir=None):
+    """
+    Remove the rows of a series older than a cutoff
+
+    The remaining rows are copied to new column files that atomically
+    replace the old ones. Recorders appending to the series at the same
+    time may lose their rows, so run this between runs.
+
+    Args:
+        exchange (str): Exchange identifier
+        endpoint (str): Endpoint key
+        cutoff (float): Unix time in seconds; rows before it are removed
+        store_dir (str, optional): Store root directory
+
+    Returns:
+        int: Number of rows removed
+    """
+    import numpy as np
+
+    rows = series_length(exchange, endpoint, store_dir)
+    if not rows:
+        return 0
+    series_dir = _series_dir(exchange, endpoint, store_dir)
+    timestamps = np.memmap(os.path.join(series_dir, 'timestamp.bin'), dtype=COLUMNS['timestamp'], mode='r', shape=(rows,))
+    removed = int(np.searchsorted(timestamps, cutoff, side='left'))
+    del timestamps
+    if not removed:
+        return 0
+
+    for column, typecode in COLUMNS.items():
+        path = os.path.join(series_dir, f"{column}.bin")
+        itemsize = array(typecode).itemsize
+        with open(path, 'rb') as src, open(path + '.tmp', 'wb') as dst:
+            src.seek(removed * itemsize)
+            dst.write(src.read((rows - removed) * itemsize))
+        os.replace(path + '.tmp', path)
+    _bump_generation(exchange, endpoint, store_dir)
+    return removed
+
+
+def list_series(store_dir=None):
+    """
+    List the series held in the store
+
+    Returns:
+        list: (exchange, endpoint) tuples
+    """
+    root = get_store_dir(store_dir)
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        (exchange, endpoint)
+        for exchange in os.listdir(root) if os.path.isdir(os.path.join(root, exchange))
+        for endpoint in os.listdir(os.path.join(root, exchange))
+        if os.path.isdir(os.path.join(root, exchange, endpoint))
+    )
+
+
+def read_samples(exchange, endpoint, start=None, end=None, columns=None, store_dir=None):
+    """
+    Read a time window of a series as zero-copy NumPy views
+
+    Args:
+        exchange (str): Exchange identifier
+        endpoint (str): Endpoint key
+        start (float, optional): Window start, Unix time in seconds (inclusive)
+        end (float, optional): Window end, Unix time in seconds (exclusive)
+        columns (list, optional): Columns to return, defaults to all
+        store_dir (str, optional): Store root directory
+
+    Returns:
+        dict: Column name to read-only memory-mapped array
+    """
+    import numpy as np
+
+    columns = list(columns or COLUMNS)
+    rows = series_length(exchange, endpoint, store_dir)
+    if not rows:
+        return {column: np.empty(0, dtype=COLUMNS[column]) for column in columns}
+
+    series_dir = _series_dir(exchange, endpoint, store_dir)
+
+    def open_column(column):
+        path = os.path.join(series_dir, f"{column}.bin")
+        return np.memmap(path, dtype=COLUMNS[column], mode='r', shape=(rows,))
+
+    timestamps = open_column('timestamp')
+    lo = int(np.searchsorted(timestamps, start, side='left')) if start is not None else 0
+    hi = int(np.searchsorted(timestamps, end, side='left')) if end is not None else rows
+
+    return {
+        column: (timestamps if column == 'timestamp' else open_column(column))[lo:hi]
+        for column in columns
+    }
+
+
+def read_exchange(exchange, start=None, end=None, columns=None, store_dir=None):
+    """
+    Read a time window of every endpoint of an exchange, merged by time
+
+    Unlike read_samples this returns copies, since the series are concatenated.
+
+    Returns:
+        dict: Column name to array, plus 'endpoint' with each row's endpoint key
+    """
+    import numpy as np
+
+    columns = list(columns or COLUMNS)
+    if 'timestamp' not in columns:
+        columns.append('timestamp')
+
+    parts = []
+    for series_exchange, endpoint in list_series(store_dir):
+        if series_exchange == exchange:
+            window = read_samples(exchange, endpoint, start, end, columns, store_dir)
+            window['endpoint'] = np.full(len(window['timestamp']), endpoint)
+            parts.append(window)
+
+    if not parts:
+        result = {column: np.empty(0, dtype=COLUMNS[column]) for column in columns}
+        result['endpoint'] = np.empty(0, dtype=str)
+        return result
+
+    merged = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+    order = np.argsort(merged['timestamp'], kind='stable')
+    return {key: values[order] for key, values in merged.items()}
+
+
+def _parse_endpoint(benchmark):
+    # Series name (see benchmark_core.series_name) from extra_info, or the endpoint
+    # key from a test_<exchange>_<endpoint>_benchmark name of a single-symbol run
+    from .benchmark_core import series_name
+
+    extra_info = benchmark.get('extra_info', {})
+    if extra_info.get('endpoint'):
+        symbol = extra_info.get('symbol') or benchmark.get('params', {}).get('symbol')
+        return series_name(benchmark.get('group', 'unknown'), extra_info['endpoint'], symbol)
+    group = benchmark.get('group', 'unknown')
+    name = benchmark.get('name', '').replace('test_', '', 1).replace('_benchmark', '')
+    prefix = f"{group}_"
+    return name[len(prefix):] if name.startswith(prefix) else name
+
+
+def import_benchmark_files(benchmark_dir=None, store_dir=None):
+    """
+    Import pytest-benchmark JSON files into the store
+
+    Raw samples are imported when a run recorded them in extra_info.
+    Every endpoint and symbol goes to its own series, named like the
+    live recordings (see benchmark_core.series_name).
+    Benchmarks marked as mock runs are only imported in mock mode, and
+    only those.
+    Older runs only have aggregate stats and are imported as a single
+    FLAG_SUMMARY row holding the run mean. Rows whose timestamp is already
+    stored (for example because they were recorded live) are skipped, so
+    importing twice is safe.
+
+    Args:
+        benchmark_dir (str, optional): Directory to scan, defaults to
+            ./.benchmarks, or the mock run directory in mock mode
+        store_dir (str, optional): Store root directory
+
+    Returns:
+        int: Number of rows imported
+    """
+    from .benchmark_core import get_benchmark_dir
+
+    if not benchmark_dir:
+        benchmark_dir = get_benchmark_dir()
+    mock = bool(MOCK_SERVER.get('enabled'))
+
+    runs = []
+    for root, dirs, files in os.walk(benchmark_dir):
+        for file in files:
+            if not file.endswith('.json'):
+                continue
+            file_path = os.path.join(root, file)
+            try:
+                with open(file_path, 'r') as f:
+                    data = json.load(f)
+                run_time = datetime.datetime.fromisoformat(data['datetime']).timestamp()
+                runs.append((run_time, file, data.get('benchmarks', [])))
+            except Exception as e:
+                print(f"Error processing {file}: {str(e)}")
+
+    imported = 0
+    stored = {}
+    for run_time, file, benchmarks in sorted(runs, key=lambda run: run[0]):
+        for benchmark in benchmarks:
+            exchange = benchmark.get('group', 'unknown')
+            if exchange not in EXCHANGES:
+                # Offline suites (decode_latency.py, startup_latency.py) are not exchange series
+                continue
+            if bool(benchmark.get('extra_info', {}).get('mock')) != mock:
+                # Mock runs never mix with real exchange data
+                continue
+            endpoint = _parse_endpoint(benchmark)
+
+            samples = benchmark.get('extra_info', {}).get('samples')
+            if samples:
+                samples = [dict(s, timestamp=s.get('timestamp', run_time)) for s in samples]
+            else:
+                samples = [{
+                    'timestamp': run_time,
+                    'latency': benchmark.get('stats', {}).get('mean', 0) * 1000,  # to ms
+                    'flags': FLAG_SUMMARY
+                }]
+
+            # Skip rows already in the store (recorded live or imported before)
+            key = (exchange, endpoint)
+            if key not in stored:
+                length = series_length(exchange, endpoint, store_dir)
+                stored[key] = set(_read_column(exchange, endpoint, 'timestamp', length, store_dir))
+            samples = [s for s in samples if s['timestamp'] not in stored[key]]
+
+            try:
+                imported += merge_samples(exchange, endpoint, samples, store_dir)
+                stored[key].update(s['timestamp'] for s in samples)
+            except (OSError, ValueError) as e:
+                print(f"Error importing {file}: {str(e)}")
+
+    return imported
+
+
+def main():
+    """Command line entry point: import .benchmarks files into the store"""
+    args = sys.argv[1:]
+    if not args or args[0] != 'import':
+        print("Usage: python -m scripts.sample_store import [benchmark_dir]")
+        return 1
+
+    benchmark_dir = args[1] if len(args) > 1 else None
+    imported = import_benchmark_files(benchmark_dir)
+    print(f"Imported {imported} samples into {get_store_dir()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
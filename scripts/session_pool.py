@@ -0,0 +1,157 @@
+"""
+Pooled HTTP sessions for API latency monitoring
+
+This module keeps one pooled requests.Session per exchange so that
+benchmark rounds can run on long-lived connections, and tags every
+response with the state of the connection it was served on:
+"cold" (a new connection was opened) or "warm" (a connection was reused).
+"""
+import threading
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+
+from .config import EXCHANGES, ENDPOINTS, API_SETTINGS, CONNECTION_POOL
+from .transport import InstrumentedAdapter
+
+_sessions = {}
+_prewarmed = set()
+_lock = threading.Lock()
+
+
+def resolve_url(exchange, url):
+    """
+    Apply the exchange's base URL override, if any
+
+    Replaces the scheme and host of ``url`` with API_SETTINGS['base_urls'][exchange],
+    keeping path and query, so that an exchange can be pointed at a mock server.
+
+    Args:
+        exchange (str): Exchange identifier
+        url (str): Endpoint URL from ENDPOINTS
+
+    Returns:
+        str: URL to request
+    """
+    base_url = API_SETTINGS.get('base_urls', {}).get(exchange)
+    if not base_url:
+        return url
+    base = urlsplit(base_url)
+    parts = urlsplit(url)
+    return urlunsplit((base.scheme, base.netloc, base.path.rstrip('/') + parts.path, parts.query, ''))
+
+
+def get_symbols(exchange):
+    """
+    Get the symbols an exchange's endpoints are probed with
+
+    Args:
+        exchange (str): Exchange identifier
+
+    Returns:
+        list: Symbols from EXCHANGES, the first one being the default
+    """
+    return EXCHANGES.get(exchange, {}).get('symbols') or ['']
+
+
+def endpoint_url(exchange, endpoint_key, symbol=None):
+    """
+    Build the URL to request for an endpoint and symbol
+
+    Args:
+        exchange (str): Exchange identifier
+        endpoint_key (str): Endpoint key
+        symbol (str, optional): Symbol, defaults to the exchange's first symbol
+
+    Returns:
+        str: URL with the symbol filled in and the base URL override applied
+    """
+    if symbol is None:
+        symbol = get_symbols(exchange)[0]
+    url = ENDPOINTS[exchange][endpoint_key]['url'].replace('{symbol}', symbol)
+    return resolve_url(exchange, url)
+
+
+def create_session(pool_size=None, pinned_address=None):
+    """
+    Create a requests session backed by an InstrumentedAdapter
+
+    Args:
+        pool_size (int, optional): Maximum connections kept per host
+        pinned_address (str, optional): Connect to this IP address instead of
+            resolving hosts (SNI and Host header are unchanged)
+
+    Returns:
+        requests.Session: New session
+    """
+    if pool_size is None:
+        pool_size = CONNECTION_POOL.get('pool_size', 10)
+
+    session = requests.Session()
+    session.headers['User-Agent'] = API_SETTINGS.get('user_agent', session.headers['User-Agent'])
+    adapter = InstrumentedAdapter(pool_connections=pool_size, pool_maxsize=pool_size, pinned_address=pinned_address)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_session(exchange):
+    """
+    Get the shared pooled session for an exchange
+
+    Args:
+        exchange (str): Exchange identifier
+
+    Returns:
+        requests.Session: Pooled session, created on first use
+    """
+    with _lock:
+        session = _sessions.get(exchange)
+        if session is None:
+            session = _sessions[exchange] = create_session()
+        return session
+
+
+def prewarm_session(exchange):
+    """
+    Open a connection to every host used by an exchange's endpoints
+
+    The warm-up responses are discarded. Each exchange is warmed once per
+    process; failures are ignored and simply leave the first round cold.
+
+    Args:
+        exchange (str): Exchange identifier
+
+    Returns:
+        int: Number of hosts warmed
+    """
+    with _lock:
+        if exchange in _prewarmed:
+            return 0
+        _prewarmed.add(exchange)
+
+    session = get_session(exchange)
+    warmed_hosts = {}
+    for endpoint_key in ENDPOINTS.get(exchange, {}):
+        url = endpoint_url(exchange, endpoint_key)
+        host = urlsplit(url).netloc
+        if host not in warmed_hosts:
+            warmed_hosts[host] = url
+
+    warmed = 0
+    for url in warmed_hosts.values():
+        try:
+            session.get(url, timeout=API_SETTINGS.get('timeout', 10))
+            warmed += 1
+        except requests.exceptions.RequestException as e:
+            print(f"Warning: failed to pre-warm {url}: {str(e)}")
+    return warmed
+
+
+def close_sessions():
+    """Close all pooled sessions and forget their warm-up state"""
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+        _prewarmed.clear()
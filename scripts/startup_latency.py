@@ -0,0 +1,70 @@
+"""
+Startup Latency Benchmark Module
+
+This module guards the cold start of the probe CLI: it times a fresh
+interpreter importing scripts.probe against STARTUP['import_budget_ms'],
+and checks that none of STARTUP['heavy_modules'] is pulled in on the
+way. Every round runs in a new process, so nothing is cached in
+sys.modules between rounds.
+"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from .config import STARTUP
+
+PACKAGE_PARENT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Prints the heavy modules loaded by importing the probe entry point
+IMPORT_PROBE = (
+    "import json, sys\n"
+    "import scripts.probe\n"
+    "print(json.dumps([name for name in {heavy!r} if name in sys.modules]))\n"
+)
+
+
+def run_import(code):
+    """
+    Run code in a fresh interpreter that can import the package
+
+    Returns:
+        subprocess.CompletedProcess: Finished process, stdout captured
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [PACKAGE_PARENT, env.get('PYTHONPATH')]))
+    return subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True)
+
+
+@pytest.mark.benchmark(disable_gc=True, warmup=False)
+def test_probe_startup_benchmark(benchmark):
+    """Benchmark a cold interpreter start importing the probe CLI"""
+    benchmark.group = "startup"
+    benchmark.extra_info['budget_ms'] = STARTUP['import_budget_ms']
+
+    benchmark.pedantic(run_import, args=("import scripts.probe",), rounds=5, iterations=1, warmup_rounds=1)
+    if benchmark.disabled:
+        return
+
+    median_ms = benchmark.stats.stats.median * 1000
+    assert median_ms <= STARTUP['import_budget_ms'], \
+        f"Probe startup {median_ms:.0f} ms exceeds the {STARTUP['import_budget_ms']} ms budget"
+
+
+def test_probe_import_graph():
+    """Importing the probe CLI must not load plotting, pandas, pytest or NumPy"""
+    completed = run_import(IMPORT_PROBE.format(heavy=list(STARTUP['heavy_modules'])))
+    loaded = json.loads(completed.stdout)
+    assert not loaded, f"scripts.probe imports heavy modules: {', '.join(loaded)}"
+
+
+def run_all_benchmarks():
+    """Run the startup benchmarks"""
+    print("\n=== Running Startup Benchmarks ===")
+    pytest.main(["-v", __file__, "--benchmark-save=startup"])
+
+
+if __name__ == "__main__":
+    run_all_benchmarks()
@@ -0,0 +1,192 @@
+"""
+Instrumented HTTP transport for API latency monitoring
+
+This module provides a requests transport adapter whose connections
+record the duration of every phase of a request:
+
+- dns: host name resolution
+- connect: TCP connect, including failed attempts on addresses tried first
+- tls: TLS handshake
+- ttfb: request sent until response headers received (server think time + RTT)
+- transfer: response body download
+
+Connection phases (dns, connect, tls) are zero for requests served on a
+reused connection. A request counts as cold when its connection object
+connected for it, including urllib3's transparent reconnect of a dropped
+keep-alive connection on the same object.
+
+Responses also carry the wall-clock times at which the request was sent
+and the response headers arrived, which bracket the server's own
+timestamp of the request (see scripts/clock_offset.py).
+"""
+import socket
+import time
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NameResolutionError, ConnectTimeoutError
+from urllib3.util.connection import allowed_gai_family
+
+PHASES = ('dns', 'connect', 'tls', 'ttfb', 'transfer')
+
+
+class TimedConnectionMixin:
+    """Connection mixin recording connect phases and time to first byte"""
+    requests_sent = 0
+    connected_for_request = False  # connect() ran since the last response
+    cold = True                    # The last response was the first on a new socket
+    connected_at = None
+    request_started_at = None
+    ttfb = 0.0
+    pinned_address = None
+    peer_address = None
+
+    def _new_conn(self):
+        # Resolve separately so DNS and TCP connect can be told apart
+        start = time.perf_counter()
+        host = self._dns_host
+        if self.pinned_address:
+            # Connect to a fixed edge; SNI and Host header still use self.host
+            addresses = [self.pinned_address]
+        else:
+            try:
+                infos = socket.getaddrinfo(host, self.port, allowed_gai_family(), socket.SOCK_STREAM)
+            except socket.gaierror as e:
+                raise NameResolutionError(self.host, self, e) from e
+            addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        resolved = time.perf_counter()
+
+        # Try every address in resolver order, like urllib3's create_connection
+        error = None
+        try:
+            for address in addresses:
+                self._dns_host = address
+                try:
+                    sock = super()._new_conn()
+                except ConnectTimeoutError as e:  # Includes NewConnectionError
+                    error = e
+                    continue
+                self.peer_address = address
+                break
+            else:
+                raise error
+        finally:
+            self._dns_host = host
+
+        self.connect_timings['dns'] = (resolved - start) * 1000
+        self.connect_timings['connect'] = (time.perf_counter() - resolved) * 1000
+        return sock
+
+    def connect(self):
+        start = time.perf_counter()
+        self.connect_timings = {'dns': 0.0, 'connect': 0.0, 'tls': 0.0}
+        super().connect()
+        self.connected_at = time.perf_counter()
+        self.connected_for_request = True
+
+        if isinstance(self, HTTPSConnection):
+            elapsed = (self.connected_at - start) * 1000
+            tls = elapsed - self.connect_timings['dns'] - self.connect_timings['connect']
+            self.connect_timings['tls'] = max(tls, 0.0)
+
+    def request(self, *args, **kwargs):
+        self.requests_sent += 1
+        self.request_started_at = time.perf_counter()
+        return super().request(*args, **kwargs)
+
+    def getresponse(self, *args, **kwargs):
+        response = super().getresponse(*args, **kwargs)
+        # Plain HTTP connects lazily inside request(); don't count that as TTFB
+        sent_at = max(self.request_started_at, self.connected_at or 0.0)
+        self.ttfb = (time.perf_counter() - sent_at) * 1000
+        self.first_byte_wall = time.time()
+        # Cold only if this request paid for the connection, whatever the object's history
+        self.cold = self.connected_for_request
+        self.connected_for_request = False
+        return response
+
+
+class TimedHTTPConnection(TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class PinnedPoolMixin:
+    """Connection pool mixin handing its pinned edge address to new connections"""
+    pinned_address = None
+
+    def _new_conn(self):
+        conn = super()._new_conn()
+        conn.pinned_address = self.pinned_address
+        return conn
+
+
+class TimedHTTPConnectionPool(PinnedPoolMixin, HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(PinnedPoolMixin, HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class InstrumentedAdapter(HTTPAdapter):
+    """
+    Transport adapter that records per-phase request timings
+
+    Each response gets two extra attributes:
+
+    - ``connection_state``: "cold" when the connection was opened (or
+      reopened) for the request, "warm" otherwise
+    - ``phase_timings``: dict of phase name to duration in ms (see PHASES)
+    - ``wall_times``: (request sent, first response byte) as Unix timestamps
+    - ``peer_address``: IP address the connection was made to
+
+    Args:
+        pinned_address (str, optional): Connect every host to this IP address
+            instead of resolving it, e.g. one CDN edge (see scripts/edges.py)
+    """
+    pinned_address = None
+
+    def __init__(self, *args, pinned_address=None, **kwargs):
+        self.pinned_address = pinned_address
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        pool_classes = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool,
+        }
+        if self.pinned_address:
+            pool_classes = {
+                scheme: type(f"Pinned{cls.__name__}", (cls,), {'pinned_address': self.pinned_address})
+                for scheme, cls in pool_classes.items()
+            }
+        self.poolmanager.pool_classes_by_scheme = pool_classes
+
+    def send(self, request, stream=False, **kwargs):
+        # Stream first so the connection is still attached to the response
+        response = super().send(request, stream=True, **kwargs)
+        connection = getattr(response.raw, 'connection', None)
+        cold = getattr(connection, 'cold', True)
+
+        timings = {phase: 0.0 for phase in PHASES}
+        if cold and connection is not None:
+            timings.update(getattr(connection, 'connect_timings', {}))
+        timings['ttfb'] = getattr(connection, 'ttfb', 0.0)
+
+        if not stream:
+            start = time.perf_counter()
+            response.content
+            timings['transfer'] = (time.perf_counter() - start) * 1000
+
+        first_byte = getattr(connection, 'first_byte_wall', None)
+        response.wall_times = (first_byte - timings['ttfb'] / 1000, first_byte) if first_byte else None
+        response.connection_state = 'cold' if cold else 'warm'
+        response.peer_address = getattr(connection, 'peer_address', None)
+        response.phase_timings = timings
+        return response
@@ -0,0 +1,484 @@
+"""
+WebSocket market-data latency probe
+
+This module subscribes to the public WebSocket channels configured in
+WS_ENDPOINTS, timestamps every message on arrival and measures delivery
+lag: local receipt time minus the event timestamp set by the exchange.
+It also tracks throughput (messages per second), silent gaps, sequence
+gaps (where the channel carries sequence numbers) and reconnects.
+
+Memory stays bounded however long a probe runs: each channel keeps only
+its most recent lag samples in a fixed-size deque, while the full lag
+distribution goes into a LatencyHistogram.
+
+Delivery lag compares two different clocks, so it is only as accurate
+as the local clock's synchronisation with the exchange.
+
+Requires the optional websockets package (pip install websockets).
+Run with:
+
+    python -m scripts.ws_probe [exchange|all] [seconds] [--mock | --replay DIR] [--record DIR]
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import deque
+from datetime import datetime
+
+from .config import WS_ENDPOINTS, WS_SETTINGS
+from .histogram import LatencyHistogram
+
+
+def import_websockets():
+    """Import the optional websockets package, with an informative error if missing"""
+    try:
+        import websockets
+    except ImportError:
+        raise ImportError(
+            "WebSocket probing requires the 'websockets' package: pip install websockets"
+        ) from None
+    return websockets
+
+
+def subscribe_message(exchange, channels):
+    """
+    Build the subscribe request for a list of channels
+
+    Args:
+        exchange (str): Exchange identifier
+        channels (list): Channel argument dicts from WS_ENDPOINTS
+
+    Returns:
+        dict: Subscribe message (OKX and Bitget share the same shape)
+    """
+    return {"op": "subscribe", "args": channels}
+
+
+def channel_name(message):
+    """Name of the channel a push message belongs to, e.g. 'tickers:BTC-USDT'"""
+    arg = message.get('arg', {})
+    return f"{arg.get('channel')}:{arg.get('instId')}"
+
+
+def _event_time(item):
+    # Event timestamp (ms) of one data item
+    if isinstance(item, dict):
+        for key in ('ts', 'systemTime', 'timestamp'):
+            if key in item:
+                return int(item[key])
+    elif isinstance(item, (list, tuple)) and item:
+        # Bitget trade pushes are [ts, price, size, side]
+        return int(item[0])
+    return None
+
+
+def extract_event_times(message):
+    """
+    Get the event timestamps carried by a push message
+
+    Args:
+        message (dict): Decoded push message
+
+    Returns:
+        list: Event timestamps in ms, one per data item that has one
+    """
+    data = message.get('data') or []
+    if isinstance(data, dict):
+        data = [data]
+    times = []
+    for item in data:
+        event_time = _event_time(item)
+        if event_time is not None:
+            times.append(event_time)
+    return times
+
+
+def shift_event_times(message, shift_ms):
+    """
+    Move every event timestamp of a push message by shift_ms, in place
+
+    Used by the replay server so that recorded frames keep their original
+    delivery lag when replayed later.
+
+    Args:
+        message (dict): Decoded push message
+        shift_ms (int): Milliseconds to add
+
+    Returns:
+        dict: The same message
+    """
+    data = message.get('data') or []
+    for item in data if isinstance(data, list) else [data]:
+        if isinstance(item, dict):
+            for key in ('ts', 'systemTime', 'timestamp'):
+                if key in item:
+                    shifted = int(item[key]) + shift_ms
+                    item[key] = str(shifted) if isinstance(item[key], str) else shifted
+                    break
+        elif isinstance(item, list) and item:
+            shifted = int(item[0]) + shift_ms
+            item[0] = str(shifted) if isinstance(item[0], str) else shifted
+    return message
+
+
+def extract_sequence(message):
+    """
+    Get (seq, prev_seq) for channels that carry sequence numbers
+
+    Args:
+        message (dict): Decoded push message
+
+    Returns:
+        tuple: (seq, prev_seq), either of which may be None
+    """
+    data = message.get('data') or []
+    item = data[0] if isinstance(data, list) and data else data
+    if not isinstance(item, dict):
+        return None, None
+    seq = item.get('seqId')
+    prev_seq = item.get('prevSeqId')
+    return seq, (prev_seq if prev_seq is None or prev_seq >= 0 else None)
+
+
+class ChannelStats:
+    """
+    Delivery statistics of one channel
+
+    Args:
+        max_samples (int): Number of recent lag samples kept
+        gap_ms (float): Silence longer than this counts as a gap
+    """
+
+    def __init__(self, max_samples=None, gap_ms=None):
+        self.recent = deque(maxlen=max_samples or WS_SETTINGS['max_samples'])
+        self.histogram = LatencyHistogram()
+        self.gap_ms = gap_ms if gap_ms is not None else WS_SETTINGS['gap_ms']
+        self.messages = 0
+        self.events = 0
+        self.lag_sum = 0.0
+        self.lag_min = None
+        self.lag_max = None
+        self.negative_lags = 0
+        self.first_receipt = None
+        self.last_receipt = None
+        self.max_interval_ms = 0.0
+        self.gaps = 0
+        self.sequence_gaps = 0
+        self.last_seq = None
+
+    def record(self, received_ms, event_times, seq=None, prev_seq=None):
+        """
+        Record one message
+
+        Args:
+            received_ms (float): Local receipt time (Unix ms)
+            event_times (list): Event timestamps carried by the message (ms)
+            seq (int, optional): Sequence number of the message
+            prev_seq (int, optional): Sequence number of the previous message
+        """
+        if self.last_receipt is not None:
+            interval = received_ms - self.last_receipt
+            self.max_interval_ms = max(self.max_interval_ms, interval)
+            if interval > self.gap_ms:
+                self.gaps += 1
+        else:
+            self.first_receipt = received_ms
+        self.last_receipt = received_ms
+        self.messages += 1
+        self.events += len(event_times)
+
+        if prev_seq is not None and self.last_seq is not None and prev_seq != self.last_seq:
+            self.sequence_gaps += 1
+        if seq is not None:
+            self.last_seq = seq
+
+        if not event_times:
+            return
+        # Lag of the message is measured against its newest event
+        lag = received_ms - max(event_times)
+        self.recent.append((received_ms, lag))
+        self.lag_sum += lag
+        self.lag_min = lag if self.lag_min is None else min(self.lag_min, lag)
+        self.lag_max = lag if self.lag_max is None else max(self.lag_max, lag)
+        if lag < 0:
+            # Clock skew: the exchange clock is ahead of ours
+            self.negative_lags += 1
+        self.histogram.record(max(lag, 0.0))
+
+    def summary(self):
+        """
+        Summarize the channel
+
+        Returns:
+            dict: Message counts, throughput, lag statistics in ms and gap counters
+        """
+        lag_count = self.histogram.total_count
+        elapsed = (self.last_receipt - self.first_receipt) / 1000 if self.messages > 1 else 0.0
+        return {
+            'messages': self.messages,
+            'events': self.events,
+            'messages_per_second': (self.messages - 1) / elapsed if elapsed > 0 else 0.0,
+            'lag_mean': self.lag_sum / lag_count if lag_count else None,
+            'lag_min': self.lag_min,
+            'lag_max': self.lag_max,
+            'lag_percentiles': self.histogram.percentiles(),
+            'negative_lags': self.negative_lags,
+            'max_interval_ms': self.max_interval_ms,
+            'gaps': self.gaps,
+            'sequence_gaps': self.sequence_gaps,
+            'histogram': self.histogram.to_dict()
+        }
+
+
+class WebSocketProbe:
+    """
+    Subscribe to an exchange's public channels and measure delivery lag
+
+    Args:
+        exchange (str): Exchange identifier
+        url (str, optional): WebSocket URL, defaults to WS_ENDPOINTS
+        channels (list, optional): Channel arguments, defaults to WS_ENDPOINTS
+        record_file (str, optional): Append every raw frame to this JSON lines
+            file, for later replay
+    """
+
+    def __init__(self, exchange, url=None, channels=None, record_file=None):
+        self.exchange = exchange
+        self.url = url or WS_ENDPOINTS[exchange]['url']
+        self.channels = channels if channels is not None else WS_ENDPOINTS[exchange]['channels']
+        self.record_file = record_file
+        self.stats = {}
+        self.connects = 0
+        self.reconnects = 0
+        self.errors = []
+        self._recorder = None
+
+    def handle_frame(self, raw, received_ms):
+        """
+        Process one received frame
+
+        Args:
+            raw (str): Frame text
+            received_ms (float): Local receipt time (Unix ms)
+        """
+        if self._recorder is not None:
+            self._recorder.write(json.dumps({'t': received_ms, 'frame': raw}) + '\n')
+        if raw == 'pong':
+            return
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            return
+        if 'event' in message:
+            if message['event'] == 'error':
+                error = f"{message.get('code')}: {message.get('msg')}"
+                self.errors.append(error)
+                print(f"Error: {self.exchange} subscription failed: {error}")
+            return
+        if 'data' not in message:
+            return
+
+        name = channel_name(message)
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = ChannelStats()
+        stats.record(received_ms, extract_event_times(message), *extract_sequence(message))
+
+    async def _session(self, websocket, deadline):
+        loop = asyncio.get_running_loop()
+        await websocket.send(json.dumps(subscribe_message(self.exchange, self.channels)))
+        ping_interval = WS_SETTINGS.get('ping_interval', 20)
+        next_ping = loop.time() + ping_interval
+
+        while True:
+            now = loop.time()
+            if now >= deadline:
+                return
+            if now >= next_ping:
+                await websocket.send('ping')
+                next_ping = now + ping_interval
+            try:
+                raw = await asyncio.wait_for(websocket.recv(), min(deadline, next_ping) - now)
+            except asyncio.TimeoutError:
+                continue
+            self.handle_frame(raw, time.time() * 1000)
+
+    async def run(self, duration=None):
+        """
+        Stay subscribed for duration seconds, reconnecting on disconnects
+
+        Args:
+            duration (float, optional): Seconds, defaults to WS_SETTINGS['duration']
+
+        Returns:
+            dict: Probe summary (see summary())
+        """
+        websockets = import_websockets()
+        loop = asyncio.get_running_loop()
+        duration = duration if duration is not None else WS_SETTINGS['duration']
+        deadline = loop.time() + duration
+        self.started = time.time()
+
+        if self.record_file:
+            os.makedirs(os.path.dirname(self.record_file) or '.', exist_ok=True)
+            self._recorder = open(self.record_file, 'a')
+        try:
+            while loop.time() < deadline:
+                try:
+                    async with websockets.connect(
+                        self.url,
+                        ping_interval=None,
+                        open_timeout=WS_SETTINGS.get('open_timeout', 10),
+                        max_size=None
+                    ) as websocket:
+                        self.connects += 1
+                        await self._session(websocket, deadline)
+                except (OSError, asyncio.TimeoutError, websockets.exceptions.WebSocketException) as e:
+                    self.errors.append(str(e))
+                    print(f"Error: {self.exchange} WebSocket disconnected: {e}")
+
+                if self.reconnects >= WS_SETTINGS.get('max_reconnects', 10):
+                    print(f"Error: {self.exchange} WebSocket gave up after {self.reconnects} reconnects")
+                    break
+                await asyncio.sleep(min(WS_SETTINGS.get('reconnect_delay', 1.0), max(deadline - loop.time(), 0)))
+                if loop.time() < deadline:
+                    self.reconnects += 1
+        finally:
+            if self._recorder is not None:
+                self._recorder.close()
+                self._recorder = None
+        self.finished = time.time()
+        return self.summary()
+
+    def summary(self):
+        """
+        Summarize the probe
+
+        Returns:
+            dict: Exchange, URL, connection counters and per-channel summaries
+        """
+        return {
+            'exchange': self.exchange,
+            'url': self.url,
+            'started': getattr(self, 'started', None),
+            'finished': getattr(self, 'finished', None),
+            'connects': self.connects,
+            'reconnects': self.reconnects,
+            'errors': self.errors[-20:],
+            'channels': {name: stats.summary() for name, stats in self.stats.items()}
+        }
+
+
+async def probe_exchanges(exchanges, duration=None, urls=None, record_dir=None):
+    """
+    Probe several exchanges' WebSocket feeds concurrently
+
+    Args:
+        exchanges (list): Exchange identifiers
+        duration (float, optional): Seconds per probe
+        urls (dict, optional): Per-exchange URL overrides
+        record_dir (str, optional): Record raw frames to <record_dir>/<exchange>.jsonl
+
+    Returns:
+        list: Probe summaries
+    """
+    urls = urls or {}
+    probes = [
+        WebSocketProbe(
+            exchange,
+            url=urls.get(exchange),
+            record_file=os.path.join(record_dir, f"{exchange}.jsonl") if record_dir else None
+        )
+        for exchange in exchanges
+    ]
+    return await asyncio.gather(*(probe.run(duration) for probe in probes))
+
+
+def format_summary(summary):
+    """Format a probe summary as text lines for the console"""
+    lines = [f"{summary['exchange'].upper()} {summary['url']} "
+             f"(connects: {summary['connects']}, reconnects: {summary['reconnects']})"]
+    for name, channel in summary['channels'].items():
+        p50 = channel['lag_percentiles'].get(50)
+        p99 = channel['lag_percentiles'].get(99)
+        lines.append(
+            f"  {name:<24} {channel['messages']:>7} msgs {channel['messages_per_second']:>8.2f} msg/s"
+            f"  lag p50 {p50 if p50 is not None else float('nan'):>8.2f} ms"
+            f"  p99 {p99 if p99 is not None else float('nan'):>8.2f} ms"
+            f"  gaps {channel['gaps']}  seq gaps {channel['sequence_gaps']}"
+        )
+    return lines
+
+
+def save_ws_results(summaries, output_dir=None):
+    """
+    Save probe summaries to a timestamped JSON file
+
+    Args:
+        summaries (list): Probe summaries
+        output_dir (str, optional): Directory, defaults to WS_SETTINGS['output_dir']
+
+    Returns:
+        str: Path of the saved file
+    """
+    output_dir = output_dir or WS_SETTINGS['output_dir']
+    os.makedirs(output_dir, exist_ok=True)
+    filename = os.path.join(output_dir, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_ws.json")
+    with open(filename, 'w') as f:
+        json.dump(summaries, f, indent=2)
+    return filename
+
+
+def main():
+    """Command line entry point"""
+    args = sys.argv[1:]
+    options = {}
+    positional = []
+    i = 0
+    while i < len(args):
+        if args[i] == '--mock':
+            options['mock'] = True
+        elif args[i] in ('--replay', '--record') and i + 1 < len(args):
+            options[args[i][2:]] = args[i + 1]
+            i += 1
+        else:
+            positional.append(args[i])
+        i += 1
+
+    exchange = positional[0].lower() if positional else 'all'
+    duration = float(positional[1]) if len(positional) > 1 else None
+    exchanges = list(WS_ENDPOINTS) if exchange == 'all' else [exchange]
+    if any(name not in WS_ENDPOINTS for name in exchanges):
+        print(f"Error: Invalid exchange '{exchange}'. Valid options are: {', '.join(WS_ENDPOINTS)}, all")
+        return 1
+
+    servers = []
+    urls = {}
+    if options.get('mock') or options.get('replay'):
+        from .ws_replay import start_replay_server, load_frames, synthetic_frames
+        for name in exchanges:
+            if options.get('replay'):
+                frames = load_frames(os.path.join(options['replay'], f"{name}.jsonl"))
+            else:
+                frames = synthetic_frames(name, seconds=duration or WS_SETTINGS['duration'])
+            server = start_replay_server(frames)
+            servers.append(server)
+            urls[name] = server.url
+            print(f"Replaying {len(frames)} {name} frames at {server.url}")
+
+    try:
+        summaries = asyncio.run(probe_exchanges(exchanges, duration, urls, options.get('record')))
+    finally:
+        for server in servers:
+            server.shutdown()
+
+    for summary in summaries:
+        print("\n".join(format_summary(summary)))
+    print(f"Results saved: {save_ws_results(summaries)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+"""
+Local WebSocket stand-in that replays recorded frames
+
+This module serves recorded exchange frames (see the --record option of
+scripts/ws_probe.py) over a local WebSocket, so the probe can be run and
+tested without the real feeds. Frames are sent with their original
+spacing, and their event timestamps are shifted so that every frame
+keeps the delivery lag it was recorded with. Without a recording,
+synthetic_frames generates a feed from the mock exchange payloads, with
+lags drawn from the MOCK_SERVER latency settings.
+
+Requires the optional websockets package (pip install websockets).
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+
+from .config import WS_ENDPOINTS
+from .mock_exchange import (
+    okx_ticker, okx_books, okx_trades, bitget_ticker, bitget_depth, bitget_trades,
+    get_exchange_settings, sample_delay
+)
+from .ws_probe import import_websockets, shift_event_times
+
+
+def load_frames(path):
+    """
+    Load a recording made with WebSocketProbe(record_file=...)
+
+    Only data pushes are kept; pongs and subscription events are dropped.
+
+    Args:
+        path (str): JSON lines file of {"t": receipt ms, "frame": text}
+
+    Returns:
+        list: (receipt ms, frame text) tuples in receipt order
+    """
+    frames = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if '"data"' in entry['frame']:
+                frames.append((entry['t'], entry['frame']))
+    frames.sort(key=lambda frame: frame[0])
+    return frames
+
+
+def _synthetic_data(exchange, arg, event_time, seq, rng):
+    channel = arg['channel']
+    if exchange == 'okx':
+        if channel == 'tickers':
+            data = okx_ticker({'instId': arg['instId']}, rng)['data']
+        elif channel.startswith('books'):
+            data = okx_books({'sz': 5}, rng)['data']
+            data[0].update({'instId': arg['instId'], 'seqId': seq, 'prevSeqId': seq - 1})
+        else:
+            data = okx_trades({'instId': arg['instId'], 'limit': 1}, rng)['data']
+        for item in data:
+            item['ts'] = str(event_time)
+        return data
+
+    if channel == 'ticker':
+        data = bitget_ticker({'symbol': arg['instId']}, rng)['data']
+        data['systemTime'] = event_time
+        return [data]
+    if channel.startswith('books'):
+        depth = bitget_depth({'limit': 5}, rng)['data']
+        return [{'asks': depth['asks'], 'bids': depth['bids'], 'ts': str(event_time)}]
+    trade = bitget_trades({'symbol': arg['instId'], 'limit': 1}, rng)['data'][0]
+    return [[str(event_time), trade['price'], trade['size'], trade['side']]]
+
+
+def synthetic_frames(exchange, seconds=10, rate=20, seed=None):
+    """
+    Generate a recording-shaped feed from the mock exchange payloads
+
+    Args:
+        exchange (str): Exchange identifier
+        seconds (float): Length of the feed
+        rate (float): Messages per second, spread round-robin over the channels
+        seed (int, optional): Random seed
+
+    Returns:
+        list: (receipt ms, frame text) tuples
+    """
+    rng = random.Random(seed)
+    settings = get_exchange_settings(exchange)
+    channels = WS_ENDPOINTS[exchange]['channels']
+    start = time.time() * 1000
+    frames = []
+    for i in range(int(seconds * rate)):
+        arg = channels[i % len(channels)]
+        received = start + i * 1000 / rate
+        event_time = int(received - sample_delay(settings, rng) * 1000)
+        message = {'arg': arg, 'data': _synthetic_data(exchange, arg, event_time, i // len(channels) + 1, rng)}
+        if exchange == 'bitget':
+            message = {'action': 'snapshot', **message}
+        frames.append((received, json.dumps(message, separators=(',', ':'))))
+    return frames
+
+
+class ReplayServer:
+    """
+    WebSocket server replaying frames to every subscriber on a background thread
+
+    Args:
+        frames (list): (receipt ms, frame text) tuples
+        host (str): Bind address
+        port (int): Port (0 picks a free port)
+        speed (float): Replay speed multiplier
+        repeat (bool): Start over when the recording ends
+    """
+
+    def __init__(self, frames, host='127.0.0.1', port=0, speed=1.0, repeat=True):
+        self.frames = frames
+        self.host = host
+        self.port = port
+        self.speed = speed
+        self.repeat = repeat
+        self._loop = None
+        self._stop = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._serve, name='ws-replay', daemon=True)
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    def start(self):
+        """Start serving and wait until the port is bound"""
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def shutdown(self):
+        """Stop the server and its thread"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+        self._thread.join(timeout=5)
+
+    def _serve(self):
+        asyncio.run(self._main())
+
+    async def _main(self):
+        websockets = import_websockets()
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        async with websockets.serve(self._handler, self.host, self.port, max_size=None) as server:
+            self.port = next(iter(server.sockets)).getsockname()[1]
+            self._ready.set()
+            await self._stop.wait()
+
+    async def _handler(self, websocket, path=None):
+        subscribed = asyncio.Event()
+
+        async def read():
+            async for raw in websocket:
+                if raw == 'ping':
+                    await websocket.send('pong')
+                    continue
+                request = json.loads(raw)
+                for arg in request.get('args', []):
+                    await websocket.send(json.dumps({'event': request.get('op'), 'arg': arg}))
+                subscribed.set()
+
+        reader = asyncio.ensure_future(read())
+        try:
+            await asyncio.wait({reader, asyncio.ensure_future(subscribed.wait())},
+                               return_when=asyncio.FIRST_COMPLETED)
+            if subscribed.is_set():
+                await self._replay(websocket)
+        except Exception:
+            # Client went away
+            pass
+        finally:
+            reader.cancel()
+
+    async def _replay(self, websocket):
+        if not self.frames:
+            return
+        first = self.frames[0][0]
+        while True:
+            start = time.time() * 1000
+            for recorded, raw in self.frames:
+                delay = (start + (recorded - first) / self.speed - time.time() * 1000) / 1000
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                # Keep the recorded lag: shift event times by how late we are sending
+                message = shift_event_times(json.loads(raw), int(round(time.time() * 1000 - recorded)))
+                await websocket.send(json.dumps(message, separators=(',', ':')))
+            if not self.repeat:
+                return
+
+
+def start_replay_server(frames, host='127.0.0.1', port=0, speed=1.0, repeat=True):
+    """
+    Start a replay server on a background thread
+
+    Args:
+        frames (list): (receipt ms, frame text) tuples, from load_frames or synthetic_frames
+        host (str): Bind address
+        port (int): Port (0 picks a free port)
+        speed (float): Replay speed multiplier
+        repeat (bool): Start over when the recording ends
+
+    Returns:
+        ReplayServer: Running server; url gives its ws:// address
+    """
+    return ReplayServer(frames, host, port, speed, repeat).start()
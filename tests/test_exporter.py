@@ -0,0 +1,28 @@
+"""Tests for the metrics registry of the exporter (scripts/exporter.py)"""
+from scripts.exporter import MetricsRegistry
+
+
+def test_snapshot_shares_the_summary_histograms():
+    registry = MetricsRegistry(buckets_ms=[10, 100], quantiles=[0.5])
+    for latency in (5.0, 50.0, 500.0):
+        registry.observe('okx', 'book', {'latency': latency})
+
+    latency, counters, _ = registry.snapshot()
+    series = latency[('okx', 'book', 'total')]
+    live = registry._latency[('okx', 'book', 'total')]
+    assert series.histogram is live.histogram
+    assert series.buckets == [1, 1, 1] and series.buckets is not live.buckets
+    assert counters['requests'][('okx', 'book')] == 3
+
+
+def test_render_reports_quantiles_and_errors():
+    registry = MetricsRegistry(buckets_ms=[10, 100], quantiles=[0.5])
+    for latency in (5.0, 50.0, 500.0):
+        registry.observe('okx', 'book', {'latency': latency})
+    registry.observe('okx', 'book', {'latency': 20.0, 'status': 503}, error=True)
+
+    text = registry.render()
+    median = next(line for line in text.splitlines()
+                  if line.startswith('cex_api_request_latency_seconds{') and 'phase="total"' in line)
+    assert abs(float(median.split()[-1]) - 0.05) < 0.001
+    assert 'cex_api_errors_total{exchange="okx",endpoint="book"} 1' in text
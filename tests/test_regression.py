@@ -0,0 +1,68 @@
+"""Known-answer tests for the regression statistics (scripts/regression.py)"""
+import json
+import os
+
+import numpy as np
+
+from scripts.regression import mann_whitney, bootstrap_percentiles, detect_change_points, load_history
+
+
+def lognormal(rng, median, size):
+    return median * np.exp(rng.normal(0, 0.2, size))
+
+
+def test_mann_whitney_flags_shifted_distribution():
+    rng = np.random.default_rng(1)
+    baseline = lognormal(rng, 100, 500)
+    candidate = lognormal(rng, 120, 100)
+    _, p_value = mann_whitney(candidate, baseline)
+    assert p_value < 0.001
+
+
+def test_mann_whitney_ignores_identical_distribution():
+    rng = np.random.default_rng(2)
+    baseline = lognormal(rng, 100, 500)
+    candidate = lognormal(rng, 100, 100)
+    _, p_value = mann_whitney(candidate, baseline)
+    assert p_value > 0.05
+    # A faster candidate is not a regression either (one-sided test)
+    _, p_value = mann_whitney(lognormal(rng, 80, 100), baseline)
+    assert p_value > 0.5
+
+
+def test_bootstrap_percentiles_bounds_the_shift():
+    rng = np.random.default_rng(3)
+    baseline = lognormal(rng, 100, 500)
+    shifted = bootstrap_percentiles(lognormal(rng, 120, 200), baseline, [50, 99], 500, 0.95, rng)
+    assert shifted['p50']['ci'][0] > 10
+    same = bootstrap_percentiles(lognormal(rng, 100, 200), baseline, [50, 99], 500, 0.95, rng)
+    assert same['p50']['ci'][0] < 0 < same['p50']['ci'][1]
+
+
+def test_detect_change_points_finds_step():
+    rng = np.random.default_rng(4)
+    step = np.r_[np.full(20, 100.0), np.full(20, 150.0)] * np.exp(rng.normal(0, 0.02, 40))
+    assert detect_change_points(step, threshold=6.0, min_segment=5) == [20]
+    flat = np.full(40, 100.0) * np.exp(rng.normal(0, 0.02, 40))
+    assert detect_change_points(flat, threshold=6.0, min_segment=5) == []
+
+
+def test_load_history_keeps_machines_apart(tmp_path):
+    rng = np.random.default_rng(5)
+    benchmark_dir = tmp_path / '.benchmarks'
+    for machine, median in (('Linux-CPython-3.11-64bit', 50), ('Windows-CPython-3.13-64bit', 400)):
+        os.makedirs(benchmark_dir / machine)
+        for run in range(3):
+            samples = [{'latency': float(v)} for v in lognormal(rng, median, 20)]
+            with open(benchmark_dir / machine / f"{run + 1:04d}_all.json", 'w') as f:
+                json.dump({
+                    'datetime': f"2026-01-0{run + 1}T00:00:00+00:00",
+                    'benchmarks': [{'group': 'okx', 'name': 'test_endpoint_benchmark[okx-book]',
+                                    'extra_info': {'endpoint': 'book', 'samples': samples}}],
+                }, f)
+
+    history = load_history(str(benchmark_dir), str(tmp_path / 'cache.npz'))
+    assert sorted(history) == [('Linux-CPython-3.11-64bit', 'okx', 'okx_book'),
+                               ('Windows-CPython-3.13-64bit', 'okx', 'okx_book')]
+    assert all(len(series['files']) == 3 for series in history.values())
+    assert np.all(history[('Linux-CPython-3.11-64bit', 'okx', 'okx_book')]['centers'] < 100)
@@ -0,0 +1,14 @@
+"""Tests for the report cache (scripts/benchmark_core.py)"""
+from scripts.benchmark_core import load_report_cache, save_report_cache
+from scripts.config import HISTOGRAM
+
+
+def test_report_cache_is_dropped_when_the_histogram_config_changes(tmp_path, monkeypatch):
+    cache_file = str(tmp_path / 'report_cache.json')
+    cache = load_report_cache(cache_file)
+    cache['sections']['okx'] = {'digest': 'abc', 'html': '<h2>OKX Exchange</h2>'}
+    save_report_cache(cache, cache_file)
+    assert load_report_cache(cache_file)['sections'] == cache['sections']
+
+    monkeypatch.setitem(HISTOGRAM, 'percentiles', [50, 99.99])
+    assert load_report_cache(cache_file)['sections'] == {}
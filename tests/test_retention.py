@@ -0,0 +1,107 @@
+"""Tests for the retention tiers (scripts/retention.py)"""
+import numpy as np
+
+from scripts.config import RETENTION
+from scripts.retention import (
+    compact_series, read_aggregates, aggregate_samples, hist_percentiles, prune_benchmark_runs, TIERS,
+)
+from scripts.sample_store import append_samples, read_samples, drop_before, series_generation
+
+NOW = 1_800_000_000.0  # A whole hour, like any real "now" after flooring
+DAY = 86400
+
+
+def fill_series(store_dir, days=60, step=300):
+    # One sample every step seconds over the last days, every 7th one failed
+    rng = np.random.default_rng(3)
+    timestamps = np.arange(NOW - days * DAY, NOW, step)
+    samples = [{'timestamp': float(t), 'latency': float(rng.lognormal(3, 0.3)), 'error': 'timeout' if i % 7 == 0 else None}
+               for i, t in enumerate(timestamps)]
+    append_samples('okx', 'ticker', samples, store_dir)
+    return len(samples)
+
+
+def row_count(store_dir, aggregate_dir):
+    # Requests held by the raw rows and both aggregate tiers
+    total = len(read_samples('okx', 'ticker', columns=['timestamp'], store_dir=store_dir)['timestamp'])
+    for tier in TIERS:
+        aggregates = read_aggregates(tier, 'okx', 'ticker', aggregate_dir=aggregate_dir)
+        total += int(aggregates['count'].sum() + aggregates['errors'].sum())
+    return total
+
+
+def test_compact_series_keeps_every_request_across_tiers(tmp_path):
+    store_dir, aggregate_dir = str(tmp_path / 'store'), str(tmp_path / 'aggregates')
+    total = fill_series(store_dir)
+
+    stats = compact_series('okx', 'ticker', NOW, store_dir=store_dir, aggregate_dir=aggregate_dir)
+    assert stats['raw_removed'] and stats['minute_added'] and stats['hour_added']
+    assert row_count(store_dir, aggregate_dir) == total
+
+    raw = read_samples('okx', 'ticker', columns=['timestamp'], store_dir=store_dir)['timestamp']
+    minutes = read_aggregates('minute', 'okx', 'ticker', aggregate_dir=aggregate_dir)['bucket']
+    hours = read_aggregates('hour', 'okx', 'ticker', aggregate_dir=aggregate_dir)['bucket']
+    assert raw.min() >= NOW - RETENTION['raw_days'] * DAY
+    assert minutes.min() >= NOW - RETENTION['minute_days'] * DAY
+    assert minutes.max() < raw.min() and hours.max() < minutes.min()
+
+
+def test_compact_series_rerun_is_a_no_op(tmp_path):
+    store_dir, aggregate_dir = str(tmp_path / 'store'), str(tmp_path / 'aggregates')
+    total = fill_series(store_dir)
+    compact_series('okx', 'ticker', NOW, store_dir=store_dir, aggregate_dir=aggregate_dir)
+    before = {tier: read_aggregates(tier, 'okx', 'ticker', aggregate_dir=aggregate_dir) for tier in TIERS}
+
+    stats = compact_series('okx', 'ticker', NOW, store_dir=store_dir, aggregate_dir=aggregate_dir)
+    assert not any(stats.values())
+    assert row_count(store_dir, aggregate_dir) == total
+    for tier in TIERS:
+        after = read_aggregates(tier, 'okx', 'ticker', aggregate_dir=aggregate_dir)
+        for column, values in before[tier].items():
+            np.testing.assert_array_equal(after[column], values)
+
+
+def test_compact_series_dry_run_changes_nothing(tmp_path):
+    store_dir, aggregate_dir = str(tmp_path / 'store'), str(tmp_path / 'aggregates')
+    total = fill_series(store_dir)
+    stats = compact_series('okx', 'ticker', NOW, dry_run=True, store_dir=store_dir, aggregate_dir=aggregate_dir)
+    assert stats['raw_removed']
+    assert len(read_samples('okx', 'ticker', columns=['timestamp'], store_dir=store_dir)['timestamp']) == total
+
+
+def test_drop_before_removes_older_rows_and_bumps_generation(tmp_path):
+    store_dir = str(tmp_path / 'store')
+    total = fill_series(store_dir, days=2, step=60)
+    cutoff = NOW - DAY
+    generation = series_generation('okx', 'ticker', store_dir)
+
+    removed = drop_before('okx', 'ticker', cutoff, store_dir)
+    remaining = read_samples('okx', 'ticker', columns=['timestamp'], store_dir=store_dir)['timestamp']
+    assert removed == DAY // 60
+    assert len(remaining) == total - removed
+    assert remaining.min() == cutoff
+    assert series_generation('okx', 'ticker', store_dir) == generation + 1
+
+
+def test_hist_percentiles_within_one_bucket():
+    rng = np.random.default_rng(4)
+    latencies = rng.lognormal(3, 0.5, 20000)
+    timestamps = np.arange(len(latencies), dtype=float)
+    aggregates = aggregate_samples(timestamps, latencies, np.ones(len(latencies), dtype=bool), 3600)
+    estimates = hist_percentiles(aggregates['hist'].sum(axis=0), (50, 99))
+    for p, value in estimates.items():
+        exact = np.percentile(latencies, p)
+        assert abs(value / exact - 1) < 0.19
+
+
+def test_prune_benchmark_runs_orders_by_counter(tmp_path):
+    machine = tmp_path / 'Linux-CPython-3.10-64bit'
+    machine.mkdir()
+    for counter in (998, 999, 1000, 9999, 10000, 10001):
+        (machine / f"{counter:04d}_all.json").write_text('{}')
+    (machine / 'notes.json').write_text('{}')
+
+    assert prune_benchmark_runs(str(tmp_path), keep=3, dry_run=True) == 3
+    assert prune_benchmark_runs(str(tmp_path), keep=3) == 3
+    assert sorted(file.name for file in machine.iterdir()) == ['10000_all.json', '10001_all.json', '9999_all.json',
+                                                                'notes.json']
@@ -0,0 +1,42 @@
+"""Tests for importing pytest-benchmark runs into the sample store (scripts/sample_store.py)"""
+import json
+
+from scripts.config import MOCK_SERVER
+from scripts.sample_store import import_benchmark_files, list_series, read_samples
+
+
+def write_run(directory, name, benchmarks):
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / name).write_text(json.dumps({'datetime': '2026-01-01T00:00:00', 'benchmarks': benchmarks}))
+
+
+def benchmark(endpoint, symbol, timestamp, **extra_info):
+    return {
+        'group': 'okx',
+        'name': f"test_endpoint_benchmark[okx-{endpoint}-{symbol}]",
+        'stats': {'mean': 0.01},
+        'extra_info': dict(extra_info, exchange='okx', endpoint=endpoint, symbol=symbol,
+                           samples=[{'timestamp': timestamp, 'latency': 10.0, 'status': 200}]),
+    }
+
+
+def test_import_keeps_symbols_in_their_own_series(tmp_path):
+    benchmark_dir, store_dir = tmp_path / '.benchmarks', str(tmp_path / 'store')
+    write_run(benchmark_dir / 'Linux', '0001_all.json',
+              [benchmark('book', 'BTC-USDT', 1.0), benchmark('book', 'ETH-USDT', 2.0)])
+
+    assert import_benchmark_files(str(benchmark_dir), store_dir) == 2
+    assert sorted(list_series(store_dir)) == [('okx', 'book'), ('okx', 'book@ETH-USDT')]
+    assert list(read_samples('okx', 'book@ETH-USDT', columns=['timestamp'], store_dir=store_dir)['timestamp']) == [2.0]
+
+
+def test_import_reads_the_mock_run_directory_in_mock_mode(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(MOCK_SERVER, 'enabled', True)
+    store_dir = str(tmp_path / 'store')
+    write_run(tmp_path / '.benchmarks' / 'Linux', '0001_all.json', [benchmark('book', 'BTC-USDT', 1.0)])
+    write_run(tmp_path / MOCK_SERVER['benchmark_dir'] / 'Linux', '0001_all.json',
+              [benchmark('book', 'BTC-USDT', 2.0, mock=True)])
+
+    assert import_benchmark_files(store_dir=store_dir) == 1
+    assert list(read_samples('okx', 'book', columns=['timestamp'], store_dir=store_dir)['timestamp']) == [2.0]
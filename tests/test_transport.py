@@ -0,0 +1,49 @@
+"""Tests for the instrumented transport (scripts/transport.py)"""
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import requests
+
+from scripts.transport import InstrumentedAdapter
+
+
+class ClosingHandler(BaseHTTPRequestHandler):
+    """Keep-alive handler that drops the connection after its second response"""
+    protocol_version = 'HTTP/1.1'
+    served = 0
+
+    def do_GET(self):
+        type(self).served += 1
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+        if self.served == 2:
+            self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+def test_reconnect_on_a_pooled_connection_is_cold():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ClosingHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        session = requests.Session()
+        session.mount('http://', InstrumentedAdapter())
+        url = f"http://127.0.0.1:{server.server_address[1]}/"
+        responses = []
+        for _ in range(4):
+            responses.append(session.get(url, timeout=5))
+            time.sleep(0.05)  # Let the server's close reach the client before the next request
+        session.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    # urllib3 reopens the dropped keep-alive connection on the same connection object
+    assert [response.connection_state for response in responses] == ['cold', 'warm', 'cold', 'warm']
+    assert responses[2].phase_timings['connect'] > 0
+    assert responses[3].phase_timings['connect'] == 0